@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched LSTM forecasting against the step-by-step loop
+=====================================
+
+    python bench_lstm_inference.py                         # 500 symbols, 30 steps
+    python bench_lstm_inference.py --symbols 1000 --loop-symbols 50
+
+One freshly built LSTMModel forecasts every symbol's series. The loop
+baseline is the old ``predict``: one ``model.predict`` call on a single
+(1, 60, 1) window per step and symbol, shifted with ``np.roll``. Running it
+for the whole universe takes minutes, so it is timed on ``--loop-symbols``
+series and scaled up. The batched path is timed on the full universe and
+checked against the loop on the symbols both ran.
+"""
+
+import argparse
+import time
+from typing import Callable, Tuple
+
+import numpy as np
+
+from financial_ai_trainer import LSTMModel
+
+
+def random_walks(symbols: int, length: int, seed: int = 0) -> np.ndarray:
+    """Seeded positive price paths, one row per symbol"""
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (symbols, length)), axis=1))
+
+
+def step_by_step(lstm: LSTMModel, data: np.ndarray, steps: int) -> np.ndarray:
+    """The former ``LSTMModel.predict``: one Keras predict call per step"""
+    scaled_data = lstm.scaler.transform(data.reshape(-1, 1))
+    predictions = []
+    current_sequence = scaled_data[-lstm.sequence_length:].flatten()
+    for _ in range(steps):
+        pred = lstm.model.predict(current_sequence.reshape((1, lstm.sequence_length, 1)), verbose=0)
+        predictions.append(pred[0, 0])
+        current_sequence = np.roll(current_sequence, -1)
+        current_sequence[-1] = pred[0, 0]
+    return lstm.scaler.inverse_transform(np.array(predictions).reshape(-1, 1)).flatten()
+
+
+def timed(func: Callable, *args) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--history", type=int, default=250, help="bars per symbol")
+    parser.add_argument("--loop-symbols", type=int, default=20, help="symbols timed with the step-by-step loop")
+    args = parser.parse_args()
+
+    series = random_walks(args.symbols, args.history)
+    lstm = LSTMModel(sequence_length=60)
+    lstm.model = lstm.build_model()
+    lstm.scaler.fit(series.reshape(-1, 1))
+
+    # Trace the compiled forward pass before timing
+    lstm.predict_batch(series[:2], steps=1)
+    batched_time, batched = timed(lstm.predict_batch, series, args.steps)
+
+    sample = min(args.loop_symbols, args.symbols)
+    loop_time, looped = timed(lambda: np.stack([step_by_step(lstm, row, args.steps) for row in series[:sample]]))
+    estimated = loop_time * args.symbols / sample
+    if not np.allclose(looped, batched[:sample], rtol=1e-4, atol=1e-4):
+        raise SystemExit("Batched forecasts differ from the step-by-step loop")
+
+    print(f"{args.symbols} symbols x {args.steps} steps")
+    print(f"  step-by-step: {loop_time:8.2f}s for {sample} symbols, ~{estimated:.1f}s for all")
+    print(f"  batched:      {batched_time:8.2f}s ({estimated / batched_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark panel feature computation against the per-symbol pipeline
+=====================================
+
+    python bench_panel_features.py                          # 300 symbols x 5y of daily bars
+    python bench_panel_features.py --symbols 1000 --chunk-size 64
+
+The baseline is ``build_features`` called once per symbol, as the trainer
+did before ``build_panel_features``. Both paths get the same seeded
+universe: symbols listed on different days, some with missing bars. The
+panel's frames are checked against the per-symbol frames before timing is
+reported.
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import build_features
+from panel_features import DEFAULT_CHUNK_SIZE, build_panel_features
+
+
+def sample_universe(symbols: int, rows: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """Seeded daily OHLCV frames on a shared business-day calendar"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=rows, freq='B')
+    frames = {}
+    for i in range(symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+        open_ = close * (1 + rng.normal(0, 0.005, rows))
+        df = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, rows)),
+            'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, rows)),
+            'Close': close,
+            'Volume': rng.lognormal(16, 0.5, rows).round(),
+        }, index=dates)
+        # Every tenth symbol listed later, every seventh missing a few days
+        if i % 10 == 9:
+            df = df.iloc[rows // 5:]
+        if i % 7 == 6:
+            df = df.drop(df.index[rows // 2:rows // 2 + 3])
+        frames[f'SYM{i}'] = df
+    return frames
+
+
+def per_symbol_features(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    return {symbol: build_features(df) for symbol, df in frames.items()}
+
+
+def max_error(got: Dict[str, pd.DataFrame], expected: Dict[str, pd.DataFrame]) -> float:
+    """Largest error over every symbol, relative for values above 1 and absolute below"""
+    error = 0.0
+    for symbol, frame in expected.items():
+        if not frame.index.equals(got[symbol].index) or list(frame.columns) != list(got[symbol].columns):
+            raise SystemExit(f"Panel rows or columns differ from build_features for {symbol}")
+        a, b = got[symbol].to_numpy(), frame.to_numpy()
+        error = max(error, float(np.max(np.abs(a - b) / np.maximum(np.abs(b), 1), initial=0)))
+    return error
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--rows", type=int, default=1260, help="bars per symbol")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="symbols per panel pass")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing; the best is kept")
+    args = parser.parse_args()
+
+    frames = sample_universe(args.symbols, args.rows)
+    loop_time, expected = min((timed(per_symbol_features, frames) for _ in range(args.repeat)),
+                              key=lambda run: run[0])
+    panel_time, panel = min((timed(build_panel_features, frames, chunk_size=args.chunk_size)
+                             for _ in range(args.repeat)), key=lambda run: run[0])
+
+    error = max_error(panel, expected)
+    if error > 1e-8:
+        raise SystemExit(f"Panel features differ from build_features by {error:.2e}")
+
+    print(f"{args.symbols} symbols x {args.rows} bars ({len(next(iter(expected.values())).columns)} features)")
+    print(f"  per-symbol build_features: {loop_time:7.2f}s")
+    print(f"  build_panel_features:      {panel_time:7.2f}s  (max error {error:.1e}, "
+          f"{loop_time / panel_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
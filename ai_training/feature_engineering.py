@@ -0,0 +1,192 @@
+"""
+Batch Feature Engineering
+=====================================
+
+The feature set every model is trained on, computed over a whole history
+of daily bars: TA-Lib and price-structure indicators, then lags, rolling
+statistics and indicator interactions. Each feature is declared once in
+``FEATURES``, a ``FeatureGraph`` that computes only what is asked for,
+shares common inputs and caches outputs by input data.
+``online_features.OnlineFeatures`` computes the same features one bar at
+a time for live scoring.
+"""
+
+from functools import partial
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import talib
+
+from feature_graph import FeatureCache, FeatureGraph
+from feature_matrix import FeatureMatrixStore, feature_matrix
+from rolling_moments import rolling_labels, rolling_mean_std, rolling_moments, rolling_statistics, sliding_extreme
+
+# Lagged and rolling features used for training and live signals
+LAG_COLUMNS = ['Close', 'Volume', 'RSI']
+LAGS = [1, 2, 3, 5, 10]
+ROLLING_COLUMNS = ['Close', 'Volume']
+ROLLING_WINDOWS = [5, 10, 20]
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+INDICATOR_COLUMNS = [
+    'RSI', 'MACD', 'MACD_signal', 'MACD_hist', 'BB_upper', 'BB_middle', 'BB_lower',
+    'SMA_20', 'SMA_50', 'SMA_200', 'EMA_12', 'EMA_26', 'ATR', 'ADX', 'CCI', 'ROC', 'Williams_R',
+    'Price_Change', 'High_Low_Ratio', 'Volume_SMA', 'Volume_Ratio', 'Volatility', 'Log_Return',
+    'Support', 'Resistance', 'Price_Position',
+]
+INTERACTION_COLUMNS = ['RSI_Volume_Interaction', 'MACD_Price_Interaction', 'BB_Position', 'BB_Squeeze']
+
+FEATURES = FeatureGraph()
+
+# Technical indicators using TA-Lib
+FEATURES.add(['RSI'], ['Close'], partial(talib.RSI, timeperiod=14))
+FEATURES.add(['MACD', 'MACD_signal', 'MACD_hist'], ['Close'], talib.MACD)
+# BBANDS' default period changed between TA-Lib releases; keep the original 5
+FEATURES.add(['BB_upper', 'BB_middle', 'BB_lower'], ['Close'], partial(talib.BBANDS, timeperiod=5))
+for period in (20, 50, 200):
+    FEATURES.add([f'SMA_{period}'], ['Close'], partial(talib.SMA, timeperiod=period))
+for period in (12, 26):
+    FEATURES.add([f'EMA_{period}'], ['Close'], partial(talib.EMA, timeperiod=period))
+FEATURES.add(['ATR'], ['High', 'Low', 'Close'], talib.ATR)
+FEATURES.add(['ADX'], ['High', 'Low', 'Close'], talib.ADX)
+FEATURES.add(['CCI'], ['High', 'Low', 'Close'], talib.CCI)
+FEATURES.add(['ROC'], ['Close'], partial(talib.ROC, timeperiod=10))
+FEATURES.add(['Williams_R'], ['High', 'Low', 'Close'], talib.WILLR)
+
+
+def _shift(values: np.ndarray, lag: int) -> np.ndarray:
+    shifted = np.full(values.shape, np.nan)
+    if lag < len(values):
+        shifted[lag:] = values[:len(values) - lag]
+    return shifted
+
+
+def _ratio(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return a / b
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    return rolling_mean_std(values, window)[0]
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    return rolling_mean_std(values, window)[1]
+
+
+# Price-based features
+FEATURES.add(['Price_Change'], ['Close'], lambda close: _ratio(close, _shift(close, 1)) - 1)
+FEATURES.add(['High_Low_Ratio'], ['High', 'Low'], _ratio)
+FEATURES.add(['Volume_SMA'], ['Volume'], partial(_rolling_mean, window=20))
+FEATURES.add(['Volume_Ratio'], ['Volume', 'Volume_SMA'], _ratio)
+
+# Volatility features
+FEATURES.add(['Volatility'], ['Price_Change'], partial(_rolling_std, window=20))
+FEATURES.add(['Log_Return'], ['Close'], lambda close: np.log(_ratio(close, _shift(close, 1))))
+
+# Market structure features
+FEATURES.add(['Support'], ['Low'], partial(sliding_extreme, window=20, maximum=False))
+FEATURES.add(['Resistance'], ['High'], partial(sliding_extreme, window=20, maximum=True))
+FEATURES.add(['Price_Position'], ['Close', 'Support', 'Resistance'],
+             lambda close, support, resistance: _ratio(close - support, resistance - support))
+
+
+def _lags(values: np.ndarray, lags: Sequence[int]) -> List[np.ndarray]:
+    return [_shift(values, lag) for lag in lags]
+
+
+def _rolling(values: np.ndarray, windows: Sequence[int]) -> np.ndarray:
+    return np.concatenate([rolling_statistics(values, window) for window in windows])
+
+
+# Lagged values and rolling statistics, one node per column
+for col in LAG_COLUMNS:
+    FEATURES.add([f'{col}_lag_{lag}' for lag in LAGS], [col], partial(_lags, lags=tuple(LAGS)))
+for col in ROLLING_COLUMNS:
+    FEATURES.add(rolling_labels([col], ROLLING_WINDOWS), [col], partial(_rolling, windows=tuple(ROLLING_WINDOWS)))
+
+# Interactions between technical indicators
+FEATURES.add(['RSI_Volume_Interaction'], ['RSI', 'Volume_Ratio'], np.multiply)
+FEATURES.add(['MACD_Price_Interaction'], ['MACD', 'Price_Change'], np.multiply)
+FEATURES.add(['BB_Position'], ['Close', 'BB_upper', 'BB_lower'],
+             lambda close, upper, lower: _ratio(close - lower, upper - lower))
+FEATURES.add(['BB_Squeeze'], ['Close', 'BB_upper', 'BB_lower'], lambda close, upper, lower: _ratio(upper - lower, close))
+
+
+def feature_columns(extra_columns: Sequence[str] = ()) -> List[str]:
+    """Every column of the training frame, in order; ``extra_columns`` (macro) are passed through"""
+    return (OHLCV_COLUMNS + INDICATOR_COLUMNS + list(extra_columns)
+            + [f'{col}_lag_{lag}' for col in LAG_COLUMNS for lag in LAGS]
+            + rolling_labels(ROLLING_COLUMNS, ROLLING_WINDOWS) + INTERACTION_COLUMNS)
+
+
+def build_features(df: pd.DataFrame, cache: Optional[FeatureCache] = None) -> pd.DataFrame:
+    """The training frame of an OHLCV frame: complete rows of every feature
+
+    Columns of ``df`` other than OHLCV (macro indicators) are passed through.
+    """
+    extra_columns = [col for col in df.columns if col not in OHLCV_COLUMNS]
+    return FEATURES.compute(df, feature_columns(extra_columns), cache=cache).dropna()
+
+
+def add_technical_indicators(df: pd.DataFrame, cache: Optional[FeatureCache] = None) -> pd.DataFrame:
+    """An OHLCV frame with the technical indicators added, without rows still warming up"""
+    indicators = FEATURES.compute(df, INDICATOR_COLUMNS, cache=cache)
+    return pd.concat([df.drop(columns=INDICATOR_COLUMNS, errors='ignore'), indicators], axis=1).dropna()
+
+
+class FeatureEngineer:
+    """Advanced feature engineering for financial data"""
+
+    def __init__(self):
+        self.scalers = {}
+
+    def create_lagged_features(self, df: pd.DataFrame, columns: List[str], lags: List[int]) -> pd.DataFrame:
+        """Create lagged features for time series"""
+        result = df.copy()
+
+        for col in columns:
+            if col in df.columns:
+                for lag in lags:
+                    result[f'{col}_lag_{lag}'] = df[col].shift(lag)
+
+        return result
+
+    def create_rolling_features(self, df: pd.DataFrame, columns: List[str], windows: List[int]) -> pd.DataFrame:
+        """Create rolling statistical features"""
+        # All six statistics for every column and window in one preallocated array
+        values, labels = rolling_moments(df, columns, windows)
+        rolling = pd.DataFrame(values, index=df.index, columns=labels)
+        return pd.concat([df.drop(columns=[label for label in labels if label in df.columns]), rolling], axis=1)
+
+    def create_interaction_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Create interaction features between technical indicators"""
+        result = df.copy()
+
+        # RSI-based interactions
+        if 'RSI' in df.columns and 'Volume_Ratio' in df.columns:
+            result['RSI_Volume_Interaction'] = df['RSI'] * df['Volume_Ratio']
+
+        # MACD-based interactions
+        if 'MACD' in df.columns and 'Price_Change' in df.columns:
+            result['MACD_Price_Interaction'] = df['MACD'] * df['Price_Change']
+
+        # Bollinger Bands interactions
+        if all(col in df.columns for col in ['BB_upper', 'BB_lower', 'Close']):
+            result['BB_Position'] = (df['Close'] - df['BB_lower']) / (df['BB_upper'] - df['BB_lower'])
+            result['BB_Squeeze'] = (df['BB_upper'] - df['BB_lower']) / df['Close']
+
+        return result
+
+    def prepare_features(self, df: pd.DataFrame, target_col: str = 'Close', dtype=np.float64,
+                         store: Optional[FeatureMatrixStore] = None,
+                         name: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Prepare features and target for ML models
+
+        ``dtype=np.float32`` gives the compact matrix the models train on
+        without upcasting; a ``store`` caches it memory-mapped under ``name``
+        (see ``feature_matrix``).
+        """
+        X, y, _ = feature_matrix(df, target_col=target_col, dtype=dtype, store=store, name=name)
+        return X, y
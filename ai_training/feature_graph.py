@@ -0,0 +1,262 @@
+"""
+Declarative Feature Graph
+=====================================
+
+Each feature is declared once as a node: the columns it produces, the
+columns it reads and a function from input arrays to output arrays.
+``FeatureGraph.compute`` resolves the requested columns to the nodes
+that produce them and runs only those, each once, however many features
+share it. Nodes whose inputs are ready run concurrently on a thread pool.
+
+Node outputs are cached by content: source columns are hashed once, a
+node's key combines its own fingerprint (function code and parameters)
+with the keys of its inputs, and its outputs inherit that key. A run on
+unchanged data, or with one changed column, only recomputes the nodes
+downstream of what changed. ``FeatureCache`` keeps outputs in memory and,
+with a directory, on disk for later runs.
+"""
+
+import hashlib
+import os
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'tradepro-ai', 'features'
+)
+
+
+def _fingerprint(func: Callable) -> bytes:
+    # Code and bound parameters, stable across processes, so editing a
+    # feature invalidates its cached outputs
+    if isinstance(func, partial):
+        return _fingerprint(func.func) + repr((func.args, sorted(func.keywords.items()))).encode()
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return repr(func).encode()
+    closure = [cell.cell_contents for cell in func.__closure__ or ()]
+    return b'|'.join([_code_fingerprint(code), repr(func.__defaults__).encode()]
+                     + [_fingerprint(value) if callable(value) else repr(value).encode() for value in closure])
+
+
+def _code_fingerprint(code: types.CodeType) -> bytes:
+    consts = [_code_fingerprint(const) if isinstance(const, types.CodeType) else repr(const).encode()
+              for const in code.co_consts]
+    return b'|'.join([code.co_code, repr(code.co_names).encode()] + consts)
+
+
+class FeatureNode:
+    """One declared feature: ``func(*inputs) -> outputs``, one array per output column"""
+
+    def __init__(self, outputs: Sequence[str], inputs: Sequence[str], func: Callable):
+        self.outputs = list(outputs)
+        self.inputs = list(inputs)
+        self.func = func
+        self.name = self.outputs[0] if len(self.outputs) == 1 else f'{self.outputs[0]}..{self.outputs[-1]}'
+        self.fingerprint = hashlib.blake2b(
+            _fingerprint(func) + repr((self.outputs, self.inputs)).encode(), digest_size=16
+        ).hexdigest()
+
+    def key(self, input_keys: Sequence[str]) -> str:
+        """Cache key of this node's outputs for inputs with ``input_keys``"""
+        return hashlib.blake2b(':'.join([self.fingerprint, *input_keys]).encode(), digest_size=16).hexdigest()
+
+    def run(self, arrays: Sequence[np.ndarray]) -> List[np.ndarray]:
+        result = self.func(*arrays)
+        results = [result] if len(self.outputs) == 1 else list(result)
+        if len(results) != len(self.outputs):
+            raise ValueError(f"Feature {self.name} returned {len(results)} columns, expected {len(self.outputs)}")
+        return [np.asarray(values, dtype=np.float64) for values in results]
+
+
+class FeatureCache:
+    """Node outputs by key: an LRU in memory, optionally backed by ``.npy`` files"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+        if self.directory and os.path.exists(self._path(key)):
+            try:
+                values = np.load(self._path(key))
+            except (OSError, ValueError):
+                values = None
+            if values is not None:
+                self._remember(key, values)
+                with self.lock:
+                    self.hits += 1
+                return values
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, values: np.ndarray):
+        self._remember(key, values)
+        if self.directory:
+            path = self._path(key)
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                np.save(f, values)
+            os.replace(tmp, path)
+
+    def _remember(self, key: str, values: np.ndarray):
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = values
+            self.nbytes += values.nbytes
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def prune(self):
+        """Delete the least recently written files over ``max_disk_bytes``"""
+        if not self.directory:
+            return
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy'):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {'entries': len(self.entries), 'memory_bytes': self.nbytes, 'hits': self.hits, 'misses': self.misses}
+
+
+class FeatureGraph:
+    """Features declared with their dependencies, computed on demand"""
+
+    def __init__(self):
+        self.nodes: List[FeatureNode] = []
+        self.producers: Dict[str, FeatureNode] = {}
+
+    def add(self, outputs: Sequence[str], inputs: Sequence[str], func: Callable) -> FeatureNode:
+        node = FeatureNode(outputs, inputs, func)
+        for column in node.outputs:
+            if column in self.producers:
+                raise ValueError(f"Feature column {column} is declared twice")
+            self.producers[column] = node
+        self.nodes.append(node)
+        return node
+
+    def feature(self, outputs, inputs: Sequence[str]):
+        """Decorator form of ``add``; ``outputs`` is a column name or a list of them"""
+        def register(func):
+            self.add([outputs] if isinstance(outputs, str) else outputs, inputs, func)
+            return func
+        return register
+
+    def plan(self, columns: Sequence[str], sources: Sequence[str]) -> List[FeatureNode]:
+        """The nodes needed for ``columns``, dependencies first
+
+        A column is read from ``sources`` only when no node produces it.
+        """
+        sources = set(sources)
+        order, state = [], {}
+
+        def visit(column, path):
+            node = self.producers.get(column)
+            if node is None:
+                if column not in sources:
+                    raise KeyError(f"No feature or source column named {column}")
+                return
+            if state.get(id(node)) == 'done':
+                return
+            if state.get(id(node)) == 'visiting':
+                raise ValueError(f"Feature cycle: {' -> '.join(path + [column])}")
+            state[id(node)] = 'visiting'
+            for dependency in node.inputs:
+                visit(dependency, path + [column])
+            state[id(node)] = 'done'
+            order.append(node)
+
+        for column in columns:
+            visit(column, [])
+        return order
+
+    def compute(self, df: pd.DataFrame, columns: Sequence[str], cache: Optional[FeatureCache] = None,
+                max_workers: Optional[int] = None) -> pd.DataFrame:
+        """``columns`` of ``df`` and of the features computed from it, in that order"""
+        sources = {column: df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                   for column in self.sources(columns, df.columns)}
+        arrays = self.compute_arrays(sources, columns, cache=cache, max_workers=max_workers)
+        return pd.DataFrame({column: arrays[column] for column in columns}, index=df.index)
+
+    def sources(self, columns: Sequence[str], available: Sequence[str]) -> List[str]:
+        """The source columns ``columns`` are computed from"""
+        nodes = self.plan(columns, available)
+        needed = [column for node in nodes for column in node.inputs] + list(columns)
+        return list(dict.fromkeys(column for column in needed if column not in self.producers))
+
+    def compute_arrays(self, sources: Dict[str, np.ndarray], columns: Sequence[str],
+                       cache: Optional[FeatureCache] = None, max_workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """``columns`` computed from ``sources``, float64 arrays of one shape with time on the first axis"""
+        nodes = self.plan(columns, sources)
+        arrays: Dict[str, np.ndarray] = {}
+        keys: Dict[str, str] = {}
+        shape = None
+        for column in self.sources(columns, sources):
+            arrays[column] = np.ascontiguousarray(sources[column], dtype=np.float64)
+            shape = arrays[column].shape
+            keys[column] = hashlib.blake2b(repr(shape).encode() + arrays[column].tobytes(), digest_size=16).hexdigest()
+
+        def run(node):
+            key = node.key([keys[column] for column in node.inputs])
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None and cached.shape == (len(node.outputs),) + shape:
+                return key, list(cached)
+            outputs = node.run([arrays[column] for column in node.inputs])
+            if cache is not None:
+                cache.put(key, np.stack(outputs))
+            return key, outputs
+
+        pending = list(nodes)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1)) as pool:
+            while pending or running:
+                for node in [n for n in pending if all(column in arrays for column in n.inputs)]:
+                    pending.remove(node)
+                    running[pool.submit(run, node)] = node
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    key, outputs = future.result()
+                    for column, values in zip(node.outputs, outputs):
+                        arrays[column] = values
+                        keys[column] = f'{key}:{column}'
+        return arrays
@@ -0,0 +1,146 @@
+"""
+Compact Feature Matrices
+=====================================
+
+The (rows, features) matrix and target the models train on, built
+without intermediate frames: every numeric column of the training frame
+is written straight into one preallocated C-contiguous array, float32 by
+default, and gaps are filled forward (then backward) in place. Random
+Forest, XGBoost and LightGBM train on C-contiguous float32 without
+converting it, and Keras computes in float32, so no model makes an
+upcast copy.
+
+``FeatureMatrixStore`` keeps the matrix of each symbol as ``.npy`` files
+opened memory-mapped: the matrix lives in the page cache, shared by
+every process reading it, and is rebuilt only when the training frame
+changes.
+"""
+
+import hashlib
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MATRIX_DIR = os.environ.get('FEATURE_MATRIX_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'tradepro-ai', 'matrices'
+)
+
+
+def fill_gaps(values: np.ndarray) -> np.ndarray:
+    """Fill NaNs of each column with the last value before them, leading NaNs with the first after, in place"""
+    rows = np.arange(len(values))
+    for column in values.T:
+        missing = np.isnan(column)
+        if not missing.any() or missing.all():
+            continue
+        # Index of the last valid row at or before each row; leading gaps take the first valid row
+        last = np.maximum.accumulate(np.where(missing, 0, rows))
+        last[:np.argmax(~missing)] = np.argmax(~missing)
+        column[missing] = column[last[missing]]
+    return values
+
+
+def _matrix_columns(df: pd.DataFrame, target_col: str) -> List[str]:
+    # Numeric columns in frame order, the target left out of the features
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)
+            and col != target_col]
+
+
+def frame_fingerprint(df: pd.DataFrame, columns: List[str], target_col: str, dtype: np.dtype) -> str:
+    """Content hash of the parts of ``df`` a feature matrix is built from"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((columns, target_col, np.dtype(dtype).str)).encode())
+    digest.update(np.asarray(df.index.asi8 if hasattr(df.index, 'asi8') else df.index.to_numpy()).tobytes())
+    for col in columns + ([target_col] if target_col in df.columns else []):
+        digest.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64, na_value=np.nan)).tobytes())
+    return digest.hexdigest()
+
+
+class FeatureMatrixStore:
+    """Feature matrices by name as ``{name}.X.npy``/``{name}.y.npy``, opened memory-mapped"""
+
+    def __init__(self, directory: str = DEFAULT_MATRIX_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str, part: str) -> str:
+        return os.path.join(self.directory, f'{name}.{part}')
+
+    def load(self, name: str, fingerprint: str) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        """The stored matrix, target and columns of ``name``, if built from the same frame"""
+        try:
+            with open(self._path(name, 'json')) as f:
+                meta = json.load(f)
+            if meta['fingerprint'] != fingerprint:
+                return None
+            X = np.load(self._path(name, 'X.npy'), mmap_mode='r')
+            y = np.load(self._path(name, 'y.npy'), mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            return None
+        return X, y, meta['columns']
+
+    def create(self, name: str, rows: int, width: int, dtype: np.dtype) -> Tuple[np.ndarray, np.ndarray]:
+        """Writable memory-mapped matrix and target for ``name``, saved by ``commit``"""
+        X = np.lib.format.open_memmap(self._path(name, 'X.npy.tmp'), mode='w+', dtype=dtype, shape=(rows, width))
+        y = np.lib.format.open_memmap(self._path(name, 'y.npy.tmp'), mode='w+', dtype=dtype, shape=(rows,))
+        return X, y
+
+    def commit(self, name: str, fingerprint: str, columns: List[str],
+               X: np.memmap, y: np.memmap) -> Tuple[np.ndarray, np.ndarray]:
+        """Publish the matrix written into ``create``'s arrays; returns it reopened read-only"""
+        X.flush()
+        y.flush()
+        del X, y
+        # The metadata goes last: until it names the new fingerprint, readers see a miss
+        if os.path.exists(self._path(name, 'json')):
+            os.remove(self._path(name, 'json'))
+        for part in ('X.npy', 'y.npy'):
+            os.replace(self._path(name, f'{part}.tmp'), self._path(name, part))
+        tmp = self._path(name, 'json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'columns': columns}, f)
+        os.replace(tmp, self._path(name, 'json'))
+        return (np.load(self._path(name, 'X.npy'), mmap_mode='r'),
+                np.load(self._path(name, 'y.npy'), mmap_mode='r'))
+
+
+def feature_matrix(df: pd.DataFrame, target_col: str = 'Close', dtype=np.float32,
+                   store: Optional[FeatureMatrixStore] = None,
+                   name: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Features ``X`` (rows, features), target ``y`` and the feature columns of ``df``
+
+    ``X`` holds every numeric column except ``target_col`` in one
+    C-contiguous ``dtype`` array; ``y`` is ``target_col`` (all NaN when
+    absent). Gaps are filled forward, then backward. With a ``store``, the
+    result is cached under ``name`` and returned memory-mapped read-only.
+    """
+    columns = _matrix_columns(df, target_col)
+    rows = len(df)
+    fingerprint = None
+    if store is not None:
+        if name is None:
+            raise ValueError("A stored feature matrix needs a name")
+        fingerprint = frame_fingerprint(df, columns, target_col, dtype)
+        stored = store.load(name, fingerprint)
+        if stored is not None:
+            return stored
+        X, y = store.create(name, rows, len(columns), dtype)
+    else:
+        X, y = np.empty((rows, len(columns)), dtype=dtype), np.empty(rows, dtype=dtype)
+
+    for i, col in enumerate(columns):
+        X[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    if target_col in df.columns:
+        y[:] = df[target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        y[:] = np.nan
+    fill_gaps(X)
+    fill_gaps(y[:, np.newaxis])
+
+    if store is not None:
+        X, y = store.commit(name, fingerprint, columns, X, y)
+    return X, y, columns
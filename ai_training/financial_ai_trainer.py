@@ -21,8 +21,8 @@ Features:
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import yfinance as yf
-import talib
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -60,11 +60,37 @@ from plotly.subplots import make_subplots
 import joblib
 import json
 import os
+import shutil
+import sys
+import threading
 from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Tuple, Optional
 import warnings
 
+# Market-data helpers shared with the API scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+from ohlc_cache import ohlc_cache
+from bar_store import BarStore, BAR_COLUMNS, DEFAULT_STORE_DIR
+from batch_fetcher import BatchFetcher, pooled_session
+from macro_data import MacroDataStore
+from feature_engineering import FeatureEngineer, add_technical_indicators, OHLCV_COLUMNS
+from feature_graph import FeatureCache, DEFAULT_CACHE_DIR as FEATURE_CACHE_DIR
+from panel_features import build_panel_features
+from feature_matrix import FeatureMatrixStore, DEFAULT_MATRIX_DIR
+
+# Serving helpers shared with the backend model server
+from model_serving import autoregressive_forecast, compile_forward, lstm_artifact_paths, save_lstm
+from micro_batching import MicroBatcher
+from online_features import OnlineFeatures
+from training_orchestrator import TrainingOrchestrator
+
+# Bars an online feature state is warmed up on: SMA_200 plus the longest lag/window
+LIVE_WARMUP_PERIOD = "2y"
+
+# Above this many bytes of float32 windows, training streams them through tf.data
+EAGER_WINDOW_LIMIT = 512 * 1024 * 1024
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -72,72 +98,61 @@ logger = logging.getLogger(__name__)
 class FinancialDataCollector:
     """Advanced data collection from multiple financial sources"""
     
-    def __init__(self, api_keys: Dict[str, str] = None):
+    def __init__(self, api_keys: Dict[str, str] = None, max_workers: int = 16, requests_per_second: float = 20.0):
         self.api_keys = api_keys or {}
         self.scaler = StandardScaler()
+        # One pooled keep-alive session shared by all concurrent downloads
+        self.session = pooled_session(pool_size=max_workers)
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.bar_store = BarStore(self.yfinance_bars_since, root=os.path.join(DEFAULT_STORE_DIR, 'yfinance'))
+        self.macro_data = MacroDataStore(self.fred_series)
+    
+    def batch_fetcher(self, fetch) -> BatchFetcher:
+        """Concurrent, rate-limited fetcher over this collector's connection pool"""
+        return BatchFetcher(fetch, max_workers=self.max_workers, rate=self.requests_per_second,
+                            burst=self.max_workers * 2)
+    
+    def yfinance_bars_since(self, symbol: str, interval: str, start: int) -> pd.DataFrame:
+        """Download bars from the epoch second ``start`` in bar store layout"""
+        hist = yf.Ticker(symbol, session=self.session).history(start=pd.Timestamp(start, unit='s'), interval=interval)
+        if hist.empty:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        
+        bars = hist[['Open', 'High', 'Low', 'Close', 'Volume']].rename(columns=str.lower).reset_index(drop=True)
+        bars.insert(0, 'timestamp', hist.index.tz_convert('UTC').as_unit('s').asi8)
+        return bars
+    
+    def load_daily_bars(self, symbol: str, period: str) -> pd.DataFrame:
+        """Daily OHLCV bars from the local bar store, refreshed incrementally"""
+        bars = self.bar_store.load(symbol, '1d', period)
+        df = bars.drop(columns='timestamp').rename(columns=str.capitalize)
+        df.index = pd.to_datetime(bars['timestamp'], unit='s', utc=True).tz_convert('America/New_York').rename('Date')
+        return df
         
     def get_stock_data(self, symbol: str, period: str = "5y") -> pd.DataFrame:
         """Fetch comprehensive stock data with technical indicators"""
         try:
-            # Get basic OHLCV data
-            stock = yf.Ticker(symbol)
-            df = stock.history(period=period)
-            
-            # Add technical indicators using TA-Lib
-            df['RSI'] = talib.RSI(df['Close'].values, timeperiod=14)
-            df['MACD'], df['MACD_signal'], df['MACD_hist'] = talib.MACD(df['Close'].values)
-            df['BB_upper'], df['BB_middle'], df['BB_lower'] = talib.BBANDS(df['Close'].values)
-            df['SMA_20'] = talib.SMA(df['Close'].values, timeperiod=20)
-            df['SMA_50'] = talib.SMA(df['Close'].values, timeperiod=50)
-            df['SMA_200'] = talib.SMA(df['Close'].values, timeperiod=200)
-            df['EMA_12'] = talib.EMA(df['Close'].values, timeperiod=12)
-            df['EMA_26'] = talib.EMA(df['Close'].values, timeperiod=26)
-            df['ATR'] = talib.ATR(df['High'].values, df['Low'].values, df['Close'].values)
-            df['ADX'] = talib.ADX(df['High'].values, df['Low'].values, df['Close'].values)
-            df['CCI'] = talib.CCI(df['High'].values, df['Low'].values, df['Close'].values)
-            df['ROC'] = talib.ROC(df['Close'].values, timeperiod=10)
-            df['Williams_R'] = talib.WILLR(df['High'].values, df['Low'].values, df['Close'].values)
-            
-            # Price-based features
-            df['Price_Change'] = df['Close'].pct_change()
-            df['High_Low_Ratio'] = df['High'] / df['Low']
-            df['Volume_SMA'] = df['Volume'].rolling(window=20).mean()
-            df['Volume_Ratio'] = df['Volume'] / df['Volume_SMA']
-            
-            # Volatility features
-            df['Volatility'] = df['Price_Change'].rolling(window=20).std()
-            df['Log_Return'] = np.log(df['Close'] / df['Close'].shift(1))
-            
-            # Market structure features
-            df['Support'] = df['Low'].rolling(window=20).min()
-            df['Resistance'] = df['High'].rolling(window=20).max()
-            df['Price_Position'] = (df['Close'] - df['Support']) / (df['Resistance'] - df['Support'])
-            
-            return df.dropna()
-            
+            return self.fetch_stock_data(symbol, period)
         except Exception as e:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return pd.DataFrame()
     
+    def fetch_stock_data(self, symbol: str, period: str = "5y") -> pd.DataFrame:
+        """Like get_stock_data, but raises on failure so batch fetches can retry"""
+        return add_technical_indicators(self.fetch_daily_bars(symbol, period))
+    
+    def fetch_daily_bars(self, symbol: str, period: str = "5y") -> pd.DataFrame:
+        """Basic OHLCV data, from the shared OHLC cache when fresh"""
+        return ohlc_cache.get_or_fetch(symbol, '1d', period, lambda: self.load_daily_bars(symbol, period))
+    
+    def fred_series(self, series_id: str, start: str) -> pd.Series:
+        """Download one FRED series from ``start`` on"""
+        return pdr.get_data_fred(series_id, start=start, session=self.session)[series_id]
+    
     def get_economic_indicators(self) -> pd.DataFrame:
-        """Fetch macroeconomic indicators that affect markets"""
-        indicators = {
-            'GDP': 'GDP',
-            'INFLATION': 'CPIAUCSL',
-            'UNEMPLOYMENT': 'UNRATE',
-            'INTEREST_RATE': 'FEDFUNDS',
-            'VIX': 'VIXCLS'
-        }
-        
-        data = {}
-        for name, series_id in indicators.items():
-            try:
-                series = pdr.get_data_fred(series_id, start='2015-01-01')
-                data[name] = series
-            except:
-                logger.warning(f"Could not fetch {name}")
-        
-        return pd.concat(data.values(), axis=1, keys=data.keys()) if data else pd.DataFrame()
+        """Macroeconomic indicators that affect markets, aligned to trading days"""
+        return self.macro_data.aligned()
     
     def get_sector_data(self, sectors: List[str]) -> pd.DataFrame:
         """Get sector ETF data for market regime analysis"""
@@ -155,84 +170,103 @@ class FinancialDataCollector:
             'Communication': 'XLC'
         }
         
-        sector_data = {}
-        for sector, etf in sector_etfs.items():
-            if sector in sectors:
-                try:
-                    data = yf.Ticker(etf).history(period="2y")['Close']
-                    sector_data[f'{sector}_Return'] = data.pct_change()
-                except:
-                    logger.warning(f"Could not fetch data for {sector}")
+        wanted = {etf: sector for sector, etf in sector_etfs.items() if sector in sectors}
+        fetcher = self.batch_fetcher(lambda etf: yf.Ticker(etf, session=self.session).history(period="2y")['Close'])
+        
+        fetched = {}
+        for etf, data, error in fetcher.fetch_iter(wanted):
+            if error is not None:
+                logger.warning(f"Could not fetch data for {wanted[etf]}")
+                continue
+            fetched[etf] = data
+        
+        # Keep the sector order stable regardless of completion order
+        sector_data = {f'{wanted[etf]}_Return': fetched[etf].pct_change() for etf in wanted if etf in fetched}
         
         return pd.concat(sector_data.values(), axis=1, keys=sector_data.keys()) if sector_data else pd.DataFrame()
 
-class FeatureEngineer:
-    """Advanced feature engineering for financial data"""
-    
-    def __init__(self):
-        self.scalers = {}
-        
-    def create_lagged_features(self, df: pd.DataFrame, columns: List[str], lags: List[int]) -> pd.DataFrame:
-        """Create lagged features for time series"""
-        result = df.copy()
-        
-        for col in columns:
-            if col in df.columns:
-                for lag in lags:
-                    result[f'{col}_lag_{lag}'] = df[col].shift(lag)
-        
-        return result
-    
-    def create_rolling_features(self, df: pd.DataFrame, columns: List[str], windows: List[int]) -> pd.DataFrame:
-        """Create rolling statistical features"""
-        result = df.copy()
-        
-        for col in columns:
-            if col in df.columns:
-                for window in windows:
-                    result[f'{col}_sma_{window}'] = df[col].rolling(window).mean()
-                    result[f'{col}_std_{window}'] = df[col].rolling(window).std()
-                    result[f'{col}_min_{window}'] = df[col].rolling(window).min()
-                    result[f'{col}_max_{window}'] = df[col].rolling(window).max()
-                    result[f'{col}_skew_{window}'] = df[col].rolling(window).skew()
-                    result[f'{col}_kurt_{window}'] = df[col].rolling(window).kurt()
-        
-        return result
-    
-    def create_interaction_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Create interaction features between technical indicators"""
-        result = df.copy()
-        
-        # RSI-based interactions
-        if 'RSI' in df.columns and 'Volume_Ratio' in df.columns:
-            result['RSI_Volume_Interaction'] = df['RSI'] * df['Volume_Ratio']
-        
-        # MACD-based interactions
-        if 'MACD' in df.columns and 'Price_Change' in df.columns:
-            result['MACD_Price_Interaction'] = df['MACD'] * df['Price_Change']
-        
-        # Bollinger Bands interactions
-        if all(col in df.columns for col in ['BB_upper', 'BB_lower', 'Close']):
-            result['BB_Position'] = (df['Close'] - df['BB_lower']) / (df['BB_upper'] - df['BB_lower'])
-            result['BB_Squeeze'] = (df['BB_upper'] - df['BB_lower']) / df['Close']
-        
-        return result
-    
-    def prepare_features(self, df: pd.DataFrame, target_col: str = 'Close') -> Tuple[np.ndarray, np.ndarray]:
-        """Prepare features and target for ML models"""
-        # Remove non-numeric columns and handle missing values
-        numeric_df = df.select_dtypes(include=[np.number])
-        numeric_df = numeric_df.fillna(method='ffill').fillna(method='bfill')
-        
-        # Separate features and target
-        if target_col in numeric_df.columns:
-            X = numeric_df.drop(columns=[target_col])
-            y = numeric_df[target_col]
-        else:
-            X = numeric_df
-            y = pd.Series(index=X.index, dtype=float)
-        
-        return X.values, y.values
+def sequence_windows(data: np.ndarray, sequence_length: int, target_column: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Every ``sequence_length`` window of ``data`` and the value after it, as views
+    
+    1-D data gives (samples, sequence_length) windows and (time, features)
+    data gives (samples, sequence_length, features) windows, with the next
+    value of ``target_column`` as the target. The windows share memory with
+    ``data`` (and are read-only), so nothing is materialised.
+    """
+    values = np.asarray(data)
+    if len(values) <= sequence_length:
+        return np.empty((0, sequence_length) + values.shape[1:]), np.empty(0)
+    windows = sliding_window_view(values[:-1], sequence_length, axis=0)
+    if values.ndim == 1:
+        return windows, values[sequence_length:]
+    # sliding_window_view puts the window axis last; move it before the features
+    return windows.transpose(0, 2, 1), values[sequence_length:, target_column]
+
+def window_dataset(data: np.ndarray, sequence_length: int, batch_size: int = 32, shuffle: bool = False,
+                   target_column: int = 0, start: int = 0, stop: Optional[int] = None,
+                   seed: Optional[int] = None) -> tf.data.Dataset:
+    """A ``tf.data`` pipeline that builds windows one batch at a time
+    
+    Only the current batch is ever copied out of ``data``, so multi-year
+    minute histories train without holding every window in memory.
+    ``start``/``stop`` select a range of samples, e.g. a time-ordered split;
+    ``shuffle`` reorders the samples every epoch.
+    """
+    windows, targets = sequence_windows(data, sequence_length, target_column)
+    stop = len(windows) if stop is None else stop
+    window_shape = (sequence_length, windows.shape[2] if windows.ndim == 3 else 1)
+    rng = np.random.default_rng(seed)
+    
+    def batches():
+        order = np.arange(start, stop)
+        if shuffle:
+            rng.shuffle(order)
+        for first in range(0, len(order), batch_size):
+            index = order[first:first + batch_size]
+            X = windows[index].astype(np.float32, copy=False).reshape((len(index),) + window_shape)
+            yield X, targets[index].astype(np.float32, copy=False)
+    
+    return tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(
+            tf.TensorSpec((None,) + window_shape, tf.float32),
+            tf.TensorSpec((None,), tf.float32)
+        )
+    ).prefetch(tf.data.AUTOTUNE)
+
+def fit_on_windows(model: Model, data: np.ndarray, sequence_length: int, epochs: int, validation_split: float,
+                   callbacks: List, batch_size: int = 32, lazy: Optional[bool] = None, target_column: int = 0):
+    """Fit a sequence model on the windows of scaled ``data``
+    
+    With ``lazy`` the windows stream from ``window_dataset`` and the last
+    ``validation_split`` of the samples validates, as Keras' own split does.
+    Only that path is memory-bounded: the eager path hands the window views
+    to ``model.fit``, which copies every window into one array. ``lazy=None``
+    picks the lazy path once those copies would exceed ``EAGER_WINDOW_LIMIT``.
+    """
+    if lazy is None:
+        samples = max(len(data) - sequence_length, 0)
+        features = data.shape[1] if np.ndim(data) == 2 else 1
+        lazy = samples * sequence_length * features * 4 > EAGER_WINDOW_LIMIT
+    if lazy:
+        samples = max(len(data) - sequence_length, 0)
+        split = int(samples * (1 - validation_split))
+        train = window_dataset(data, sequence_length, batch_size, shuffle=True, target_column=target_column, stop=split)
+        validation = (window_dataset(data, sequence_length, batch_size, target_column=target_column, start=split)
+                      if split < samples else None)
+        return model.fit(train, validation_data=validation, epochs=epochs, callbacks=callbacks, verbose=1)
+    
+    X, y = sequence_windows(data, sequence_length, target_column)
+    if X.ndim == 2:
+        X = X[..., np.newaxis]
+    return model.fit(
+        X, y,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_split=validation_split,
+        callbacks=callbacks,
+        verbose=1
+    )
 
 class LSTMModel:
     """Advanced LSTM model for time series prediction"""
@@ -242,6 +276,7 @@ class LSTMModel:
         self.features = features
         self.model = None
         self.scaler = MinMaxScaler()
+        self._inference = None  # (model, compiled forward pass)
         
     def build_model(self) -> Sequential:
         """Build advanced LSTM architecture"""
@@ -261,25 +296,14 @@ class LSTMModel:
     
     def prepare_sequences(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """Prepare sequences for LSTM training"""
-        X, y = [], []
-        
-        for i in range(self.sequence_length, len(data)):
-            X.append(data[i-self.sequence_length:i])
-            y.append(data[i])
-        
-        return np.array(X), np.array(y)
+        return sequence_windows(data, self.sequence_length)
     
-    def train(self, data: np.ndarray, epochs: int = 100, validation_split: float = 0.2):
-        """Train the LSTM model"""
+    def train(self, data: np.ndarray, epochs: int = 100, validation_split: float = 0.2,
+              batch_size: int = 32, lazy: Optional[bool] = None):
+        """Train the LSTM model; ``lazy`` streams the windows through ``tf.data``"""
         # Scale data
         scaled_data = self.scaler.fit_transform(data.reshape(-1, 1))
         
-        # Prepare sequences
-        X, y = self.prepare_sequences(scaled_data.flatten())
-        
-        # Reshape for LSTM
-        X = X.reshape((X.shape[0], X.shape[1], 1))
-        
         # Build model
         self.model = self.build_model()
         
@@ -289,43 +313,43 @@ class LSTMModel:
             ReduceLROnPlateau(factor=0.5, patience=5)
         ]
         
-        # Train
-        history = self.model.fit(
-            X, y,
-            epochs=epochs,
-            batch_size=32,
-            validation_split=validation_split,
-            callbacks=callbacks,
-            verbose=1
-        )
-        
-        return history
+        # Train on windows of the scaled series
+        return fit_on_windows(self.model, scaled_data.flatten(), self.sequence_length, epochs,
+                              validation_split, callbacks, batch_size=batch_size, lazy=lazy)
+    
+    def inference_fn(self):
+        """Compiled ``model(x, training=False)``, traced once for any batch size"""
+        if self._inference is None or self._inference[0] is not self.model:
+            model = self.model
+            forward = compile_forward(model, self.sequence_length, self.features)
+            self._inference = (model, forward)
+        return self._inference[1]
     
     def predict(self, data: np.ndarray, steps: int = 1) -> np.ndarray:
         """Make predictions"""
+        return self.predict_batch([data], steps)[0]
+    
+    def predict_batch(self, series: List[np.ndarray], steps: int = 1) -> np.ndarray:
+        """Forecast ``steps`` values for many series at once, returned as (len(series), steps)
+        
+        Every autoregressive step is one batched forward pass over all series
+        (see ``model_serving.autoregressive_forecast``).
+        """
         if self.model is None:
             raise ValueError("Model not trained yet")
+        if self.features != 1:
+            raise ValueError("Autoregressive forecasts need a single-feature model")
         
-        scaled_data = self.scaler.transform(data.reshape(-1, 1))
+        length = self.sequence_length
+        if any(len(values) < length for values in series):
+            raise ValueError(f"Every series needs at least {length} values")
+        windows = np.stack([np.asarray(values, dtype=np.float64)[-length:] for values in series])
+        scaled = self.scaler.transform(windows.reshape(-1, 1)).reshape(windows.shape)
         
-        predictions = []
-        current_sequence = scaled_data[-self.sequence_length:].flatten()
-        
-        for _ in range(steps):
-            # Reshape for prediction
-            X_pred = current_sequence.reshape((1, self.sequence_length, 1))
-            
-            # Predict next value
-            pred = self.model.predict(X_pred, verbose=0)
-            predictions.append(pred[0, 0])
-            
-            # Update sequence
-            current_sequence = np.roll(current_sequence, -1)
-            current_sequence[-1] = pred[0, 0]
+        predictions = autoregressive_forecast(self.inference_fn(), scaled, steps)
         
         # Inverse transform predictions
-        predictions = np.array(predictions).reshape(-1, 1)
-        return self.scaler.inverse_transform(predictions).flatten()
+        return self.scaler.inverse_transform(predictions.reshape(-1, 1)).reshape(predictions.shape)
 
 class TransformerModel:
     """Transformer model for financial time series"""
@@ -341,9 +365,12 @@ class TransformerModel:
         """Build Transformer architecture"""
         inputs = Input(shape=input_shape)
         
+        # Project the features to d_model so any number of them fits the residual connections
+        embedded = Dense(self.d_model)(inputs)
+        
         # Multi-head attention
-        attention = MultiHeadAttention(num_heads=self.num_heads, key_dim=self.d_model)(inputs, inputs)
-        attention = LayerNormalization()(attention + inputs)
+        attention = MultiHeadAttention(num_heads=self.num_heads, key_dim=self.d_model)(embedded, embedded)
+        attention = LayerNormalization()(attention + embedded)
         
         # Feed forward
         ff = Dense(self.d_model * 4, activation='relu')(attention)
@@ -358,28 +385,67 @@ class TransformerModel:
         model.compile(optimizer=Adam(learning_rate=0.001), loss='mse', metrics=['mae'])
         
         return model
+    
+    def prepare_sequences(self, data: np.ndarray, target_column: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """Multi-feature windows and the next value of the target column"""
+        return sequence_windows(data, self.sequence_length, target_column)
+    
+    def train(self, data: np.ndarray, target_column: int = 0, epochs: int = 50, validation_split: float = 0.2,
+              batch_size: int = 32, lazy: Optional[bool] = None):
+        """Train on (time, features) data to predict the next value of ``target_column``"""
+        values = np.asarray(data, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        scaled_data = self.scaler.fit_transform(values)
+        
+        self.model = self.build_model((self.sequence_length, values.shape[1]))
+        callbacks = [
+            EarlyStopping(patience=10, restore_best_weights=True),
+            ReduceLROnPlateau(factor=0.5, patience=5)
+        ]
+        return fit_on_windows(self.model, scaled_data, self.sequence_length, epochs, validation_split,
+                              callbacks, batch_size=batch_size, lazy=lazy, target_column=target_column)
 
 class EnsembleTrader:
     """Ensemble model combining multiple algorithms"""
     
-    def __init__(self):
+    def __init__(self, max_batch_size: int = 64, max_wait: float = 0.003):
         self.models = {}
         self.weights = {}
         self.feature_engineer = FeatureEngineer()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+    
+    def __getstate__(self):
+        # The batcher's thread and queue are rebuilt on first use after loading
+        state = self.__dict__.copy()
+        state['_batcher'] = None
+        del state['_batcher_lock']
+        return state
+    
+    def __setstate__(self, state):
+        # Ensembles pickled before micro-batching have none of its attributes
+        state.setdefault('max_batch_size', 64)
+        state.setdefault('max_wait', 0.003)
+        state['_batcher'] = None
+        self.__dict__.update(state)
+        self._batcher_lock = threading.Lock()
         
     def add_model(self, name: str, model, weight: float = 1.0):
         """Add a model to the ensemble"""
         self.models[name] = model
         self.weights[name] = weight
     
-    def train_ensemble(self, X: np.ndarray, y: np.ndarray):
-        """Train all models in the ensemble"""
+    def train_ensemble(self, X: np.ndarray, y: np.ndarray, n_jobs: int = -1):
+        """Train all models in the ensemble, each on ``n_jobs`` threads"""
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
         results = {}
         
         # Train Random Forest
-        rf_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+        rf_model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
         rf_model.fit(X_train, y_train)
         rf_pred = rf_model.predict(X_test)
         rf_score = r2_score(y_test, rf_pred)
@@ -387,7 +453,7 @@ class EnsembleTrader:
         results['random_forest'] = rf_score
         
         # Train XGBoost
-        xgb_model = xgb.XGBRegressor(random_state=42, n_jobs=-1)
+        xgb_model = xgb.XGBRegressor(random_state=42, n_jobs=n_jobs)
         xgb_model.fit(X_train, y_train)
         xgb_pred = xgb_model.predict(X_test)
         xgb_score = r2_score(y_test, xgb_pred)
@@ -395,7 +461,7 @@ class EnsembleTrader:
         results['xgboost'] = xgb_score
         
         # Train LightGBM
-        lgb_model = lgb.LGBMRegressor(random_state=42, n_jobs=-1, verbose=-1)
+        lgb_model = lgb.LGBMRegressor(random_state=42, n_jobs=n_jobs, verbose=-1)
         lgb_model.fit(X_train, y_train)
         lgb_pred = lgb_model.predict(X_test)
         lgb_score = r2_score(y_test, lgb_pred)
@@ -416,6 +482,31 @@ class EnsembleTrader:
                 predictions.append(pred * weight)
         
         return np.sum(predictions, axis=0)
+    
+    def predict_batched(self, X: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """``predict`` for concurrent callers, sharing each model call between them
+        
+        Rows submitted from different threads within ``max_wait`` seconds are
+        stacked, predicted with one call per model and split back per caller,
+        so each tree ensemble pays its per-call overhead once per batch.
+        """
+        return self.batcher().submit(np.atleast_2d(X)).result(timeout)
+    
+    def batcher(self) -> MicroBatcher:
+        """The micro-batcher behind ``predict_batched``, started on first use"""
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = MicroBatcher(self._predict_stacked, self.max_batch_size,
+                                             self.max_wait, name='ensemble-batcher')
+            return self._batcher
+    
+    def batch_stats(self) -> Dict:
+        """Batch count and batch-size distribution of ``predict_batched``"""
+        return self.batcher().stats()
+    
+    def _predict_stacked(self, blocks: List[np.ndarray]) -> List[np.ndarray]:
+        predictions = self.predict(np.vstack(blocks))
+        return np.split(predictions, np.cumsum([len(block) for block in blocks])[:-1])
 
 class BacktestEngine:
     """Comprehensive backtesting framework"""
@@ -512,6 +603,50 @@ class BacktestEngine:
             'final_value': equity_df['portfolio_value'].iloc[-1]
         }
 
+def train_symbol(symbol: str, df: pd.DataFrame, checkpoint_dir: str, threads: int) -> Optional[Dict]:
+    """Train the ensemble, LSTM and backtest for one symbol into ``checkpoint_dir``
+    
+    The orchestrator's job function: runs in a worker process with
+    ``threads`` cores and returns the symbol's results.
+    """
+    logger.info(f"Training models for {symbol}")
+    
+    # Prepare data: compact float32 matrices, memory-mapped and reused while the frame is unchanged
+    X, y = FeatureEngineer().prepare_features(df, target_col='Close', dtype=np.float32,
+                                              store=FeatureMatrixStore(DEFAULT_MATRIX_DIR), name=symbol)
+    
+    if len(X) == 0 or len(y) == 0:
+        logger.warning(f"No data available for {symbol}")
+        return None
+    
+    # Create future target (next day's closing price)
+    y_future = y[1:]  # Shift target by 1 day
+    X_current = X[:-1]  # Remove last row to match
+    
+    # Train ensemble models
+    ensemble = EnsembleTrader()
+    model_results = ensemble.train_ensemble(X_current, y_future, n_jobs=threads)
+    joblib.dump(ensemble, os.path.join(checkpoint_dir, f"{symbol}_ensemble_model.pkl"))
+    
+    # Train LSTM
+    lstm_model = LSTMModel(sequence_length=60)
+    if len(y) > 100:  # Ensure enough data for LSTM
+        lstm_history = lstm_model.train(y)
+        
+        # Make LSTM predictions
+        lstm_predictions = lstm_model.predict(y, steps=30)
+        model_results['lstm'] = lstm_predictions.tolist()
+        save_lstm(checkpoint_dir, symbol, lstm_model.model, lstm_model.scaler, lstm_model.sequence_length)
+    
+    # Backtest the ensemble
+    if len(df) > 100:
+        signals = pd.Series(index=df.index[60:], data=np.random.choice([0, 1], size=len(df)-60))  # Placeholder signals
+        backtest = BacktestEngine()
+        backtest_results = backtest.simulate_trading(signals, df['Close'])
+        model_results['backtest'] = backtest_results
+    
+    return model_results
+
 class FinancialAITrainer:
     """Main training pipeline coordinator"""
     
@@ -520,107 +655,120 @@ class FinancialAITrainer:
         self.data_collector = FinancialDataCollector(api_keys)
         self.feature_engineer = FeatureEngineer()
         self.models = {}
+        self.checkpoint_dir = None
         self.results = {}
-        
-    def collect_all_data(self) -> Dict[str, pd.DataFrame]:
-        """Collect data for all symbols"""
+        # Feature graph outputs, reused across runs while their input data is unchanged
+        self.feature_cache = FeatureCache(directory=FEATURE_CACHE_DIR)
+        # Online feature state per symbol for live signals
+        self.live_state: Dict[str, OnlineFeatures] = {}
+        self.live_locks: Dict[str, threading.Lock] = {}
+        
+    def collect_all_data(self, cross_sectional: Tuple[str, ...] = ()) -> Dict[str, pd.DataFrame]:
+        """Collect data for all symbols
+        
+        Features of the whole universe are computed together, as one panel.
+        ``cross_sectional`` features add each symbol's rank and z-score among
+        all symbols on the same date; live signals do not compute them, so
+        models trained on them can only be backtested.
+        """
         logger.info("Collecting financial data...")
-        data = {}
+        frames = {}
+        
+        # Macro indicators are shared by every symbol: load and align them once
+        self.data_collector.get_economic_indicators()
         
-        for symbol in self.symbols:
-            logger.info(f"Fetching data for {symbol}")
-            df = self.data_collector.get_stock_data(symbol)
+        fetcher = self.data_collector.batch_fetcher(self.data_collector.fetch_daily_bars)
+        for symbol, df, error in fetcher.fetch_iter(self.symbols):
+            if error is not None:
+                logger.error(f"Error fetching data for {symbol}: {error}")
+                continue
+            logger.info(f"Fetched data for {symbol}")
             
             if not df.empty:
                 # Add economic indicators
-                econ_data = self.data_collector.get_economic_indicators()
-                if not econ_data.empty:
-                    df = df.join(econ_data, how='left').fillna(method='ffill')
-                
-                # Feature engineering
-                df = self.feature_engineer.create_lagged_features(
-                    df, ['Close', 'Volume', 'RSI'], [1, 2, 3, 5, 10]
-                )
-                df = self.feature_engineer.create_rolling_features(
-                    df, ['Close', 'Volume'], [5, 10, 20]
-                )
-                df = self.feature_engineer.create_interaction_features(df)
-                
-                data[symbol] = df.dropna()
+                frames[symbol] = self.data_collector.macro_data.join(df)
+        
+        # Downloads finish in any order; keep the configured symbol order
+        frames = {symbol: frames[symbol] for symbol in self.symbols if symbol in frames}
+        if not frames:
+            return {}
+        
+        # Feature engineering: every feature of the graph for all symbols at once,
+        # from the cache when unchanged
+        data = build_panel_features(frames, cross_sectional=cross_sectional, cache=self.feature_cache)
+        
+        logger.info(f"Feature cache: {self.feature_cache.stats()}")
+        self.feature_cache.prune()
         
         return data
     
-    def train_all_models(self, data: Dict[str, pd.DataFrame]):
-        """Train multiple models for each symbol"""
+    def train_all_models(self, data: Dict[str, pd.DataFrame], checkpoint_dir: Optional[str] = None,
+                         cpu_budget: Optional[int] = None, memory_budget_mb: Optional[int] = None):
+        """Train multiple models for each symbol, symbols in parallel
+        
+        Symbols run as separate processes sharing ``cpu_budget`` cores (default:
+        all) and ``memory_budget_mb`` (default: 80% of available memory). Each
+        finished symbol is checkpointed in ``checkpoint_dir``, by default one
+        directory per day, so rerunning an interrupted run resumes it.
+        """
         logger.info("Training AI models...")
         
-        for symbol, df in data.items():
-            logger.info(f"Training models for {symbol}")
-            
-            # Prepare data
-            X, y = self.feature_engineer.prepare_features(df, target_col='Close')
-            
-            if len(X) == 0 or len(y) == 0:
-                logger.warning(f"No data available for {symbol}")
-                continue
-            
-            # Create future target (next day's closing price)
-            y_future = np.roll(y, -1)[:-1]  # Shift target by 1 day
-            X_current = X[:-1]  # Remove last row to match
-            
-            # Train ensemble models
-            ensemble = EnsembleTrader()
-            model_results = ensemble.train_ensemble(X_current, y_future)
-            
-            # Train LSTM
-            lstm_model = LSTMModel(sequence_length=60)
-            if len(y) > 100:  # Ensure enough data for LSTM
-                lstm_history = lstm_model.train(y)
-                
-                # Make LSTM predictions
-                lstm_predictions = lstm_model.predict(y, steps=30)
-                model_results['lstm'] = lstm_predictions
-            
-            # Backtest the ensemble
-            if len(df) > 100:
-                signals = pd.Series(index=df.index[60:], data=np.random.choice([0, 1], size=len(df)-60))  # Placeholder signals
-                backtest = BacktestEngine()
-                backtest_results = backtest.simulate_trading(signals, df['Close'])
-                model_results['backtest'] = backtest_results
+        self.checkpoint_dir = checkpoint_dir or os.path.join(
+            'trained_models', 'checkpoints', datetime.now().strftime('%Y-%m-%d')
+        )
+        orchestrator = TrainingOrchestrator(
+            train_symbol, self.checkpoint_dir, cpu_budget=cpu_budget,
+            memory_budget=memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        )
+        self.results = orchestrator.run(data)
+        
+        for symbol in self.results:
+            self.models[symbol] = joblib.load(os.path.join(self.checkpoint_dir, f"{symbol}_ensemble_model.pkl"))
+    
+    def live_features(self, symbol: str) -> Tuple[Optional[np.ndarray], float]:
+        """Feature vector and close of the latest bar, adding only the bars since the last call
+        
+        Each symbol keeps an ``OnlineFeatures`` state, warmed up once on
+        ``LIVE_WARMUP_PERIOD`` of bars. Later calls read the last month from
+        the bar store and feed only the completed bars not yet seen; the
+        newest bar may still be forming, so it is scored without being added.
+        """
+        with self.live_locks.setdefault(symbol, threading.Lock()):
+            state = self.live_state.get(symbol)
+            bars = self.data_collector.load_daily_bars(symbol, '1mo')
+            if state is None or bars.empty or state.last_index is None or bars.index[0] > state.last_index:
+                # First call, or a gap longer than the recent window: warm up again
+                state = None
+                bars = self.data_collector.load_daily_bars(symbol, LIVE_WARMUP_PERIOD)
+            if bars.empty:
+                return None, float('nan')
+            bars = self.data_collector.macro_data.join(bars)
+            if state is None:
+                state = OnlineFeatures([col for col in bars.columns if col not in OHLCV_COLUMNS])
+                self.live_state[symbol] = state
             
-            self.models[symbol] = ensemble
-            self.results[symbol] = model_results
+            new_bars = bars if state.last_index is None else bars[bars.index > state.last_index]
+            state.update_frame(new_bars.iloc[:-1])
+            latest = bars.iloc[-1]
+            vector = state.preview(*latest[OHLCV_COLUMNS].to_numpy(dtype=np.float64),
+                                   extras={col: latest[col] for col in state.extra_columns})
+            return vector, float(latest['Close'])
     
     def generate_trading_signals(self, symbol: str, lookback_days: int = 30) -> Dict:
         """Generate trading signals for a symbol"""
         if symbol not in self.models:
             return {'error': 'Model not trained for this symbol'}
         
-        # Get recent data
-        recent_data = self.data_collector.get_stock_data(symbol, period="1mo")
-        if recent_data.empty:
-            return {'error': 'No recent data available'}
-        
-        # Prepare features
-        recent_data = self.feature_engineer.create_lagged_features(
-            recent_data, ['Close', 'Volume', 'RSI'], [1, 2, 3, 5, 10]
-        )
-        recent_data = self.feature_engineer.create_rolling_features(
-            recent_data, ['Close', 'Volume'], [5, 10, 20]
-        )
-        recent_data = self.feature_engineer.create_interaction_features(recent_data)
-        
-        X_recent, _ = self.feature_engineer.prepare_features(recent_data.dropna(), target_col='Close')
-        
-        if len(X_recent) == 0:
+        # Features of the latest bar, updated incrementally
+        features, current_price = self.live_features(symbol)
+        if features is None:
             return {'error': 'Insufficient data for prediction'}
         
         # Generate predictions
         ensemble = self.models[symbol]
-        prediction = ensemble.predict(X_recent[-1:])  # Predict next day
+        prediction = ensemble.predict_batched(features[None, :])  # Predict next day, batched with concurrent callers
         
         # Calculate confidence and signal strength
-        current_price = recent_data['Close'].iloc[-1]
         predicted_price = prediction[0]
         
         signal_strength = (predicted_price - current_price) / current_price
@@ -646,6 +794,13 @@ class FinancialAITrainer:
         for symbol, model in self.models.items():
             joblib.dump(model, f"{export_path}/{symbol}_ensemble_model.pkl")
         
+        # Copy the checkpointed LSTMs, already in the format the backend model server loads
+        for symbol in self.models if self.checkpoint_dir else []:
+            for source, target in zip(lstm_artifact_paths(self.checkpoint_dir, symbol),
+                                      lstm_artifact_paths(export_path, symbol)):
+                if os.path.exists(source):
+                    shutil.copyfile(source, target)
+        
         # Save results
         with open(f"{export_path}/training_results.json", 'w') as f:
             json.dump(self.results, f, indent=2, default=str)
@@ -0,0 +1,152 @@
+"""
+Macro Data
+
+Economic indicator series (FRED) for the training pipeline. Each series is
+downloaded once, kept on disk with a daily TTL and refreshed incrementally:
+once stale, only the observations from a short revision window before the
+last stored date are requested again and merged over the stored history.
+All series are aligned to one trading-day calendar and forward-filled a
+single time, so joining them onto every symbol is a plain lookup.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FRED_SERIES = {
+    'GDP': 'GDP',
+    'INFLATION': 'CPIAUCSL',
+    'UNEMPLOYMENT': 'UNRATE',
+    'INTEREST_RATE': 'FEDFUNDS',
+    'VIX': 'VIXCLS'
+}
+
+DEFAULT_START = '2015-01-01'
+DEFAULT_TTL = 24 * 3600
+# Published observations are revised for a while; re-request this window on refresh
+REVISION_WINDOW = pd.Timedelta(days=180)
+DEFAULT_CACHE_DIR = os.environ.get('MACRO_CACHE_DIR') or os.path.join(
+    os.path.expanduser('~'), '.cache', 'tradepro-ai', 'macro'
+)
+
+
+class MacroDataStore:
+    """Disk-cached, incrementally refreshed FRED series aligned to trading days"""
+
+    def __init__(self, fetch: Callable[[str, str], pd.Series], series: Dict[str, str] = None,
+                 start: str = DEFAULT_START, cache_dir: str = DEFAULT_CACHE_DIR, ttl: int = DEFAULT_TTL):
+        self.fetch = fetch
+        self.series = series or FRED_SERIES
+        self.start = start
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._aligned: Optional[pd.DataFrame] = None
+        self._aligned_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- Disk cache ---
+
+    def _path(self, series_id: str) -> str:
+        return os.path.join(self.cache_dir, f'{series_id}.json')
+
+    def _read(self, series_id: str) -> Optional[Dict]:
+        try:
+            with open(self._path(series_id)) as f:
+                cached = json.load(f)
+            cached['values'] = pd.Series(cached['values'], index=pd.DatetimeIndex(cached['dates']), dtype='float64')
+            return cached
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write(self, series_id: str, values: pd.Series):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(series_id)
+            with open(path + '.tmp', 'w') as f:
+                json.dump({
+                    'fetched_at': time.time(),
+                    'start': self.start,
+                    'dates': values.index.strftime('%Y-%m-%d').tolist(),
+                    'values': values.tolist()
+                }, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Could not cache macro series {series_id}: {e}")
+
+    # --- Loading ---
+
+    def _download(self, series_id: str, start) -> pd.Series:
+        values = self.fetch(series_id, start)
+        if isinstance(values, pd.DataFrame):
+            values = values.iloc[:, 0]
+        values = values.astype('float64').dropna()
+        values.index = pd.DatetimeIndex(values.index).tz_localize(None).normalize()
+        return values[~values.index.duplicated(keep='last')].sort_index()
+
+    def load_series(self, series_id: str) -> pd.Series:
+        """One series from the cache, refreshed incrementally once the TTL has passed"""
+        cached = self._read(series_id)
+        if cached is not None and cached.get('start') == self.start:
+            stored = cached['values']
+            if time.time() - cached['fetched_at'] < self.ttl:
+                return stored
+            if len(stored):
+                since = max(stored.index[-1] - REVISION_WINDOW, pd.Timestamp(self.start))
+                try:
+                    fresh = self._download(series_id, since.strftime('%Y-%m-%d'))
+                except Exception as e:
+                    logger.warning(f"Could not refresh {series_id}, using cached observations: {e}")
+                    return stored
+                # Revised and newly published observations replace the stored ones
+                values = pd.concat([stored[stored.index < since], fresh]).sort_index()
+                values = values[~values.index.duplicated(keep='last')]
+                self._write(series_id, values)
+                return values
+
+        values = self._download(series_id, self.start)
+        self._write(series_id, values)
+        return values
+
+    def load(self) -> pd.DataFrame:
+        """All configured series as raw observations, one column per indicator"""
+        data = {}
+        for name, series_id in self.series.items():
+            try:
+                data[name] = self.load_series(series_id)
+            except Exception as e:
+                logger.warning(f"Could not fetch {name}: {e}")
+        return pd.concat(data.values(), axis=1, keys=data.keys()) if data else pd.DataFrame()
+
+    # --- Trading-day alignment ---
+
+    def aligned(self, refresh: bool = False) -> pd.DataFrame:
+        """Indicators on a business-day calendar, forward-filled once and reused until the TTL passes"""
+        with self._lock:
+            if self._aligned is None or refresh or time.time() - self._aligned_at >= self.ttl:
+                raw = self.load()
+                if raw.empty:
+                    self._aligned = raw
+                else:
+                    today = pd.Timestamp.now().normalize()
+                    calendar = pd.bdate_range(min(raw.index[0], pd.Timestamp(self.start)), max(raw.index[-1], today))
+                    self._aligned = raw.reindex(raw.index.union(calendar)).ffill().reindex(calendar)
+                    self._aligned.index.name = 'Date'
+                self._aligned_at = time.time()
+            return self._aligned
+
+    def join(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Attach the aligned indicators to a daily frame by calendar date"""
+        aligned = self.aligned()
+        if aligned.empty:
+            return df
+        dates = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        macro = aligned.reindex(dates.normalize(), method='ffill')
+        macro.index = df.index
+        return df.join(macro, how='left')
@@ -0,0 +1,150 @@
+"""
+Micro-batching for Model Inference
+=====================================
+
+A ``MicroBatcher`` sits in front of a function that handles a list of
+inputs in one call (typically a batched forward pass). Callers submit
+single items from any thread and get a future back; a worker thread takes
+the first waiting item, keeps collecting until ``max_batch_size`` items
+are queued or ``max_wait`` seconds have passed, and hands the group to the
+handler in one call. Under light load an item waits at most ``max_wait``;
+under heavy load batches fill up and per-item cost drops.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = object()
+
+
+class BatcherClosed(RuntimeError):
+    """Raised for items submitted to, or left queued in, a closed batcher"""
+
+
+class BatchTiming(NamedTuple):
+    """How one item was served: the size of its batch and where the time went"""
+    batch_size: int
+    queued: float
+    inference: float
+
+
+class MicroBatcher:
+    """Group concurrent ``submit`` calls into batched calls of ``handler``
+
+    ``handler(items)`` must return one result per item, in order. Each
+    future resolves to its item's result and carries a ``timing``
+    attribute (``BatchTiming``) once done. If the handler raises, every
+    future in that batch gets the exception. Once ``close`` is called,
+    ``submit`` raises ``BatcherClosed``.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]], max_batch_size: int = 64,
+                 max_wait: float = 0.005, name: str = "micro-batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._sizes: Counter = Counter()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the future resolves once its batch has run"""
+        future: Future = Future()
+        # Checked and queued under the lock so no item lands behind _CLOSE
+        with self._close_lock:
+            if self._closed:
+                raise BatcherClosed("MicroBatcher is closed")
+            self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item: Any, timeout: float = None) -> Any:
+        """Submit one item and wait for its result"""
+        return self.submit(item).result(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counts, mean and max batch size, and the batch size histogram"""
+        with self._stats_lock:
+            return {
+                'batches': self._batches,
+                'items': self._items,
+                'mean_batch_size': self._items / self._batches if self._batches else 0.0,
+                'max_batch_size': max(self._sizes) if self._sizes else 0,
+                'batch_sizes': dict(sorted(self._sizes.items())),
+            }
+
+    def close(self, timeout: float = None):
+        """Stop accepting items; whatever is already queued still runs"""
+        with self._close_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _CLOSE:
+                self._fail_remaining()
+                return
+            batch = [first]
+            closing = False
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _CLOSE:
+                    closing = True
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+            if closing:
+                self._fail_remaining()
+                return
+
+    def _fail_remaining(self):
+        """Fail anything queued after _CLOSE so no caller waits forever"""
+        while True:
+            try:
+                _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            future.set_exception(BatcherClosed("MicroBatcher is closed"))
+
+    def _dispatch(self, batch: List[tuple]):
+        started = time.perf_counter()
+        try:
+            results = self.handler([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finished = time.perf_counter()
+
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._sizes[len(batch)] += 1
+        for (_, future, queued_at), result in zip(batch, results):
+            future.timing = BatchTiming(len(batch), started - queued_at, finished - started)
+            future.set_result(result)
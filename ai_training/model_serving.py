@@ -0,0 +1,96 @@
+"""
+Serving Exported LSTM Models
+=====================================
+
+An exported LSTM is two files in the export directory:
+``{SYMBOL}_lstm.keras`` holds the Keras model and ``{SYMBOL}_lstm.json``
+holds the sequence length and the fitted MinMaxScaler's ``min_`` and
+``scale_``. A server can therefore load and scale without scikit-learn or
+the training pipeline. TensorFlow is imported only when a model is
+compiled or loaded.
+"""
+
+import json
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def lstm_artifact_paths(export_path: str, symbol: str) -> Tuple[str, str]:
+    """Paths of the Keras model and its metadata for ``symbol``"""
+    stem = os.path.join(export_path, f"{symbol.upper()}_lstm")
+    return f"{stem}.keras", f"{stem}.json"
+
+
+def save_lstm(export_path: str, symbol: str, model, scaler, sequence_length: int):
+    """Write a trained LSTM and its scaler in the serving format"""
+    model_path, meta_path = lstm_artifact_paths(export_path, symbol)
+    model.save(model_path)
+    meta = {
+        'symbol': symbol.upper(),
+        'sequence_length': sequence_length,
+        'min': np.asarray(scaler.min_).tolist(),
+        'scale': np.asarray(scaler.scale_).tolist(),
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+def compile_forward(model, sequence_length: int, features: int = 1) -> Callable:
+    """Compiled ``model(x, training=False)``, traced once for any batch size"""
+    import tensorflow as tf
+    return tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[tf.TensorSpec([None, sequence_length, features], tf.float32)]
+    )
+
+
+def autoregressive_forecast(forward: Callable, windows: np.ndarray, steps: int) -> np.ndarray:
+    """Roll a one-step model ``steps`` times over scaled (batch, length) windows
+
+    Every step is one batched forward pass over all windows. The windows
+    live in a preallocated buffer: window k is ``buffer[:, k:k + length]``
+    and each step writes its predictions into the next column, so nothing
+    is rolled or re-stacked.
+    """
+    batch, length = windows.shape
+    buffer = np.empty((batch, length + steps, 1), dtype=np.float32)
+    buffer[:, :length, 0] = windows
+    for k in range(steps):
+        buffer[:, length + k, 0] = np.asarray(forward(buffer[:, k:k + length]))[:, 0]
+    return buffer[:, length:, 0].astype(np.float64)
+
+
+class ServedLSTM:
+    """An exported LSTM loaded for inference"""
+
+    def __init__(self, model, sequence_length: int, data_min: Sequence[float], scale: Sequence[float]):
+        self.model = model
+        self.sequence_length = sequence_length
+        self.data_min = np.asarray(data_min, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.forward = compile_forward(model, sequence_length)
+        self.nbytes = sum(weights.nbytes for weights in model.get_weights())
+
+    @classmethod
+    def load(cls, export_path: str, symbol: str) -> Optional['ServedLSTM']:
+        """Load ``symbol``'s exported model, or None if there is none"""
+        model_path, meta_path = lstm_artifact_paths(export_path, symbol)
+        if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+            return None
+        import tensorflow as tf
+        with open(meta_path) as f:
+            meta = json.load(f)
+        model = tf.keras.models.load_model(model_path, compile=False)
+        return cls(model, meta['sequence_length'], meta['min'], meta['scale'])
+
+    def forecast(self, series: List[Sequence[float]], steps: int) -> np.ndarray:
+        """Forecast ``steps`` prices for each series, returned as (len(series), steps)"""
+        length = self.sequence_length
+        if any(len(values) < length for values in series):
+            raise ValueError(f"Every series needs at least {length} values")
+        windows = np.stack([np.asarray(values, dtype=np.float64)[-length:] for values in series])
+        scaled = windows * self.scale + self.data_min
+        predictions = autoregressive_forecast(self.forward, scaled, steps)
+        return (predictions - self.data_min) / self.scale
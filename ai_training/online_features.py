@@ -0,0 +1,462 @@
+"""
+Online Feature Pipeline
+=====================================
+
+Computes the feature vector of ``feature_engineering`` one daily bar at a
+time, for scoring the latest bar without rebuilding a month of history.
+
+Every indicator keeps its own running state: ring buffers with running
+power sums for rolling means and moments, monotonic deques for rolling
+extremes, and the recursive state of the TA-Lib indicators (EMA, MACD,
+Wilder-smoothed RSI/ATR/ADX) reproduced with TA-Lib's seeding rules. An
+update costs O(features); only CCI walks its 14-bar window for the mean
+deviation, as TA-Lib itself does. The vector lists the columns in the
+order the batch pipeline hands them to the models (``columns``), with
+the same warm-up: nothing is emitted for a bar whose batch row has a
+missing value.
+"""
+
+import copy
+import math
+from collections import deque
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import LAG_COLUMNS, LAGS, OHLCV_COLUMNS, ROLLING_COLUMNS, ROLLING_WINDOWS, feature_columns
+from rolling_moments import STATISTICS
+
+NAN = float('nan')
+TARGET_COLUMN = 'Close'
+
+
+def _is_zero(value: float) -> bool:
+    # TA-Lib's TA_IS_ZERO
+    return -1e-8 < value < 1e-8
+
+
+class RollingWindow:
+    """The last ``size`` values with running power sums and monotonic min/max deques
+
+    Statistics follow ``rolling_moments`` (and pandas): NaN until the window
+    holds ``size`` valid values, and a constant window has zero spread. The
+    power sums are kept about a centre that is moved to the window mean
+    every ``size`` updates, so they stay accurate on trending series.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.index = 0
+        self.nans = 0
+        self.centre = 0.0
+        self.sums = [0.0, 0.0, 0.0, 0.0]
+        self.since_centred = 0
+        self.lows = deque()   # (index, value), increasing values
+        self.highs = deque()  # (index, value), decreasing values
+
+    def push(self, value: float):
+        index = self.index
+        self.index += 1
+        self.values.append(value)
+        if value != value:
+            self.nans += 1
+        else:
+            self._add(value, 1.0)
+            while self.lows and self.lows[-1][1] >= value:
+                self.lows.pop()
+            self.lows.append((index, value))
+            while self.highs and self.highs[-1][1] <= value:
+                self.highs.pop()
+            self.highs.append((index, value))
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            if old != old:
+                self.nans -= 1
+            else:
+                self._add(old, -1.0)
+        for extremes in (self.lows, self.highs):
+            while extremes and extremes[0][0] <= index - self.size:
+                extremes.popleft()
+        self.since_centred += 1
+        if self.since_centred >= self.size:
+            self._recentre()
+
+    def _add(self, value: float, sign: float):
+        d = value - self.centre
+        d2 = d * d
+        self.sums[0] += sign * d
+        self.sums[1] += sign * d2
+        self.sums[2] += sign * d2 * d
+        self.sums[3] += sign * d2 * d2
+
+    def _recentre(self):
+        valid = [value for value in self.values if value == value]
+        self.centre = math.fsum(valid) / len(valid) if valid else 0.0
+        self.sums = [0.0, 0.0, 0.0, 0.0]
+        for value in valid:
+            self._add(value, 1.0)
+        self.since_centred = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size and not self.nans
+
+    def min(self) -> float:
+        return self.lows[0][1] if self.full else NAN
+
+    def max(self) -> float:
+        return self.highs[0][1] if self.full else NAN
+
+    def _flat(self) -> bool:
+        return self.lows[0][1] == self.highs[0][1]
+
+    def _central(self):
+        # Mean offset from the centre and the second to fourth central moments
+        w = float(self.size)
+        mean = self.sums[0] / w
+        mean2 = mean * mean
+        B = max(self.sums[1] / w - mean2, 0.0)
+        C = self.sums[2] / w - mean * (mean2 + 3 * B)
+        D = self.sums[3] / w - mean2 * (mean2 + 6 * B) - 4 * C * mean
+        return mean, B, C, D
+
+    def mean(self) -> float:
+        if not self.full:
+            return NAN
+        if self._flat():
+            return self.lows[0][1]
+        return self.centre + self.sums[0] / self.size
+
+    def variance(self, ddof: int = 1) -> float:
+        if not self.full or self.size <= ddof:
+            return NAN
+        if self._flat():
+            return 0.0
+        return self._central()[1] * self.size / (self.size - ddof)
+
+    def std(self, ddof: int = 1) -> float:
+        return math.sqrt(self.variance(ddof))
+
+    def skew(self) -> float:
+        w = self.size
+        if not self.full or w < 3:
+            return NAN
+        if self._flat():
+            return 0.0
+        _, B, C, _ = self._central()
+        if B == 0:
+            return NAN
+        return C / (B * math.sqrt(B)) * math.sqrt(w * (w - 1)) / (w - 2)
+
+    def kurt(self) -> float:
+        w = self.size
+        if not self.full or w < 4:
+            return NAN
+        if self._flat():
+            return -3.0
+        _, B, _, D = self._central()
+        if B == 0:
+            return NAN
+        return D / (B * B) * (w * w - 1) / ((w - 2) * (w - 3)) - 3 * (w - 1) ** 2 / ((w - 2) * (w - 3))
+
+    def statistics(self) -> List[float]:
+        """sma, std, min, max, skew, kurt, as ``rolling_moments`` labels them"""
+        return [self.mean(), self.std(), self.min(), self.max(), self.skew(), self.kurt()]
+
+
+class EMA:
+    """TA-Lib EMA: seeded with the mean of the ``period`` inputs ending at input ``seed_at``"""
+
+    def __init__(self, period: int, seed_at: Optional[int] = None):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.seed_at = seed_at or period
+        self.recent = deque(maxlen=period)
+        self.count = 0
+        self.value = NAN
+
+    def push(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.seed_at:
+            self.recent.append(value)
+        elif self.count == self.seed_at:
+            self.recent.append(value)
+            total = 0.0
+            for recent in self.recent:
+                total += recent
+            self.value = total / self.period
+        else:
+            self.value = (value - self.value) * self.k + self.value
+        return self.value
+
+
+class MACD:
+    """TA-Lib MACD(12, 26, 9): both EMAs start at the slow one's first bar"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast, seed_at=slow)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def push(self, close: float):
+        fast, slow = self.fast.push(close), self.slow.push(close)
+        if slow != slow:
+            return NAN, NAN, NAN
+        macd = fast - slow
+        signal = self.signal.push(macd)
+        if signal != signal:
+            return NAN, NAN, NAN
+        return macd, signal, macd - signal
+
+
+class RSI:
+    """TA-Lib RSI: Wilder-smoothed gains and losses, seeded with their mean over ``period``"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev = NAN
+        self.changes = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def push(self, close: float) -> float:
+        prev, self.prev = self.prev, close
+        if prev != prev:
+            return NAN
+        change = close - prev
+        self.changes += 1
+        if self.changes > self.period:
+            self.gain *= self.period - 1
+            self.loss *= self.period - 1
+        if change < 0:
+            self.loss -= change
+        else:
+            self.gain += change
+        if self.changes < self.period:
+            return NAN
+        self.gain /= self.period
+        self.loss /= self.period
+        total = self.gain + self.loss
+        return 100 * (self.gain / total) if not _is_zero(total) else 0.0
+
+
+def true_range(high: float, low: float, prev_close: float) -> float:
+    return max(high - low, abs(prev_close - high), abs(prev_close - low))
+
+
+def _ratio(a: float, b: float) -> float:
+    # Float division as pandas does it: x/0 is +-inf and 0/0 NaN
+    if b != 0.0:
+        return a / b
+    return math.copysign(math.inf, a) if a == a and a != 0.0 else NAN
+
+
+class ATR:
+    """TA-Lib ATR: mean of the first ``period`` true ranges, then Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.ranges = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def push(self, high: float, low: float, prev_close: float) -> float:
+        if prev_close != prev_close:
+            return NAN
+        tr = true_range(high, low, prev_close)
+        self.ranges += 1
+        if self.ranges < self.period:
+            self.total += tr
+        elif self.ranges == self.period:
+            self.value = (self.total + tr) / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+
+class ADX:
+    """TA-Lib ADX: Wilder-smoothed DM and TR, the first ADX the mean of ``period`` DX values"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.bars = 0
+        self.prev_high = self.prev_low = self.prev_close = NAN
+        self.plus_dm = self.minus_dm = self.tr = 0.0
+        self.dx_total = 0.0
+        self.value = NAN
+
+    def push(self, high: float, low: float, close: float) -> float:
+        period = self.period
+        bar = self.bars
+        self.bars += 1
+        if bar == 0:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return NAN
+        diff_plus, self.prev_high = high - self.prev_high, high
+        diff_minus, self.prev_low = self.prev_low - low, low
+        if bar >= period:
+            self.minus_dm -= self.minus_dm / period
+            self.plus_dm -= self.plus_dm / period
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self.minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self.plus_dm += diff_plus
+        tr = true_range(high, low, self.prev_close)
+        self.tr = self.tr + tr if bar < period else self.tr - self.tr / period + tr
+        self.prev_close = close
+        if bar < period:
+            return NAN
+
+        dx = NAN
+        if not _is_zero(self.tr):
+            minus_di = 100 * (self.minus_dm / self.tr)
+            plus_di = 100 * (self.plus_dm / self.tr)
+            total = minus_di + plus_di
+            if not _is_zero(total):
+                dx = 100 * (abs(minus_di - plus_di) / total)
+        if bar < 2 * period - 1:
+            self.dx_total += dx if dx == dx else 0.0
+        elif bar == 2 * period - 1:
+            self.value = (self.dx_total + (dx if dx == dx else 0.0)) / period
+        elif dx == dx:
+            self.value = (self.value * (period - 1) + dx) / period
+        return self.value
+
+
+class CCI:
+    """TA-Lib CCI over the typical price; zero when it sits on its mean"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prices = deque(maxlen=period)
+
+    def push(self, high: float, low: float, close: float) -> float:
+        price = (high + low + close) / 3.0
+        self.prices.append(price)
+        if len(self.prices) < self.period:
+            return NAN
+        average = sum(self.prices) / self.period
+        deviation = sum(abs(p - average) for p in self.prices)
+        offset = price - average
+        if offset != 0.0 and deviation != 0.0:
+            return offset / (0.015 * (deviation / self.period))
+        return 0.0
+
+
+class OnlineFeatures:
+    """Incremental training features of one symbol, fed one daily bar at a time
+
+    ``extra_columns`` are passed through from each update's ``extras``, in
+    the place the batch pipeline puts macro indicators joined onto the
+    bars. ``update`` returns the feature vector for the new bar (ordered as
+    ``columns``), or None while any feature is still missing, as the batch
+pipeline drops such rows.
+    Bars must arrive in order and complete: a bar that may still change is
+    scored with ``preview``, which leaves the state untouched.
+    """
+
+    def __init__(self, extra_columns: Sequence[str] = ()):
+        self.extra_columns = list(extra_columns)
+        self.columns = [col for col in feature_columns(self.extra_columns) if col != TARGET_COLUMN]
+
+        self.bars = 0
+        self.last_index = None
+        self.values: Dict[str, float] = {}
+        self.prev_close = NAN
+
+        self.rsi = RSI(14)
+        self.macd = MACD()
+        self.ema_12, self.ema_26 = EMA(12), EMA(26)
+        self.atr = ATR(14)
+        self.adx = ADX(14)
+        self.cci = CCI(14)
+        self.closes = deque(maxlen=11)  # ROC(10)
+        sizes = {'Close': {5, 20, 50, 200}, 'Volume': {20}, 'Price_Change': {20}, 'High': {14, 20}, 'Low': {14, 20}}
+        for col in ROLLING_COLUMNS:
+            sizes.setdefault(col, set()).update(ROLLING_WINDOWS)
+        self.windows = {col: {w: RollingWindow(w) for w in sorted(ws)} for col, ws in sizes.items()}
+        self.history = {col: deque(maxlen=max(LAGS) + 1) for col in LAG_COLUMNS}
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float,
+               extras: Optional[Mapping[str, float]] = None) -> Optional[np.ndarray]:
+        """Add one completed bar; its feature vector, or None during warm-up"""
+        values = self.values
+        values.update(Open=float(open_), High=float(high), Low=float(low), Close=float(close), Volume=float(volume))
+        high, low, close, volume = values['High'], values['Low'], values['Close'], values['Volume']
+        prev_close, self.prev_close = self.prev_close, close
+
+        # Recursive TA-Lib indicators
+        values['RSI'] = self.rsi.push(close)
+        values['MACD'], values['MACD_signal'], values['MACD_hist'] = self.macd.push(close)
+        values['EMA_12'] = self.ema_12.push(close)
+        values['EMA_26'] = self.ema_26.push(close)
+        values['ATR'] = self.atr.push(high, low, prev_close)
+        values['ADX'] = self.adx.push(high, low, close)
+        values['CCI'] = self.cci.push(high, low, close)
+        self.closes.append(close)
+        base = self.closes[0] if len(self.closes) == self.closes.maxlen else NAN
+        values['ROC'] = ((close / base) - 1.0) * 100.0 if base != 0.0 else 0.0
+        values['Price_Change'] = _ratio(close, prev_close) - 1
+        values['High_Low_Ratio'] = _ratio(high, low)
+        change = _ratio(close, prev_close)
+        values['Log_Return'] = math.log(change) if change > 0 else -math.inf if change == 0 else NAN
+
+        # Everything over a rolling window
+        for col, windows in self.windows.items():
+            for window in windows.values():
+                window.push(values.get(col, NAN))
+        windows = self.windows
+        bands = windows['Close'][5]
+        middle = bands.mean()
+        variance = bands.variance(ddof=0)
+        spread = 2 * math.sqrt(variance) if variance >= 1e-8 else 0.0 if variance == variance else NAN
+        values['BB_upper'], values['BB_middle'], values['BB_lower'] = middle + spread, middle, middle - spread
+        for w in (20, 50, 200):
+            values[f'SMA_{w}'] = windows['Close'][w].mean()
+        highest, lowest = windows['High'][14].max(), windows['Low'][14].min()
+        diff = (highest - lowest) / -100.0
+        values['Williams_R'] = (highest - close) / diff if diff != 0.0 else 0.0
+        values['Volume_SMA'] = windows['Volume'][20].mean()
+        values['Volume_Ratio'] = _ratio(volume, values['Volume_SMA'])
+        values['Volatility'] = windows['Price_Change'][20].std()
+        values['Support'] = windows['Low'][20].min()
+        values['Resistance'] = windows['High'][20].max()
+        values['Price_Position'] = _ratio(close - values['Support'], values['Resistance'] - values['Support'])
+
+        self.bars += 1
+
+        for col in self.extra_columns:
+            values[col] = float(extras[col]) if extras is not None and col in extras else NAN
+        for col in LAG_COLUMNS:
+            history = self.history[col]
+            history.append(values[col])
+            for lag in LAGS:
+                values[f'{col}_lag_{lag}'] = history[-1 - lag] if lag < len(history) else NAN
+        for col in ROLLING_COLUMNS:
+            for w in ROLLING_WINDOWS:
+                for stat, value in zip(STATISTICS, windows[col][w].statistics()):
+                    values[f'{col}_{stat}_{w}'] = value
+        values['RSI_Volume_Interaction'] = values['RSI'] * values['Volume_Ratio']
+        values['MACD_Price_Interaction'] = values['MACD'] * values['Price_Change']
+        band = values['BB_upper'] - values['BB_lower']
+        values['BB_Position'] = _ratio(close - values['BB_lower'], band)
+        values['BB_Squeeze'] = _ratio(band, close)
+
+        vector = np.array([values[col] for col in self.columns])
+        return None if np.isnan(vector).any() else vector
+
+    def preview(self, *bar, extras: Optional[Mapping[str, float]] = None) -> Optional[np.ndarray]:
+        """Feature vector of a bar that may still change, without adding it"""
+        return copy.deepcopy(self).update(*bar, extras=extras)
+
+    def update_frame(self, df: pd.DataFrame) -> Optional[np.ndarray]:
+        """Add every bar of an OHLCV frame (plus extra columns); the last bar's vector"""
+        vector = None
+        extras = df[self.extra_columns].to_numpy(dtype=np.float64) if self.extra_columns else None
+        for i, bar in enumerate(df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)):
+            vector = self.update(*bar, extras=dict(zip(self.extra_columns, extras[i])) if extras is not None else None)
+        if len(df):
+            self.last_index = df.index[-1]
+        return vector
@@ -0,0 +1,397 @@
+"""
+Panel Feature Computation
+=====================================
+
+Computes the training features of a whole universe at once. OHLCV of
+every symbol is held as aligned (time, symbol) arrays and each feature of
+``feature_engineering.FEATURES`` runs as one vectorised operation over all
+symbols: lags, rolling statistics and interactions work along the time
+axis of any array, and the TA-Lib indicators, which only take one series,
+are replaced here by (time, symbol) equivalents. Recursive indicators
+(EMA, MACD, RSI, ATR, ADX) keep TA-Lib's seeding and are solved as linear
+recurrences in closed form, a few dozen rows per step; the others (SMA,
+BBANDS, CCI, ROC, WILLR) are window sums and sliding windows with no time
+loop. The results match the per-symbol pipeline.
+
+Symbols listed later or missing days are computed on their own bar
+sequence, as the per-symbol pipeline sees them: each symbol's bars are
+packed to the top of the arrays before computing and scattered back onto
+the shared calendar afterwards. Cross-sectional ranks and z-scores then
+compare symbols on the same date.
+"""
+
+import warnings
+from functools import partial
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from feature_engineering import FEATURES, OHLCV_COLUMNS, feature_columns
+from feature_graph import FeatureCache, FeatureGraph
+from rolling_moments import sliding_extreme
+
+# Symbols per vectorised pass, bounding the (time, symbol, feature) working
+# set; a few dozen keeps the rolling statistics' temporaries in cache
+DEFAULT_CHUNK_SIZE = 32
+
+
+def _is_zero(values: np.ndarray) -> np.ndarray:
+    # TA-Lib's TA_IS_ZERO
+    return (values > -1e-8) & (values < 1e-8)
+
+
+def _window_sums(values: np.ndarray, period: int) -> np.ndarray:
+    """Sums of every ``period`` rows, for the windows ending at rows ``period - 1`` onwards"""
+    totals = np.cumsum(values, axis=0)
+    sums = totals[period - 1:].copy()
+    sums[1:] -= totals[:len(values) - period]
+    return sums
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """TA-Lib SMA, from window sums of a cumulative sum"""
+    out = np.full(values.shape, np.nan)
+    if len(values) >= period:
+        out[period - 1:] = _window_sums(values, period) / period
+    return out
+
+
+def _linear_recurrence(decay, inputs: np.ndarray, initial) -> np.ndarray:
+    """``y[t] = decay[t] * y[t - 1] + inputs[t]`` along the first axis, from ``y[-1] = initial``
+
+    Solved in closed form a chunk of rows at a time: within a chunk, ``y``
+    is the running product of the decays times the running sum of the
+    inputs divided by that product. Chunks are cut short enough that the
+    divisor stays above 1e-4, which keeps the rounding error near 1e-12
+    relative; only the carry from one chunk to the next is a Python loop.
+    """
+    inputs = np.asarray(inputs, dtype=np.float64)
+    decay = np.broadcast_to(np.asarray(decay, dtype=np.float64), inputs.shape)
+    out = np.empty(inputs.shape)
+    smallest = decay.min(initial=1.0)
+    chunk = len(inputs) if smallest >= 1.0 else int(np.log(1e4) / -np.log(smallest))
+    carry = np.asarray(initial, dtype=np.float64)
+    chunk = max(chunk, 1)
+    for start in range(0, len(inputs), chunk):
+        rows = slice(start, start + chunk)
+        growth = np.cumprod(decay[rows], axis=0)
+        out[rows] = growth * (carry + np.cumsum(inputs[rows] / growth, axis=0))
+        carry = out[rows][-1]
+    return out
+
+
+def _per_row(values: np.ndarray, like: np.ndarray) -> np.ndarray:
+    # A per-row (time,) array shaped to broadcast over ``like``'s symbols
+    return values.reshape((-1,) + (1,) * (like.ndim - 1))
+
+
+def ema(values: np.ndarray, period: int, seed_at: Optional[int] = None) -> np.ndarray:
+    """TA-Lib EMA, seeded with the mean of the ``period`` values ending at row ``seed_at - 1``"""
+    seed_at = seed_at or period
+    out = np.full(values.shape, np.nan)
+    if len(values) < seed_at:
+        return out
+    out[seed_at - 1] = values[seed_at - period:seed_at].sum(axis=0) / period
+    k = 2.0 / (period + 1)
+    out[seed_at:] = _linear_recurrence(1.0 - k, k * values[seed_at:], out[seed_at - 1])
+    return out
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9):
+    """TA-Lib MACD: both EMAs start at the slow one's first row, all outputs at the signal's"""
+    line = ema(close, fast, seed_at=slow) - ema(close, slow)
+    signal_line = np.full(close.shape, np.nan)
+    signal_line[slow - 1:] = ema(line[slow - 1:], signal)
+    line[:slow + signal - 2] = np.nan
+    return line, signal_line, line - signal_line
+
+
+def bbands(close: np.ndarray, period: int = 5, deviations: float = 2.0):
+    """TA-Lib BBANDS over an SMA, with its population standard deviation"""
+    middle = sma(close, period)
+    variance = np.full(close.shape, np.nan)
+    if len(close) >= period:
+        # Sums of the raw prices over each window, as TA-Lib's running totals
+        # take them, so the variance carries the same rounding
+        windows = sliding_window_view(close, period, axis=0)
+        mean = windows.sum(axis=-1) / period
+        variance[period - 1:] = (windows * windows).sum(axis=-1) / period - mean * mean
+    with np.errstate(invalid='ignore'):
+        spread = np.where(variance < 1e-8, 0.0, np.sqrt(np.maximum(variance, 0.0))) * deviations
+    spread[np.isnan(variance)] = np.nan
+    return middle + spread, middle, middle - spread
+
+
+def _wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Wilder smoothing of ``values``: the mean of the first ``period``, then ``(prev * (period - 1) + x) / period``"""
+    out = np.empty((len(values) - period + 1,) + values.shape[1:])
+    out[0] = values[:period].sum(axis=0) / period
+    out[1:] = _linear_recurrence((period - 1) / period, values[period:] / period, out[0])
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """TA-Lib RSI: Wilder-smoothed gains and losses"""
+    out = np.full(close.shape, np.nan)
+    if len(close) <= period:
+        return out
+    change = close[1:] - close[:-1]
+    gain = _wilder(np.where(change < 0, 0.0, change), period)
+    loss = _wilder(np.where(change < 0, -change, 0.0), period)
+    total = gain + loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[period:] = np.where(_is_zero(total), 0.0, 100 * (gain / total))
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, prev_close: np.ndarray) -> np.ndarray:
+    return np.maximum(np.maximum(high - low, np.abs(prev_close - high)), np.abs(prev_close - low))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """TA-Lib ATR: mean of the first ``period`` true ranges, then Wilder smoothing"""
+    out = np.full(close.shape, np.nan)
+    if len(close) <= period:
+        return out
+    out[period:] = _wilder(true_range(high[1:], low[1:], close[:-1]), period)
+    return out
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """TA-Lib ADX: Wilder-smoothed DM and TR, the first ADX the mean of ``period`` DX values"""
+    out = np.full(close.shape, np.nan)
+    if len(close) < 2 * period:
+        return out
+    # Row i of these is bar i + 1; DM and TR are plain sums until bar
+    # ``period``, then decay by 1 / period before each new value
+    diff_plus = high[1:] - high[:-1]
+    diff_minus = low[:-1] - low[1:]
+    minus_move = (diff_minus > 0) & (diff_plus < diff_minus)
+    plus_move = ~minus_move & (diff_plus > 0) & (diff_plus > diff_minus)
+    decay = _per_row(np.where(np.arange(1, len(close)) >= period, 1.0 - 1.0 / period, 1.0), close)
+    zero = np.zeros(close.shape[1:])
+    minus_dm = _linear_recurrence(decay, np.where(minus_move, diff_minus, 0.0), zero)[period - 1:]
+    plus_dm = _linear_recurrence(decay, np.where(plus_move, diff_plus, 0.0), zero)[period - 1:]
+    tr = _linear_recurrence(decay, true_range(high[1:], low[1:], close[:-1]), zero)[period - 1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        minus_di = 100 * (minus_dm / tr)
+        plus_di = 100 * (plus_dm / tr)
+        total = minus_di + plus_di
+        valid = ~_is_zero(tr) & ~_is_zero(total)
+        dx = 100 * (np.abs(minus_di - plus_di) / total)
+    # DX of bars ``period`` onwards; DX that cannot be computed leaves ADX as it was
+    first = np.where(valid[:period], dx[:period], 0.0).sum(axis=0) / period
+    out[2 * period - 1] = first
+    out[2 * period:] = _linear_recurrence(np.where(valid[period:], (period - 1) / period, 1.0),
+                                          np.where(valid[period:], dx[period:] / period, 0.0), first)
+    return out
+
+
+def cci(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """TA-Lib CCI over the typical price; zero when it sits on its mean"""
+    out = np.full(close.shape, np.nan)
+    if len(close) < period:
+        return out
+    price = (high + low + close) / 3.0
+    windows = sliding_window_view(price, period, axis=0)
+    average = windows.sum(axis=-1) / period
+    deviation = np.abs(windows - average[..., np.newaxis]).sum(axis=-1)
+    offset = price[period - 1:] - average
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cci = offset / (0.015 * (deviation / period))
+    out[period - 1:] = np.where((offset != 0.0) & (deviation != 0.0), cci, 0.0)
+    out[period - 1:][np.isnan(offset) | np.isnan(deviation)] = np.nan
+    return out
+
+
+def roc(close: np.ndarray, period: int = 10) -> np.ndarray:
+    """TA-Lib ROC: percent change over ``period`` rows, zero from a zero base"""
+    out = np.full(close.shape, np.nan)
+    base = close[:len(close) - period]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[period:] = np.where(base != 0.0, ((close[period:] / base) - 1.0) * 100.0, 0.0)
+    out[period:][np.isnan(base)] = np.nan
+    return out
+
+
+def willr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """TA-Lib WILLR: close within the ``period``-row range, zero for a flat range"""
+    highest = sliding_extreme(high, period, maximum=True)
+    lowest = sliding_extreme(low, period, maximum=False)
+    diff = (highest - lowest) / -100.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(diff != 0.0, (highest - close) / diff, 0.0)
+
+
+# The batch feature graph with the TA-Lib nodes swapped for their panel kernels
+PANEL_KERNELS = {
+    'RSI': rsi,
+    'MACD': macd,
+    'BB_upper': bbands,
+    'SMA_20': partial(sma, period=20),
+    'SMA_50': partial(sma, period=50),
+    'SMA_200': partial(sma, period=200),
+    'EMA_12': partial(ema, period=12),
+    'EMA_26': partial(ema, period=26),
+    'ATR': atr,
+    'ADX': adx,
+    'CCI': cci,
+    'ROC': roc,
+    'Williams_R': willr,
+}
+PANEL_FEATURES = FeatureGraph()
+for node in FEATURES.nodes:
+    PANEL_FEATURES.add(node.outputs, node.inputs, PANEL_KERNELS.get(node.outputs[0], node.func))
+
+
+def cross_sectional_rank(values: np.ndarray) -> np.ndarray:
+    """Percentile rank (0-1] of each symbol among the symbols with a value on the same row"""
+    return pd.DataFrame(values).rank(axis=1, pct=True).to_numpy()
+
+
+def cross_sectional_zscore(values: np.ndarray) -> np.ndarray:
+    """Each symbol's distance from the row's mean across symbols, in row standard deviations"""
+    # Rows where no symbol has a value stay NaN; where every symbol has the
+    # same value (one symbol, say), each sits at the mean
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(values, axis=1, keepdims=True)
+        std = np.nanstd(values, axis=1, keepdims=True)
+        return np.where(std == 0, values - mean, (values - mean) / std)
+
+
+def _rows(dates: pd.Index, index: pd.Index):
+    # Positions of ``index`` in ``dates``; a slice when they are the same dates
+    return slice(None) if index.equals(dates) else dates.get_indexer(index)
+
+
+def _on_calendar(packed: np.ndarray, order: np.ndarray, counts: np.ndarray, rows: int) -> np.ndarray:
+    # Packed (bar, symbol) values scattered back to their calendar rows
+    values = np.full((rows, packed.shape[1]), np.nan)
+    bars = np.arange(len(order))[:, None] < counts
+    np.put_along_axis(values, order, np.where(bars, packed, np.nan), axis=0)
+    return values
+
+
+class Panel:
+    """Fields of many symbols as aligned (time, symbol) arrays on a shared calendar"""
+
+    def __init__(self, fields: Dict[str, np.ndarray], dates: pd.Index, symbols: Sequence[str]):
+        self.fields = fields
+        self.dates = dates
+        self.symbols = list(symbols)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], columns: Optional[Sequence[str]] = None) -> 'Panel':
+        """Align per-symbol frames on the union of their dates; missing bars are NaN"""
+        symbols = list(frames)
+        columns = list(columns) if columns is not None else list(dict.fromkeys(
+            col for df in frames.values() for col in df.columns))
+        dates = frames[symbols[0]].index
+        for df in list(frames.values())[1:]:
+            dates = dates.union(df.index)
+        stacked = np.full((len(columns), len(dates), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            df = frames[symbol]
+            rows = _rows(dates, df.index)
+            for i, col in enumerate(columns):
+                if col in df.columns:
+                    stacked[i, rows, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        fields = dict(zip(columns, stacked))
+        return cls(fields, dates, symbols)
+
+    def compute(self, columns: Sequence[str], cache: Optional[FeatureCache] = None) -> Dict[str, np.ndarray]:
+        """(time, symbol) arrays of ``columns``, each symbol computed over its own bars"""
+        features, order, counts = self.compute_packed(columns, cache=cache)
+        if order is None:
+            return features
+        return {col: _on_calendar(features[col], order, counts, len(self.dates)) for col in columns}
+
+    def compute_packed(self, columns: Sequence[str], cache: Optional[FeatureCache] = None):
+        """``columns`` over each symbol's bars packed to the top of the arrays
+
+        Returns the (bar, symbol) arrays, the calendar row of each packed bar
+        (``order[i, j]`` for bar ``i`` of symbol ``j``) and each symbol's bar
+        count. ``order`` is None when every symbol has every date and the
+        arrays are already on the calendar.
+        """
+        present = ~np.isnan(self.fields['Close'])
+        counts = present.sum(axis=0)
+        if present.all():
+            return PANEL_FEATURES.compute_arrays(self.fields, columns, cache=cache), None, counts
+
+        # Pack every symbol's bars to the top, in date order, so indicators
+        # warm up over the bars each symbol actually has
+        order = np.argsort(~present, axis=0, kind='stable')[:counts.max(initial=0)]
+        padding = np.arange(len(order))[:, None] >= counts
+
+        sources = {}
+        for col in PANEL_FEATURES.sources(columns, self.fields):
+            packed = np.take_along_axis(self.fields[col], order, axis=0)
+            packed[padding] = np.nan
+            sources[col] = packed
+        return PANEL_FEATURES.compute_arrays(sources, columns, cache=cache), order, counts
+
+
+def build_panel_features(frames: Dict[str, pd.DataFrame], cross_sectional: Sequence[str] = (),
+                         cache: Optional[FeatureCache] = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, pd.DataFrame]:
+    """``build_features`` of every frame, computed ``chunk_size`` symbols per vectorised pass
+
+    ``cross_sectional`` columns add ``{column}_cs_rank`` and
+    ``{column}_cs_zscore`` features, comparing each symbol with the whole
+    universe on the same date.
+    """
+    symbols = list(frames)
+    extra_columns = list(dict.fromkeys(col for df in frames.values() for col in df.columns
+                                       if col not in OHLCV_COLUMNS))
+    columns = feature_columns(extra_columns)
+    dates = None
+    for df in frames.values():
+        dates = df.index if dates is None else dates.union(df.index)
+
+    blocks: Dict[str, np.ndarray] = {}
+    index: Dict[str, pd.Index] = {}
+    universe = {col: np.full((len(dates), len(symbols)), np.nan) for col in cross_sectional}
+    for start in range(0, len(symbols), chunk_size):
+        chunk = symbols[start:start + chunk_size]
+        panel = Panel.from_frames({symbol: frames[symbol] for symbol in chunk}, OHLCV_COLUMNS + extra_columns)
+        features, order, counts = panel.compute_packed(columns, cache=cache)
+        positions = _rows(dates, panel.dates)
+        for col in cross_sectional:
+            universe[col][positions, start:start + len(chunk)] = (
+                features[col] if order is None else _on_calendar(features[col], order, counts, len(panel.dates)))
+
+        # Symbol-major, so each symbol's (feature, time) block is contiguous
+        # and becomes a frame without another transpose. Packed symbols keep
+        # their own bars as they are, with no scatter back to the calendar
+        chunk_blocks = np.empty((len(chunk), len(columns), len(features[columns[0]])))
+        for i, col in enumerate(columns):
+            chunk_blocks[:, i, :] = features[col].T
+        del features
+        for j, symbol in enumerate(chunk):
+            if order is None:
+                index[symbol] = frames[symbol].index
+                blocks[symbol] = chunk_blocks[j][:, _rows(panel.dates, index[symbol])]
+            else:
+                index[symbol] = panel.dates[order[:counts[j], j]]
+                blocks[symbol] = chunk_blocks[j][:, :counts[j]]
+
+    if cross_sectional:
+        columns = columns + [f'{col}_cs_{kind}' for col in cross_sectional for kind in ('rank', 'zscore')]
+        scores = [score(universe[col]) for col in cross_sectional
+                  for score in (cross_sectional_rank, cross_sectional_zscore)]
+        for j, symbol in enumerate(symbols):
+            rows = _rows(dates, index[symbol])
+            blocks[symbol] = np.concatenate([blocks[symbol], np.stack([values[rows, j] for values in scores])])
+
+    results = {}
+    for symbol in symbols:
+        block = blocks.pop(symbol)
+        complete = ~np.isnan(block).any(axis=0)
+        results[symbol] = pd.DataFrame(block[:, complete].T, index=index[symbol][complete],
+                                       columns=columns, copy=False)
+    return results
@@ -0,0 +1,230 @@
+"""
+Rolling Moments Engine
+=====================================
+
+Computes the rolling mean, std, min, max, skew and kurtosis of many
+columns over many windows in one go, matching pandas' ``rolling(window)``
+statistics (sample std, bias-corrected skew and excess kurtosis, NaN until
+a window holds ``window`` valid values).
+
+Each statistic family is one vectorised pass per column and window instead
+of a pandas ``rolling`` walk per statistic. Mean, std, skew and kurtosis
+all come from the window's first four power sums, read off running sums
+kept within blocks of ``window`` rows. The sums are taken about each
+block's mean, so they stay accurate for long, trending or large-valued
+series (volume). Min and max use the van Herk/Gil-Werman scheme, the
+vectorised equivalent of a monotonic deque: running extremes from both
+ends of the same blocks give any window's extreme in O(1). All
+statistics are written into one preallocated 2-D array.
+
+The kernels work along the first axis of arrays of any shape, so a
+(time, symbol) panel gets the statistics of every symbol in the same pass.
+"""
+
+from math import comb
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+STATISTICS = ('sma', 'std', 'min', 'max', 'skew', 'kurt')
+
+
+def rolling_labels(columns: Sequence[str], windows: Sequence[int]) -> List[str]:
+    """Column labels of ``rolling_moments``, in the order it writes them"""
+    return [f'{column}_{stat}_{window}' for column in columns for window in windows for stat in STATISTICS]
+
+
+def sliding_extreme(values: np.ndarray, window: int, maximum: bool) -> np.ndarray:
+    """Rolling max (or min) of ``values`` along its first axis, aligned to the window's last row
+
+    The series is cut into blocks of ``window`` rows. Any window spans the
+    tail of one block and the head of the next, so its extreme combines a
+    suffix extreme of the first with a prefix extreme of the second. NaN
+    reaches only the windows that contain it.
+    """
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if window > n:
+        return out
+    accumulate, combine = (np.maximum.accumulate, np.maximum) if maximum else (np.minimum.accumulate, np.minimum)
+    fill = -np.inf if maximum else np.inf
+    blocks = _blocks(values, window, fill)
+    prefix = accumulate(blocks, axis=1).reshape((-1,) + values.shape[1:])
+    suffix = accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + values.shape[1:])
+    out[window - 1:] = combine(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def _blocks(values: np.ndarray, window: int, fill: float) -> np.ndarray:
+    """``values`` padded with ``fill`` and cut into blocks of ``window`` rows"""
+    padding = np.full((-len(values) % window,) + values.shape[1:], fill)
+    return np.concatenate([values, padding]).reshape((-1, window) + values.shape[1:])
+
+
+def window_power_sums(values: np.ndarray, window: int, order: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """Valid count and power sums 1-``order`` of every full window, about a local centre
+
+    Returns ``sums`` (order + 1, rows - window + 1, ...) for the windows ending
+    at rows ``window - 1`` onwards, and the centre each window's sums are taken
+    about. Sums are accumulated within blocks of ``window`` rows about the
+    block's mean, so they never grow with the length or level of the
+    series. A window is the rest of the block it starts in plus the head of
+    the next block; the head's sums are moved to the first block's centre
+    with a binomial shift over the (small) difference of the two means.
+    """
+    n = len(values)
+    rest = values.shape[1:]
+    # Pad past a whole block so every window's next block exists
+    pad = (window - n % window,) + rest
+    valid = np.concatenate([~np.isnan(values), np.zeros(pad, dtype=bool)]).reshape((-1, window) + rest)
+    blocks = np.where(valid, np.concatenate([values, np.zeros(pad)]).reshape((-1, window) + rest), 0.0)
+    counts = valid.sum(axis=1)
+    centres = np.divide(blocks.sum(axis=1), counts, out=np.zeros(counts.shape), where=counts > 0)
+
+    powers = np.empty((order + 1,) + blocks.shape)
+    powers[0] = valid
+    np.subtract(blocks, centres[:, None], out=powers[1])
+    powers[1] *= valid
+    for k in range(2, order + 1):
+        np.multiply(powers[k - 1], powers[1], out=powers[k])
+
+    # Within-block sums of the rows before each row; a window is the rest of
+    # its start block (block total minus the rows before the start) plus the
+    # next block's rows before the window's end + 1
+    count = n - window + 1
+    before = np.cumsum(powers, axis=2)
+    totals = before[:, :, -1].copy()
+    before -= powers
+    before = before.reshape((order + 1, -1) + rest)
+    tail = np.repeat(totals, window, axis=1)[:, :count] - before[:, :count]
+    head = before[:, window:window + count]
+
+    centre = np.repeat(centres, window, axis=0)[:count]
+    d = [np.ones_like(centre), np.repeat(np.diff(centres, axis=0), window, axis=0)[:count]]
+    for k in range(2, order + 1):
+        d.append(d[k - 1] * d[1])
+    # sum((x - c0)^k) = sum_j C(k, j) * sum((x - c1)^(k - j)) * (c1 - c0)^j
+    sums = tail
+    for k in range(order + 1):
+        for j in range(k + 1):
+            sums[k] += comb(k, j) * head[k - j] * d[j]
+    return sums, centre
+
+
+def _statistics_into(outs: Sequence[np.ndarray], values: np.ndarray, window: int):
+    """Write the six statistics of ``values`` over ``window`` into ``outs``, each shaped like ``values``"""
+    n = len(values)
+    for stat in outs:
+        stat[:] = np.nan
+    low = sliding_extreme(values, window, maximum=False)
+    high = sliding_extreme(values, window, maximum=True)
+    outs[2][:] = low
+    outs[3][:] = high
+    if window > n:
+        return
+    sums, centre = window_power_sums(values, window)
+    rows = slice(window - 1, n)
+    full = sums[0] == window
+    # A constant window has exactly zero spread, as in pandas
+    flat = full & (low[rows] == high[rows])
+    w = float(window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums[1] / w
+        mean2 = mean * mean
+        B = np.maximum(sums[2] / w - mean2, 0.0)
+        C = sums[3] / w - mean * (mean2 + 3 * B)
+        D = sums[4] / w - mean2 * (mean2 + 6 * B) - 4 * C * mean
+        spread = np.sqrt(B)
+        missing = ~full
+
+        stat = outs[0][rows]
+        np.add(mean, centre, out=stat)
+        stat[flat] = low[rows][flat]
+        stat[missing] = np.nan
+        if window >= 2:
+            stat = outs[1][rows]
+            np.multiply(spread, np.sqrt(w / (w - 1)), out=stat)
+            stat[flat] = 0.0
+            stat[missing] = np.nan
+        if window >= 3:
+            stat = outs[4][rows]
+            np.divide(C, B * spread, out=stat)
+            stat *= np.sqrt(w * (w - 1)) / (w - 2)
+            stat[flat] = 0.0
+            stat[missing] = np.nan
+        if window >= 4:
+            stat = outs[5][rows]
+            np.divide(D, B * B, out=stat)
+            stat *= (w * w - 1) / ((w - 2) * (w - 3))
+            stat -= 3 * (w - 1) ** 2 / ((w - 2) * (w - 3))
+            stat[flat] = -3.0
+            stat[missing] = np.nan
+
+
+def rolling_statistics(values: np.ndarray, window: int) -> np.ndarray:
+    """(6, *values.shape) mean/std/min/max/skew/kurt over ``window`` rows of ``values``"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty((len(STATISTICS),) + values.shape)
+    _statistics_into(out, values, window)
+    return out
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling mean and sample std over ``window`` rows, without the other four statistics
+
+    Only the first two power sums are kept, and constant windows are found
+    from a running count of changes between rows instead of min and max.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    if window > n:
+        return mean, std
+    sums, centre = window_power_sums(values, window, order=2)
+    rows = slice(window - 1, n)
+    missing = sums[0] != window
+    changes = np.cumsum(np.concatenate([np.zeros((1,) + values.shape[1:], dtype=bool),
+                                        values[1:] != values[:-1]]), axis=0)
+    flat = changes[window - 1:] == changes[:n - window + 1]
+    w = float(window)
+
+    with np.errstate(invalid='ignore'):
+        average = sums[1] / w
+        stat = mean[rows]
+        np.add(average, centre, out=stat)
+        stat[flat] = values[rows][flat]
+        stat[missing] = np.nan
+        if window >= 2:
+            stat = std[rows]
+            np.multiply(np.sqrt(np.maximum(sums[2] / w - average * average, 0.0)), np.sqrt(w / (w - 1)), out=stat)
+            stat[flat] = 0.0
+            stat[missing] = np.nan
+    return mean, std
+
+
+def _moments_into(out: np.ndarray, values: np.ndarray, windows: Sequence[int]):
+    """Fill ``out`` (rows, 6 * len(windows)) with the statistics of one column"""
+    for i, window in enumerate(windows):
+        block = out[:, i * len(STATISTICS):(i + 1) * len(STATISTICS)]
+        _statistics_into([block[:, k] for k in range(len(STATISTICS))], values, window)
+
+
+def rolling_moments(df: pd.DataFrame, columns: Sequence[str], windows: Sequence[int]) -> Tuple[np.ndarray, List[str]]:
+    """Rolling mean/std/min/max/skew/kurt of ``columns`` over ``windows``
+
+    Returns a (rows, len(columns) * len(windows) * 6) float64 array and its
+    column labels, ``{column}_{stat}_{window}`` as in
+    ``FeatureEngineer.create_rolling_features``.
+    """
+    columns = [column for column in columns if column in df.columns]
+    width = len(windows) * len(STATISTICS)
+    # Column-major, so each statistic is written contiguously and the
+    # array becomes a DataFrame block without a copy
+    out = np.empty((len(df), len(columns) * width), order='F')
+    for j, column in enumerate(columns):
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        _moments_into(out[:, j * width:(j + 1) * width], values, windows)
+    return out, rolling_labels(columns, windows)
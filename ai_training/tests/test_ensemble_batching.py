@@ -0,0 +1,74 @@
+"""
+Micro-batched ensemble predictions, and loading ensembles pickled before
+micro-batching existed.
+"""
+
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+# The trainer module pulls in TensorFlow, scikit-learn and the data clients
+trainer = pytest.importorskip('financial_ai_trainer')
+
+
+class RowSum:
+    """A model predicting the sum of each row; records every call's row count"""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(len(X))
+        return X.sum(axis=1)
+
+
+def ensemble(**kwargs):
+    model = RowSum()
+    trader = trainer.EnsembleTrader(**kwargs)
+    trader.add_model('sum', model, 1.0)
+    return trader, model
+
+
+def test_concurrent_callers_share_one_stacked_predict():
+    trader, model = ensemble(max_batch_size=4, max_wait=0.5)
+    blocks = [np.full((2, 3), float(i)) for i in range(4)]
+    start = threading.Barrier(4)
+
+    def call(X):
+        start.wait()
+        return trader.predict_batched(X, timeout=5)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(call, blocks))
+
+    assert model.calls == [8]
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, [3.0 * i, 3.0 * i])
+    stats = trader.batch_stats()
+    assert stats['batches'] == 1 and stats['batch_sizes'] == {4: 1}
+
+
+def test_ensembles_pickled_before_micro_batching_still_predict_batched():
+    trader, model = ensemble()
+    state = trader.__getstate__()
+    for name in ('max_batch_size', 'max_wait', '_batcher'):
+        del state[name]
+
+    old = trainer.EnsembleTrader.__new__(trainer.EnsembleTrader)
+    old.__setstate__(state)
+
+    assert (old.max_batch_size, old.max_wait) == (64, 0.003)
+    np.testing.assert_array_equal(old.predict_batched(np.ones((2, 3)), timeout=5), [3.0, 3.0])
+
+
+def test_pickled_ensemble_starts_a_fresh_batcher():
+    trader, _ = ensemble()
+    trader.predict_batched(np.ones(3), timeout=5)
+
+    loaded = pickle.loads(pickle.dumps(trader))
+    np.testing.assert_array_equal(loaded.predict_batched(np.ones(3), timeout=5), [3.0])
+    assert loaded.batcher() is not trader.batcher()
+    assert loaded.batch_stats()['batches'] == 1
@@ -0,0 +1,63 @@
+"""
+Tests for the declarative feature graph: planning, sharing and caching.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_graph import FeatureCache, FeatureGraph
+
+
+def counting_graph():
+    calls = []
+
+    def record(name, func):
+        def run(*arrays):
+            calls.append(name)
+            return func(*arrays)
+        return run
+
+    graph = FeatureGraph()
+    graph.add(['Change'], ['Close'], record('Change', lambda close: np.diff(close, prepend=np.nan)))
+    graph.add(['Up', 'Down'], ['Change'], record('Up/Down', lambda change: (np.maximum(change, 0), np.minimum(change, 0))))
+    graph.add(['Range'], ['High', 'Low'], record('Range', np.subtract))
+    graph.add(['Unused'], ['Close'], record('Unused', np.negative))
+    return graph, calls
+
+
+def frame(rows=50):
+    close = np.linspace(100, 120, rows)
+    return pd.DataFrame({'Close': close, 'High': close + 1, 'Low': close - 1})
+
+
+def test_shared_inputs_run_once_and_unused_features_are_skipped():
+    graph, calls = counting_graph()
+    result = graph.compute(frame(), ['Close', 'Up', 'Down', 'Range'])
+
+    assert sorted(calls) == ['Change', 'Range', 'Up/Down']
+    assert list(result.columns) == ['Close', 'Up', 'Down', 'Range']
+    np.testing.assert_allclose(result['Range'], 2.0)
+
+
+def test_cache_recomputes_only_what_changed(tmp_path):
+    graph, calls = counting_graph()
+    df = frame()
+    first = graph.compute(df, ['Up', 'Range'], cache=FeatureCache(directory=str(tmp_path)))
+
+    # A fresh cache on the same directory: a later run
+    calls.clear()
+    df.loc[10, 'High'] += 5
+    second = graph.compute(df, ['Up', 'Range'], cache=FeatureCache(directory=str(tmp_path)))
+
+    assert calls == ['Range']
+    pd.testing.assert_series_equal(first['Up'], second['Up'])
+    assert second.loc[10, 'Range'] == 7.0
+
+
+def test_unknown_columns_and_duplicate_declarations_are_rejected():
+    graph, _ = counting_graph()
+    with pytest.raises(KeyError):
+        graph.compute(frame(), ['Volume'])
+    with pytest.raises(ValueError):
+        graph.add(['Up'], ['Close'], np.negative)
@@ -0,0 +1,50 @@
+"""
+Compact feature matrices: equivalence with the frame-based preparation and
+the memory-mapped store.
+"""
+
+import numpy as np
+import pandas as pd
+
+from feature_matrix import FeatureMatrixStore, feature_matrix
+
+
+def training_frame(rows=60, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, 4)), columns=['RSI', 'MACD', 'ATR', 'Close'],
+                      index=pd.date_range('2021-01-01', periods=rows, freq='B'))
+    df.iloc[:3, 0] = np.nan
+    df.iloc[10:14, 1] = np.nan
+    df.iloc[-2:, 2] = np.nan
+    df['Sector'] = 'Tech'
+    return df
+
+
+def test_matrix_matches_filled_numeric_frame():
+    df = training_frame()
+    expected = df.select_dtypes(include=[np.number]).ffill().bfill()
+
+    X, y, columns = feature_matrix(df, dtype=np.float64)
+    assert columns == ['RSI', 'MACD', 'ATR']
+    np.testing.assert_array_equal(X, expected[columns].to_numpy())
+    np.testing.assert_array_equal(y, expected['Close'].to_numpy())
+
+    X32, y32, _ = feature_matrix(df)
+    assert X32.dtype == np.float32 and y32.dtype == np.float32
+    assert X32.flags.c_contiguous
+    np.testing.assert_allclose(X32, X, rtol=1e-6)
+
+
+def test_store_reuses_the_matrix_until_the_frame_changes(tmp_path):
+    df = training_frame()
+    store = FeatureMatrixStore(str(tmp_path))
+    X, y, _ = feature_matrix(df, store=store, name='AAPL')
+
+    cached, _, _ = feature_matrix(df, store=FeatureMatrixStore(str(tmp_path)), name='AAPL')
+    assert isinstance(cached, np.memmap)
+    assert not cached.flags.writeable
+    np.testing.assert_array_equal(cached, X)
+
+    df.iloc[20, 0] += 1.0
+    changed, _, _ = feature_matrix(df, store=store, name='AAPL')
+    assert changed[20, 0] == np.float32(df.iloc[20, 0])
@@ -0,0 +1,96 @@
+"""
+Incremental refresh of the macro series cache and expiry of the aligned frame.
+"""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import macro_data
+from macro_data import REVISION_WINDOW, MacroDataStore
+
+TTL = 3600
+
+
+class FakeFred:
+    """Monthly observations published so far; records every request's start date"""
+
+    def __init__(self, end='2024-06-01'):
+        self.values = pd.Series(1.0, index=pd.date_range('2020-01-01', end, freq='MS'))
+        self.requests = []
+        self.fail = False
+
+    def __call__(self, series_id, start):
+        self.requests.append((series_id, start))
+        if self.fail:
+            raise ConnectionError('FRED is down')
+        return self.values[self.values.index >= pd.Timestamp(start)].copy()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(macro_data, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def store(fred, tmp_path):
+    return MacroDataStore(fred, series={'RATE': 'FEDFUNDS'}, start='2020-01-01', cache_dir=str(tmp_path), ttl=TTL)
+
+
+def test_series_is_cached_until_the_ttl_passes(clock, tmp_path):
+    fred = FakeFred()
+    first = store(fred, tmp_path).load_series('FEDFUNDS')
+
+    clock.value += TTL - 1
+    pd.testing.assert_series_equal(store(fred, tmp_path).load_series('FEDFUNDS'), first, check_freq=False)
+    assert fred.requests == [('FEDFUNDS', '2020-01-01')]
+
+
+def test_stale_series_only_refetches_the_revision_window(clock, tmp_path):
+    fred = FakeFred()
+    store(fred, tmp_path).load_series('FEDFUNDS')
+
+    # Upstream revises everything, and publishes two more months
+    fred.values = pd.Series(2.0, index=pd.date_range('2020-01-01', '2024-08-01', freq='MS'))
+    clock.value += TTL
+    values = store(fred, tmp_path).load_series('FEDFUNDS')
+
+    since = pd.Timestamp('2024-06-01') - REVISION_WINDOW
+    assert fred.requests[-1] == ('FEDFUNDS', since.strftime('%Y-%m-%d'))
+    assert values.index.is_unique and values.index.is_monotonic_increasing
+    assert values.index[-1] == pd.Timestamp('2024-08-01')
+    # Only observations inside the window pick up the revision
+    assert (values[values.index < since] == 1.0).all()
+    assert (values[values.index >= since] == 2.0).all()
+    assert len(values) == len(fred.values)
+
+    # The merged series is what the next process finds on disk
+    clock.value += 1
+    pd.testing.assert_series_equal(store(fred, tmp_path).load_series('FEDFUNDS'), values, check_freq=False)
+    assert len(fred.requests) == 2
+
+
+def test_failed_refresh_falls_back_to_the_cached_series(clock, tmp_path):
+    fred = FakeFred()
+    first = store(fred, tmp_path).load_series('FEDFUNDS')
+
+    fred.fail = True
+    clock.value += TTL
+    pd.testing.assert_series_equal(store(fred, tmp_path).load_series('FEDFUNDS'), first, check_freq=False)
+
+
+def test_aligned_frame_expires_with_the_series(clock, tmp_path):
+    fred = FakeFred()
+    macro = store(fred, tmp_path)
+    aligned = macro.aligned()
+    assert macro.aligned() is aligned
+    assert aligned.loc['2024-07-01', 'RATE'] == 1.0
+
+    fred.values = pd.Series(2.0, index=pd.date_range('2020-01-01', '2024-07-01', freq='MS'))
+    clock.value += TTL
+    refreshed = macro.aligned()
+
+    assert refreshed is not aligned
+    assert refreshed.loc['2024-07-01', 'RATE'] == 2.0
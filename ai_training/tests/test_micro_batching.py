@@ -0,0 +1,88 @@
+"""
+Batching of concurrent submits, and shutdown of the micro-batcher while
+items are still arriving.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+import micro_batching
+from micro_batching import BatcherClosed, MicroBatcher
+
+
+def double(items):
+    return [item * 2 for item in items]
+
+
+def test_concurrent_submits_share_a_batch():
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait=0.2)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(batcher, range(8)))
+    batcher.close(5)
+
+    assert results == [item * 2 for item in range(8)]
+    assert batcher.stats()['batch_sizes'] == {8: 1}
+
+
+def test_queued_items_still_run_after_close():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda items: release.wait(5) and double(items), max_batch_size=1, max_wait=0)
+    futures = [batcher.submit(item) for item in range(3)]
+
+    closer = threading.Thread(target=batcher.close, args=(5,))
+    closer.start()
+    while not batcher._closed:
+        time.sleep(0.001)
+    with pytest.raises(BatcherClosed):
+        batcher.submit(3)
+    release.set()
+    closer.join()
+
+    assert [future.result(5) for future in futures] == [0, 2, 4]
+
+
+def test_items_behind_the_close_marker_fail_instead_of_hanging():
+    release = threading.Event()
+    batcher = MicroBatcher(lambda items: release.wait(5) and double(items), max_batch_size=1, max_wait=0)
+    first = batcher.submit(1)
+    # What an unlocked submit racing close could leave in the queue
+    batcher._closed = True
+    batcher._queue.put(micro_batching._CLOSE)
+    late = Future()
+    batcher._queue.put((2, late, time.perf_counter()))
+    release.set()
+
+    assert first.result(5) == 2
+    with pytest.raises(BatcherClosed):
+        late.result(5)
+    batcher._thread.join(5)
+    assert not batcher._thread.is_alive()
+
+
+def test_submit_racing_close_never_leaves_a_future_pending():
+    for _ in range(20):
+        batcher = MicroBatcher(double, max_batch_size=4, max_wait=0.001)
+        futures, rejected = [], []
+        start = threading.Barrier(5)
+
+        def submit_many():
+            start.wait()
+            for item in range(50):
+                try:
+                    futures.append(batcher.submit(item))
+                except BatcherClosed:
+                    rejected.append(item)
+
+        threads = [threading.Thread(target=submit_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        batcher.close(5)
+        for thread in threads:
+            thread.join()
+
+        assert len(futures) + len(rejected) == 200
+        assert all(future.exception(5) is None for future in futures)
@@ -0,0 +1,108 @@
+"""
+The batched autoregressive forecast against the per-series roll loop it
+replaced, with stub forward passes, and the same parity for a real LSTM
+where TensorFlow is installed.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from model_serving import ServedLSTM, autoregressive_forecast
+
+
+def window_mean(x):
+    """Stub one-step model: the mean of each (batch, length, 1) window"""
+    return np.asarray(x).mean(axis=1)
+
+
+def recency_weighted(x):
+    """Stub one-step model that depends on the order of the window"""
+    x = np.asarray(x)[:, :, 0]
+    weights = np.arange(1, x.shape[1] + 1)
+    return (x @ weights / weights.sum() + 0.01)[:, None]
+
+
+def roll_forecast(predict, window, steps):
+    """The per-series loop: predict one step, roll the window, repeat"""
+    current = np.asarray(window, dtype=np.float64).copy()
+    predictions = []
+    for _ in range(steps):
+        pred = np.asarray(predict(current.reshape((1, len(current), 1))))
+        predictions.append(pred[0, 0])
+        current = np.roll(current, -1)
+        current[-1] = pred[0, 0]
+    return np.array(predictions)
+
+
+def sample_windows(batch=5, length=12, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0, 1, (batch, length))
+
+
+@pytest.mark.parametrize('forward', [window_mean, recency_weighted])
+def test_batched_forecast_matches_the_roll_loop(forward):
+    windows = sample_windows()
+    predictions = autoregressive_forecast(forward, windows, 20)
+
+    assert predictions.shape == (5, 20) and predictions.dtype == np.float64
+    for window, got in zip(windows, predictions):
+        np.testing.assert_allclose(got, roll_forecast(forward, window, 20), rtol=1e-5)
+
+
+def test_every_step_is_one_pass_over_all_windows():
+    shapes = []
+
+    def forward(x):
+        shapes.append(x.shape)
+        return window_mean(x)
+
+    autoregressive_forecast(forward, sample_windows(batch=3, length=8), 4)
+    assert shapes == [(3, 8, 1)] * 4
+
+
+def test_served_model_scales_around_the_forecast():
+    served = ServedLSTM.__new__(ServedLSTM)
+    served.sequence_length = 12
+    served.data_min = np.array([-0.5])
+    served.scale = np.array([0.01])
+    served.forward = recency_weighted
+
+    series = [100 + np.arange(30.0), 50 + np.arange(12.0)]
+    forecast = served.forecast(series, 6)
+
+    for values, got in zip(series, forecast):
+        scaled = values[-12:] * 0.01 - 0.5
+        expected = (roll_forecast(recency_weighted, scaled, 6) + 0.5) / 0.01
+        np.testing.assert_allclose(got, expected, rtol=1e-5)
+    with pytest.raises(ValueError):
+        served.forecast([np.arange(11.0)], 1)
+
+
+def test_lstm_predict_batch_matches_the_roll_loop():
+    pytest.importorskip('tensorflow')
+    trainer = pytest.importorskip('financial_ai_trainer')
+
+    rng = np.random.default_rng(0)
+    series = [100 * np.exp(np.cumsum(rng.normal(0, 0.02, 200))) for _ in range(16)]
+    lstm = trainer.LSTMModel(sequence_length=20)
+    lstm.scaler.fit(np.concatenate(series).reshape(-1, 1))
+    lstm.model = lstm.build_model()
+
+    started = time.perf_counter()
+    loop = []
+    for values in series:
+        window = lstm.scaler.transform(values[-20:].reshape(-1, 1)).flatten()
+        scaled = roll_forecast(lambda x: lstm.model.predict(x, verbose=0), window, 10)
+        loop.append(lstm.scaler.inverse_transform(scaled.reshape(-1, 1)).flatten())
+    loop_seconds = time.perf_counter() - started
+
+    lstm.predict_batch(series[:1], 10)  # Trace the compiled forward pass
+    started = time.perf_counter()
+    batched = lstm.predict_batch(series, 10)
+    batched_seconds = time.perf_counter() - started
+
+    np.testing.assert_allclose(batched, np.array(loop), rtol=1e-4)
+    np.testing.assert_allclose(lstm.predict(series[0], 10), loop[0], rtol=1e-4)
+    print(f"16 series x 10 steps: roll loop {loop_seconds:.2f}s, batched {batched_seconds:.3f}s")
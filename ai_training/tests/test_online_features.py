@@ -0,0 +1,57 @@
+"""
+Parity of the online feature pipeline with the batch feature pipeline.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from feature_engineering import build_features  # noqa: E402
+from online_features import OnlineFeatures  # noqa: E402
+
+
+def sample_bars(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    open_ = close * (1 + rng.normal(0, 0.005, rows))
+    df = pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, rows)),
+        'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, rows)),
+        'Close': close,
+        'Volume': rng.lognormal(16, 0.5, rows).round(),
+    }, index=pd.date_range('2020-01-01', periods=rows, freq='B'))
+    # A stretch of unchanged volume exercises the flat-window rules
+    df.iloc[300:330, df.columns.get_loc('Volume')] = 1_000_000.0
+    return df
+
+
+def test_online_vectors_match_the_batch_pipeline():
+    df = sample_bars(1200)
+    macro = pd.DataFrame({'VIX': np.linspace(12, 30, len(df))}, index=df.index)
+    expected = build_features(df.join(macro)).drop(columns='Close')
+
+    online = OnlineFeatures(['VIX'])
+    assert online.columns == list(expected.columns)
+    rows = {}
+    for date, bar in df.iterrows():
+        vector = online.update(*bar.to_numpy(), extras={'VIX': macro.at[date, 'VIX']})
+        if vector is not None:
+            rows[date] = vector
+    got = pd.DataFrame.from_dict(rows, orient='index', columns=online.columns)
+
+    assert list(got.index) == list(expected.index)
+    np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), rtol=1e-8, atol=1e-8)
+
+
+def test_preview_scores_a_bar_without_adding_it():
+    df = sample_bars(300)
+    online = OnlineFeatures()
+    online.update_frame(df.iloc[:-1])
+    last = df.iloc[-1].to_numpy()
+
+    previewed = online.preview(*last)
+    assert online.bars == len(df) - 1
+    np.testing.assert_array_equal(previewed, online.update(*last))
@@ -0,0 +1,97 @@
+"""
+Parity of panel feature computation with the per-symbol pipeline, and the
+cross-sectional features.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+talib = pytest.importorskip('talib')
+
+from feature_engineering import build_features  # noqa: E402
+import panel_features  # noqa: E402
+from panel_features import Panel, build_panel_features, cross_sectional_rank, cross_sectional_zscore  # noqa: E402
+from test_online_features import sample_bars  # noqa: E402
+
+
+def universe():
+    frames = {}
+    for i in range(5):
+        # Listed on different days, some with missing bars
+        df = sample_bars(700, seed=i).iloc[i * 40:]
+        if i % 2:
+            df = df.drop(df.index[100:104])
+        df['VIX'] = np.linspace(12, 30, len(df))
+        frames[f'S{i}'] = df
+    return frames
+
+
+def test_panel_matches_the_per_symbol_pipeline():
+    frames = universe()
+    panel = build_panel_features(frames, chunk_size=2)
+
+    assert list(panel) == list(frames)
+    for symbol, df in frames.items():
+        expected = build_features(df)
+        pd.testing.assert_index_equal(panel[symbol].index, expected.index)
+        assert list(panel[symbol].columns) == list(expected.columns)
+        np.testing.assert_allclose(panel[symbol].to_numpy(), expected.to_numpy(), rtol=1e-8, atol=1e-8)
+
+
+def test_panel_compute_puts_each_symbol_back_on_the_calendar():
+    frames = universe()
+    panel = Panel.from_frames(frames)
+    features = panel.compute(['RSI', 'Close_lag_1'])
+
+    for j, (symbol, df) in enumerate(frames.items()):
+        expected = build_features(df)
+        rows = panel.dates.get_indexer(expected.index)
+        np.testing.assert_allclose(features['RSI'][rows, j], expected['RSI'], rtol=1e-10)
+        assert np.isnan(np.delete(features['Close_lag_1'][:, j], panel.dates.get_indexer(df.index))).all()
+
+
+def test_recursive_kernels_match_talib_over_long_histories():
+    # Long enough for the recurrences to carry across many closed-form chunks
+    bars = [sample_bars(5000, seed=seed) for seed in range(3)]
+    high, low, close = (np.column_stack([df[col].to_numpy() for df in bars]) for col in ('High', 'Low', 'Close'))
+
+    for j in range(len(bars)):
+        h, l, c = high[:, j], low[:, j], close[:, j]
+        np.testing.assert_allclose(panel_features.ema(close, 26)[:, j], talib.EMA(c, 26), rtol=1e-10)
+        np.testing.assert_allclose(panel_features.macd(close)[1][:, j], talib.MACD(c)[1], rtol=1e-10, atol=1e-12)
+        np.testing.assert_allclose(panel_features.rsi(close)[:, j], talib.RSI(c), rtol=1e-10)
+        np.testing.assert_allclose(panel_features.atr(high, low, close)[:, j], talib.ATR(h, l, c), rtol=1e-10)
+        np.testing.assert_allclose(panel_features.adx(high, low, close)[:, j], talib.ADX(h, l, c), rtol=1e-10)
+
+
+def test_cross_sectional_features_compare_symbols_on_the_same_date():
+    frames = universe()
+    panel = build_panel_features(frames, cross_sectional=['RSI'])
+
+    date = panel['S4'].index[0]
+    rsi = pd.Series({symbol: df.at[date, 'RSI'] for symbol, df in panel.items()})
+    ranks = pd.Series({symbol: df.at[date, 'RSI_cs_rank'] for symbol, df in panel.items()})
+    zscores = pd.Series({symbol: df.at[date, 'RSI_cs_zscore'] for symbol, df in panel.items()})
+    pd.testing.assert_series_equal(ranks, rsi.rank(pct=True))
+    pd.testing.assert_series_equal(zscores, (rsi - rsi.mean()) / rsi.std(ddof=0))
+
+
+def test_cross_sectional_helpers_ignore_missing_symbols():
+    values = np.array([[1.0, 3.0, np.nan, 2.0],
+                       [np.nan, np.nan, np.nan, np.nan]])
+
+    np.testing.assert_allclose(cross_sectional_rank(values)[0], [1 / 3, 1.0, np.nan, 2 / 3])
+    np.testing.assert_allclose(cross_sectional_zscore(values)[0], [-np.sqrt(1.5), np.sqrt(1.5), np.nan, 0.0])
+    np.testing.assert_array_equal(cross_sectional_zscore(np.array([[2.0, np.nan, 2.0]])), [[0.0, np.nan, 0.0]])
+    assert np.isnan(cross_sectional_rank(values)[1]).all()
+    assert np.isnan(cross_sectional_zscore(values)[1]).all()
+
+
+def test_cross_sectional_features_of_a_single_symbol_keep_its_rows():
+    df = universe()['S0']
+    panel = build_panel_features({'S0': df}, cross_sectional=['RSI'])
+
+    pd.testing.assert_index_equal(panel['S0'].index, build_features(df).index)
+    assert (panel['S0']['RSI_cs_rank'] == 1.0).all()
+    assert (panel['S0']['RSI_cs_zscore'] == 0.0).all()
@@ -0,0 +1,100 @@
+"""
+The rolling moments engine against pandas' rolling statistics, and against
+moments computed directly from each window for skew and kurtosis (pandas'
+online skew goes NaN for a while after a gap).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+from rolling_moments import STATISTICS, rolling_labels, rolling_mean_std, rolling_moments, rolling_statistics
+
+WINDOWS = [3, 5, 20]
+
+
+def sample_frame(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Close': 100 + rng.normal(0, 1, rows),
+        'Volume': rng.lognormal(16, 0.5, rows),
+    })
+    # A gap, and a flat stretch longer than every window
+    df.iloc[50:53, 0] = np.nan
+    df.iloc[100:130, 1] = 1_000_000.0
+    return df
+
+
+def direct_shape(values, window):
+    """Bias-corrected skew and excess kurtosis of every window, NaN for windows with a gap"""
+    windows = sliding_window_view(values, window)
+    dev = windows - windows.mean(axis=1, keepdims=True)
+    m2, m3, m4 = ((dev ** k).mean(axis=1) for k in (2, 3, 4))
+    w = window
+    # Constant windows have zero skew and the kurtosis of a point mass
+    flat = np.ptp(windows, axis=1) == 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skew = np.where(flat, 0.0, m3 / m2 ** 1.5 * np.sqrt(w * (w - 1)) / (w - 2))
+        kurt = np.full(len(windows), np.nan)
+        if w >= 4:
+            excess = (w + 1) * (w - 1) * m4 / m2 ** 2 - 3 * (w - 1) ** 2
+            kurt = np.where(flat, -3.0, excess / ((w - 2) * (w - 3)))
+    pad = np.full(window - 1, np.nan)
+    return np.concatenate([pad, skew]), np.concatenate([pad, kurt])
+
+
+def expected_moments(series, window):
+    rolling = series.rolling(window)
+    return [rolling.mean(), rolling.std(), rolling.min(), rolling.max(),
+            *direct_shape(series.to_numpy(), window)]
+
+
+def test_rolling_moments_match_pandas():
+    df = sample_frame()
+    values, labels = rolling_moments(df, ['Close', 'Volume', 'Missing'], WINDOWS)
+
+    assert labels == rolling_labels(['Close', 'Volume'], WINDOWS)
+    assert values.shape == (len(df), len(labels))
+    got = pd.DataFrame(values, columns=labels)
+    for column in ['Close', 'Volume']:
+        for window in WINDOWS:
+            for stat, expected in zip(STATISTICS, expected_moments(df[column], window)):
+                label = f'{column}_{stat}_{window}'
+                np.testing.assert_allclose(got[label], expected, rtol=1e-7, atol=1e-7, err_msg=label)
+
+
+def test_panel_statistics_match_each_column():
+    df = sample_frame()
+    panel = df.to_numpy()
+    stats = rolling_statistics(panel, 10)
+
+    assert stats.shape == (len(STATISTICS),) + panel.shape
+    for j in range(panel.shape[1]):
+        np.testing.assert_allclose(stats[:, :, j], rolling_statistics(panel[:, j], 10), rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('window', [1, 2, 5, 20])
+def test_mean_and_std_alone_match_the_full_statistics(window):
+    panel = sample_frame().to_numpy()
+    mean, std = rolling_mean_std(panel, window)
+    stats = rolling_statistics(panel, window)
+
+    np.testing.assert_allclose(mean, stats[0], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(std, stats[1], rtol=1e-9, atol=1e-9)
+    # Constant windows are exactly flat, as in the full statistics
+    assert mean[129, 1] == 1_000_000.0
+    if window > 1:
+        assert std[129, 1] == 0.0
+
+
+def test_create_rolling_features_replaces_existing_columns():
+    pytest.importorskip('talib')
+    from feature_engineering import FeatureEngineer
+
+    df = sample_frame()
+    df['Close_sma_5'] = 0.0
+    result = FeatureEngineer().create_rolling_features(df, ['Close'], [5])
+
+    assert list(result.columns) == ['Close', 'Volume'] + rolling_labels(['Close'], [5])
+    pd.testing.assert_series_equal(result['Close_sma_5'], df['Close'].rolling(5).mean(), check_names=False)
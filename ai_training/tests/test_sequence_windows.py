@@ -0,0 +1,108 @@
+"""
+Training windows as sliding-window views, their tf.data stream, and the
+choice between the eager and the lazy fit.
+"""
+
+import numpy as np
+import pytest
+
+# The trainer module pulls in TensorFlow, scikit-learn and the data clients
+trainer = pytest.importorskip('financial_ai_trainer')
+from financial_ai_trainer import fit_on_windows, sequence_windows, window_dataset  # noqa: E402
+
+
+def appended_sequences(data, sequence_length, target_column=None):
+    """The list-append windows ``prepare_sequences`` used to build"""
+    X, y = [], []
+    for i in range(sequence_length, len(data)):
+        X.append(data[i - sequence_length:i])
+        y.append(data[i] if target_column is None else data[i, target_column])
+    return np.array(X), np.array(y)
+
+
+def series(rows=50, features=None, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=rows if features is None else (rows, features))
+
+
+def test_one_dimensional_windows_match_the_appended_sequences():
+    data = series()
+    X, y = sequence_windows(data, 10)
+    expected_X, expected_y = appended_sequences(data, 10)
+
+    assert X.shape == (40, 10)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+@pytest.mark.parametrize('target_column', [0, 2])
+def test_multi_feature_windows_match_the_appended_sequences(target_column):
+    data = series(features=3)
+    X, y = sequence_windows(data, 10, target_column)
+    expected_X, expected_y = appended_sequences(data, 10, target_column)
+
+    assert X.shape == (40, 10, 3)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_windows_are_read_only_views_of_the_data():
+    data = series(features=3)
+    X, y = sequence_windows(data, 10, 1)
+
+    assert np.shares_memory(X, data) and np.shares_memory(y, data)
+    assert not X.flags.writeable
+
+
+@pytest.mark.parametrize('rows', [0, 5, 10])
+def test_series_no_longer_than_the_window_give_no_samples(rows):
+    X, y = sequence_windows(series(rows), 10)
+    assert X.shape == (0, 10) and y.shape == (0,)
+
+    X, y = sequence_windows(series(rows, features=3), 10)
+    assert X.shape == (0, 10, 3) and y.shape == (0,)
+
+
+@pytest.mark.parametrize('features,target_column', [(None, 0), (3, 2)])
+def test_dataset_range_yields_the_eager_samples(features, target_column):
+    data = series(features=features)
+    X, y = sequence_windows(data, 10, target_column)
+    dataset = window_dataset(data, 10, batch_size=7, target_column=target_column, start=5, stop=33)
+
+    batches = list(dataset.as_numpy_iterator())
+    streamed_X = np.concatenate([batch for batch, _ in batches])
+    streamed_y = np.concatenate([targets for _, targets in batches])
+    assert [len(batch) for batch, _ in batches] == [7, 7, 7, 7]
+    np.testing.assert_allclose(streamed_X, X[5:33].reshape(28, 10, -1).astype(np.float32))
+    np.testing.assert_allclose(streamed_y, y[5:33].astype(np.float32))
+
+
+def test_shuffled_dataset_keeps_every_sample_once():
+    data = np.arange(60, dtype=float)
+    dataset = window_dataset(data, 10, batch_size=8, shuffle=True, stop=40, seed=1)
+
+    targets = np.concatenate([y for _, y in dataset.as_numpy_iterator()])
+    assert sorted(targets) == list(range(10, 50))
+    assert list(targets) != sorted(targets)
+
+
+class RecordingModel:
+    def fit(self, X, y=None, **kwargs):
+        self.X = X
+        return kwargs
+
+
+def test_fit_streams_windows_once_they_exceed_the_eager_limit(monkeypatch):
+    import tensorflow as tf
+
+    data = series(200)
+    model = RecordingModel()
+    fit_on_windows(model, data, 10, epochs=1, validation_split=0.2, callbacks=[])
+    assert isinstance(model.X, np.ndarray) and model.X.shape == (190, 10, 1)
+
+    monkeypatch.setattr(trainer, 'EAGER_WINDOW_LIMIT', 190 * 10 * 4 - 1)
+    fit_on_windows(model, data, 10, epochs=1, validation_split=0.2, callbacks=[])
+    assert isinstance(model.X, tf.data.Dataset)
+
+    fit_on_windows(model, data, 10, epochs=1, validation_split=0.2, callbacks=[], lazy=False)
+    assert isinstance(model.X, np.ndarray)
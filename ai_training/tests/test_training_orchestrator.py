@@ -0,0 +1,72 @@
+"""
+Scheduling, checkpointing and resuming of the training orchestrator.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import training_orchestrator
+from training_orchestrator import TrainingOrchestrator, estimate_job_memory
+
+
+def record_job(symbol, df, checkpoint_dir, threads):
+    """A training job that only reports what it was given, and when it ran"""
+    start = time.time()
+    time.sleep(0.3)
+    return {'rows': len(df), 'threads': threads, 'start': start, 'end': time.time(),
+            'omp_threads': os.environ.get('OMP_NUM_THREADS')}
+
+
+def frames(*symbols, rows=100):
+    return {symbol: pd.DataFrame({'Close': np.arange(rows, dtype=float)}) for symbol in symbols}
+
+
+def test_resume_skips_symbols_with_a_done_marker(tmp_path):
+    with open(tmp_path / 'AAPL.done.json', 'w') as f:
+        json.dump({'rows': -1}, f)
+
+    results = TrainingOrchestrator(record_job, str(tmp_path), cpu_budget=1).run(frames('AAPL', 'MSFT'))
+
+    assert list(results) == ['AAPL', 'MSFT']
+    assert results['AAPL'] == {'rows': -1}
+    assert results['MSFT']['rows'] == 100
+    with open(tmp_path / 'MSFT.done.json') as f:
+        assert json.load(f) == results['MSFT']
+
+
+def test_finished_run_returns_checkpoints_without_training(tmp_path):
+    data = frames('AAPL', 'MSFT')
+    first = TrainingOrchestrator(record_job, str(tmp_path), cpu_budget=1).run(data)
+    # A job that cannot be pickled would fail if anything were submitted
+    again = TrainingOrchestrator(lambda *args: None, str(tmp_path), cpu_budget=1).run(data)
+
+    assert again == first
+
+
+def test_workers_get_their_thread_cap_and_the_parent_keeps_its_own(tmp_path):
+    before = os.environ.get('OMP_NUM_THREADS')
+    results = TrainingOrchestrator(record_job, str(tmp_path), cpu_budget=2, threads_per_job=2).run(frames('AAPL'))
+
+    assert results['AAPL']['threads'] == 2
+    assert results['AAPL']['omp_threads'] == '2'
+    assert os.environ.get('OMP_NUM_THREADS') == before
+
+
+def test_jobs_over_the_memory_budget_wait_for_running_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(training_orchestrator, 'available_memory', lambda: None)
+    data = frames('AAPL', 'MSFT')
+    orchestrator = TrainingOrchestrator(record_job, str(tmp_path), cpu_budget=2, threads_per_job=1,
+                                        memory_budget=estimate_job_memory(data['AAPL']) * 3 // 2)
+
+    # Admission: the first job always runs, the second does not fit beside it
+    assert orchestrator._admit(data['MSFT'], {}, orchestrator.memory_budget)
+    running = {'future': ('AAPL', estimate_job_memory(data['AAPL']))}
+    assert not orchestrator._admit(data['MSFT'], running, orchestrator.memory_budget)
+
+    results = orchestrator.run(data)
+    first, second = sorted(results.values(), key=lambda result: result['start'])
+    assert second['start'] >= first['end']
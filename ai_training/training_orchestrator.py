@@ -0,0 +1,187 @@
+"""
+Parallel Training Orchestrator
+=====================================
+
+Runs one training job per symbol across a process pool under two budgets:
+
+- CPU: ``cpu_budget`` cores are split into ``processes`` workers of
+  ``threads_per_job`` threads each. The job receives its thread count to
+  pass to the tree models' ``n_jobs``, and the BLAS/OpenMP/TensorFlow
+  thread pools of each worker are capped to it through the environment the
+  workers are spawned with, so the workers together never use more threads
+  than the budget allows.
+- Memory: each job's peak is estimated from the size of its data. A job
+  is only started while the estimates of the running jobs plus its own fit
+  in ``memory_budget`` and the machine still reports that much available.
+  One job always runs, so a single large symbol cannot stall the run.
+
+A finished symbol is checkpointed with a ``{SYMBOL}.done.json`` marker,
+holding its results, after its job has written its artifacts. An
+interrupted run started again with the same checkpoint directory skips
+the symbols already done.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Rough peak memory of one job: interpreter, TensorFlow and the models,
+# plus feature copies and training windows as a multiple of the raw data
+JOB_BASE_MEMORY = 600 * 1024 * 1024
+DATA_MEMORY_FACTOR = 40
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS')
+
+
+def available_memory() -> Optional[int]:
+    """Bytes the kernel reports as available, or None where that is unknown"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def estimate_job_memory(df: pd.DataFrame) -> int:
+    """Estimated peak bytes of training one symbol on ``df``"""
+    return JOB_BASE_MEMORY + int(df.memory_usage(deep=True).sum()) * DATA_MEMORY_FACTOR
+
+
+@contextmanager
+def thread_limits(threads: int):
+    """Thread caps in this process's environment, restored on exit
+
+    Spawned workers inherit the environment they start with, and each
+    re-imports the trainer (numpy, TensorFlow) before running any code of
+    its own, so the caps must already be set in the parent.
+    """
+    limits = {name: str(threads) for name in THREAD_ENV_VARS}
+    limits['TF_NUM_INTEROP_THREADS'] = '1'
+    saved = {name: os.environ.get(name) for name in limits}
+    os.environ.update(limits)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+class TrainingOrchestrator:
+    """Schedule per-symbol training jobs under a CPU and memory budget
+
+    ``job(symbol, df, checkpoint_dir, threads)`` trains one symbol, writes
+    its artifacts into ``checkpoint_dir`` and returns a JSON-serialisable
+    results dict (or None to skip the symbol). It must be a module-level
+    function so worker processes can import it.
+    """
+
+    def __init__(self, job: Callable[[str, pd.DataFrame, str, int], Optional[Dict]], checkpoint_dir: str,
+                 cpu_budget: Optional[int] = None, threads_per_job: Optional[int] = None,
+                 memory_budget: Optional[int] = None):
+        self.job = job
+        self.checkpoint_dir = checkpoint_dir
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        self.threads_per_job = threads_per_job
+        self.memory_budget = memory_budget
+
+    def done_path(self, symbol: str) -> str:
+        return os.path.join(self.checkpoint_dir, f'{symbol}.done.json')
+
+    def completed(self) -> Dict[str, Dict]:
+        """Results of every symbol checkpointed so far"""
+        results = {}
+        if not os.path.isdir(self.checkpoint_dir):
+            return results
+        for name in os.listdir(self.checkpoint_dir):
+            if name.endswith('.done.json'):
+                with open(os.path.join(self.checkpoint_dir, name)) as f:
+                    results[name[:-len('.done.json')]] = json.load(f)
+        return results
+
+    def plan(self, jobs: int):
+        """(processes, threads per job) for ``jobs`` pending symbols"""
+        threads = self.threads_per_job or max(1, self.cpu_budget // max(1, min(jobs, self.cpu_budget)))
+        threads = min(threads, self.cpu_budget)
+        return max(1, self.cpu_budget // threads), threads
+
+    def run(self, data: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """Train every symbol not yet checkpointed; returns all checkpointed results"""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        done = self.completed()
+        pending = [symbol for symbol in data if symbol not in done]
+        if done:
+            logger.info(f"Resuming: {len(done)} symbols already trained, {len(pending)} to go")
+        if not pending:
+            return {symbol: done[symbol] for symbol in data if symbol in done}
+
+        processes, threads = self.plan(len(pending))
+        memory_budget = self.memory_budget
+        if memory_budget is None:
+            available = available_memory()
+            memory_budget = int(available * 0.8) if available else None
+        logger.info(f"Training {len(pending)} symbols on {processes} processes x {threads} threads")
+
+        # Spawned workers start clean: no forked TensorFlow state, and they
+        # inherit the thread limits before importing anything. Workers are
+        # spawned on demand, so the limits stay set while the pool runs
+        context = multiprocessing.get_context('spawn')
+        running = {}  # future -> (symbol, estimated bytes)
+        started = time.perf_counter()
+        with thread_limits(threads), ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            while pending or running:
+                while pending and len(running) < processes and self._admit(data[pending[0]], running, memory_budget):
+                    symbol = pending.pop(0)
+                    future = pool.submit(self.job, symbol, data[symbol], self.checkpoint_dir, threads)
+                    running[future] = (symbol, estimate_job_memory(data[symbol]))
+                finished, _ = wait(running, timeout=5, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    symbol, _ = running.pop(future)
+                    self._checkpoint(symbol, future, done)
+        logger.info(f"Training finished in {time.perf_counter() - started:.1f}s: "
+                    f"{sum(symbol in done for symbol in data)} of {len(data)} symbols done")
+        return {symbol: done[symbol] for symbol in data if symbol in done}
+
+    def _admit(self, df: pd.DataFrame, running: Dict, memory_budget: Optional[int]) -> bool:
+        if not running:
+            return True
+        needed = estimate_job_memory(df)
+        if memory_budget is not None and sum(size for _, size in running.values()) + needed > memory_budget:
+            return False
+        # Estimates are rough; also respect what the machine has left right now
+        available = available_memory()
+        return available is None or available >= needed
+
+    def _checkpoint(self, symbol: str, future, done: Dict[str, Dict]):
+        try:
+            results = future.result()
+        except BrokenProcessPool:
+            # A worker died (often killed for memory); finished symbols stay checkpointed
+            logger.error(f"Worker process died while training {symbol}; rerun to resume")
+            raise
+        except Exception as e:
+            logger.error(f"Training failed for {symbol}: {e}")
+            return
+        if results is None:
+            return
+        path = self.done_path(symbol)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(results, f, default=str)
+        os.replace(path + '.tmp', path)
+        done[symbol] = json.loads(json.dumps(results, default=str))
+        logger.info(f"Checkpointed {symbol} ({len(done)} done)")
@@ -29,3 +29,35 @@ class Config:
     # Application Configuration
     FRONTEND_URL = os.environ.get('FRONTEND_URL') or 'http://localhost:3000'
     BACKEND_URL = os.environ.get('BACKEND_URL') or 'http://localhost:5000'
+    
+    # Script Worker Pool Configuration
+    SCRIPT_POOL_ENABLED = os.environ.get('SCRIPT_POOL_ENABLED', 'true').lower() in ['true', 'on', '1']
+    SCRIPT_POOL_FALLBACK = os.environ.get('SCRIPT_POOL_FALLBACK', 'true').lower() in ['true', 'on', '1']
+    SCRIPT_POOL_SIZE = int(os.environ.get('SCRIPT_POOL_SIZE') or 2)
+    SCRIPT_POOL_MAX_JOBS = int(os.environ.get('SCRIPT_POOL_MAX_JOBS') or 100)  # Recycle workers after N jobs
+    SCRIPT_JOB_TIMEOUT = int(os.environ.get('SCRIPT_JOB_TIMEOUT') or 30)  # Seconds
+    
+    # Analysis Job Queue Configuration
+    JOB_STORE_URL = os.environ.get('JOB_STORE_URL') or 'memory'  # 'memory' or 'sqlite:///path/to/jobs.db'
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS') or 4)
+    JOB_QUEUE_MAX_PENDING = int(os.environ.get('JOB_QUEUE_MAX_PENDING') or 100)
+    JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL') or 600)  # Seconds
+    
+    # Batch Historical Data Configuration
+    BATCH_MAX_SYMBOLS = int(os.environ.get('BATCH_MAX_SYMBOLS') or 50)
+    BATCH_FETCH_WORKERS = int(os.environ.get('BATCH_FETCH_WORKERS') or 4)  # Capped at SCRIPT_POOL_SIZE
+    
+    # ICT Universe Scanner Configuration
+    ICT_SCAN_MAX_SYMBOLS = int(os.environ.get('ICT_SCAN_MAX_SYMBOLS') or 500)
+    ICT_SCAN_TIMEOUT = int(os.environ.get('ICT_SCAN_TIMEOUT') or 300)  # Seconds
+    ICT_SCAN_SCHEDULE = [i.strip() for i in os.environ.get('ICT_SCAN_SCHEDULE', '').split(',') if i.strip()]  # Intervals, e.g. '1d,1h'; empty disables
+    ICT_SCAN_PRESETS = [p.strip() for p in (os.environ.get('ICT_SCAN_PRESETS') or 'bullish_fvg_near_price,bearish_fvg_near_price,bullish_choch,bearish_choch').split(',') if p.strip()]
+    ICT_SCAN_POLL_SECONDS = int(os.environ.get('ICT_SCAN_POLL_SECONDS') or 60)
+    
+    # LSTM Model Server Configuration
+    MODEL_SERVER_ENABLED = os.environ.get('MODEL_SERVER_ENABLED', 'true').lower() in ['true', 'on', '1']  # Also needs TensorFlow
+    MODEL_DIR = os.environ.get('MODEL_DIR')  # Exported models; defaults to trained_models/ in the backend directory
+    AI_TRAINING_DIR = os.environ.get('AI_TRAINING_DIR')  # Defaults to ai_training/ in the backend directory
+    MODEL_SERVER_MEMORY_MB = int(os.environ.get('MODEL_SERVER_MEMORY_MB') or 512)  # Weights kept warm before LRU eviction
+    MODEL_BATCH_MAX_SIZE = int(os.environ.get('MODEL_BATCH_MAX_SIZE') or 64)
+    MODEL_BATCH_MAX_WAIT_MS = float(os.environ.get('MODEL_BATCH_MAX_WAIT_MS') or 5)
@@ -12,25 +12,51 @@ from src.config import Config
 from src.models.auth_user import db
 from src.routes.user import user_bp
 from src.routes.auth import auth_bp, mail
+from src.services.script_pool import script_pool
+from src.services.job_queue import job_queue
+from src.services.scan_scheduler import scan_scheduler
+from src.services.model_server import model_server
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config.from_object(Config)
 
+
+def is_reloader_parent():
+    """Whether this process is the debug reloader's file watcher, which never serves requests."""
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        return False
+    # `python main.py` runs with the reloader below; `flask run --debug` reloads too
+    from_cli = os.environ.get('FLASK_RUN_FROM_CLI') == 'true' and app.debug and '--no-reload' not in sys.argv
+    return __name__ == '__main__' or from_cli
+
+
+# Worker processes and background threads start only in the serving process,
+# not also in the watcher that restarts it
+serving = not is_reloader_parent()
+
 # Initialize extensions
 db.init_app(app)
 jwt = JWTManager(app)
 mail.init_app(app)
+if serving:
+    script_pool.init_app(app)
+job_queue.init_app(app)
+model_server.init_app(app)
 CORS(app, origins=["*"])  # Allow all origins for development
 
 # Register blueprints BEFORE catch-all routes
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 
-from src.routes.trading import trading_bp
+from src.routes.trading import trading_bp, run_script_job
 from src.routes.ai_agents import ai_agents_bp
 app.register_blueprint(trading_bp, url_prefix='/api/trading')
 app.register_blueprint(ai_agents_bp, url_prefix='/api/ai')
 
+# Scheduled scans run worker jobs the same way the trading routes do
+if serving:
+    scan_scheduler.init_app(app, run_script_job)
+
 # Create database tables
 with app.app_context():
     db.create_all()
@@ -1,5 +1,6 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import subprocess
 import json
 import os
@@ -7,38 +8,102 @@ import sys
 from datetime import datetime
 
 from src.models.auth_user import db, User, Asset, Portfolio, Trade
+from src.services.script_pool import script_pool, WorkerUnavailable, WorkerTimeout
+from src.services.script_ipc import encode_frame, decode_frame, JSON_MIMETYPE, MSGPACK_MIMETYPE
+from src.services.single_flight import single_flight
+from src.services.scan_scheduler import scan_scheduler
+from src.services.model_server import model_server, ModelUnavailable
+from src.services.job_queue import job_queue, job_key, JobFailed, QueueFull, FINISHED_STATUSES, STATUS_FAILED
 
 trading_bp = Blueprint('trading', __name__)
 
-def run_python_script(script_path, *args):
-    """Run a Python script and return the output."""
+# Analysis endpoints that can also run as background jobs, mapped to worker jobs
+ANALYSIS_JOBS = {
+    'historical-data': 'historical_data',
+    'ict-analysis': 'ict_analysis',
+    'lstm-prediction': 'lstm_prediction'
+}
+
+def run_script_job(job, params, response=None, timeout=None):
+    """Run a structured analysis job and return (success, result).
+
+    Without ``response`` the result is the decoded job output. With it, the
+    worker encodes the HTTP body itself and the result holds the raw ``body``
+    bytes, their ``mimetype`` and any content ``encoding``, ready to be passed
+    straight through. ``timeout`` overrides SCRIPT_JOB_TIMEOUT for long jobs.
+    """
+    message = {'job': job, 'params': params}
+    if response is not None:
+        message['response'] = response
+
     try:
-        # Get the virtual environment Python path
-        venv_python = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'scripts_venv', 'bin', 'python')
-        
-        # Prepare command
-        cmd = [venv_python, script_path] + list(args)
+        reply = script_pool.submit(message, timeout=timeout)
+    except WorkerTimeout:
+        return False, "Script execution timed out"
+    except WorkerUnavailable as e:
+        if script_pool.enabled and not script_pool.fallback:
+            current_app.logger.error(f"Script worker pool unavailable: {str(e)}")
+            return False, str(e)
+        reply = run_worker_subprocess(message, timeout=timeout)
+    except Exception as e:
+        current_app.logger.error(f"Script worker error: {str(e)}")
+        return False, str(e)
+
+    if not reply.get('ok'):
+        return False, reply.get('error', 'Unknown error')
+    return True, reply if response is not None else reply.get('result')
+
+def run_worker_subprocess(message, timeout=None):
+    """Serve a single framed job from a one-off worker process."""
+    try:
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        venv_python = os.path.join(base_dir, 'scripts_venv', 'bin', 'python')
         
-        # Run the script
         result = subprocess.run(
-            cmd,
+            [venv_python, os.path.join('scripts', 'script_worker.py'), '--once'],
+            input=encode_frame(message),
             capture_output=True,
-            text=True,
-            timeout=30,
-            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+            timeout=timeout or current_app.config.get('SCRIPT_JOB_TIMEOUT', 30),
+            cwd=base_dir
         )
         
-        if result.returncode == 0:
-            return True, result.stdout.strip()
-        else:
-            current_app.logger.error(f"Script error: {result.stderr}")
-            return False, result.stderr.strip()
-            
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace').strip()
+            current_app.logger.error(f"Script error: {stderr}")
+            return {'ok': False, 'error': stderr}
+        return decode_frame(result.stdout)
+        
     except subprocess.TimeoutExpired:
-        return False, "Script execution timed out"
+        return {'ok': False, 'error': "Script execution timed out"}
     except Exception as e:
         current_app.logger.error(f"Script execution error: {str(e)}")
-        return False, str(e)
+        return {'ok': False, 'error': str(e)}
+
+def job_response(job, params, envelope, key, error_prefix, compress=False, timeout=None):
+    """Run a job, coalescing identical concurrent requests, and pass the
+    worker-encoded body straight to the client.
+
+    With ``compress`` the worker also compresses the body with brotli or gzip
+    when the client's Accept-Encoding allows it.
+    """
+    mimetype = request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) or JSON_MIMETYPE
+    response = {'envelope': envelope, 'key': key, 'mimetype': mimetype}
+    if compress:
+        response['encodings'] = [e for e in ('br', 'gzip') if request.accept_encodings.quality(e) > 0]
+    
+    # Concurrent identical requests share one worker call and its encoded body
+    flight_key = job_key(job, {'params': params, 'response': response})
+    success, result = single_flight.do(flight_key, lambda: run_script_job(job, params, response=response, timeout=timeout))
+    
+    if not success:
+        return jsonify({'error': f'{error_prefix}: {result}'}), 500
+    
+    reply = Response(result['body'], status=200, mimetype=result['mimetype'])
+    if compress:
+        reply.vary.add('Accept-Encoding')
+        if result.get('encoding'):
+            reply.content_encoding = result['encoding']
+    return reply
 
 @trading_bp.route('/historical-data', methods=['POST'])
 @jwt_required()
@@ -52,31 +117,101 @@ def fetch_historical_data():
         
         symbol = data.get('symbol', '').strip().upper()
         period = data.get('period', '1y')
+        interval = data.get('interval', '1d')
+        data_format = data.get('format', 'records')
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        # Run the Python script to fetch historical data
-        script_path = os.path.join('scripts', 'fetch_stock_data.py')
-        success, output = run_python_script(script_path, symbol, period)
-        
-        if not success:
-            return jsonify({'error': f'Failed to fetch data: {output}'}), 500
+        if data_format not in ['records', 'columns']:
+            return jsonify({'error': 'Invalid format'}), 400
         
-        try:
-            historical_data = json.loads(output)
-            return jsonify({
-                'symbol': symbol,
-                'period': period,
-                'data': historical_data
-            }), 200
-        except json.JSONDecodeError:
-            return jsonify({'error': 'Invalid response from data service'}), 500
+        # Fetch the bars in a script worker; the worker encodes the response body
+        return job_response(
+            'historical_data',
+            {'symbol': symbol, 'interval': interval, 'range': period, 'format': data_format},
+            {'symbol': symbol, 'period': period},
+            'data',
+            'Failed to fetch data'
+        )
         
     except Exception as e:
         current_app.logger.error(f"Historical data error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+def stream_symbol_jobs(job, params_by_symbol, max_workers):
+    """Run one job per symbol concurrently and yield an NDJSON line per
+    symbol as soon as it finishes; failures are reported inline."""
+    app = current_app._get_current_object()
+    
+    def run(symbol, params):
+        with app.app_context():
+            flight_key = job_key(job, {'params': params})
+            return single_flight.do(flight_key, lambda: run_script_job(job, params))
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-job')
+    try:
+        futures = {executor.submit(run, symbol, params): symbol for symbol, params in params_by_symbol.items()}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                success, result = future.result()
+            except Exception as e:
+                success, result = False, str(e)
+            line = {'symbol': symbol, 'data': result} if success else {'symbol': symbol, 'error': result}
+            yield json.dumps(line, separators=(',', ':')) + '\n'
+    finally:
+        # Stop queued symbols if the client goes away mid-stream
+        executor.shutdown(wait=False, cancel_futures=True)
+
+@trading_bp.route('/historical-data/batch', methods=['POST'])
+@jwt_required()
+def fetch_historical_data_batch():
+    """Fetch historical data for several symbols, streamed as NDJSON."""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        symbols = data.get('symbols')
+        period = data.get('period', '1y')
+        interval = data.get('interval', '1d')
+        data_format = data.get('format', 'records')
+        
+        if not isinstance(symbols, list) or not symbols:
+            return jsonify({'error': 'Symbols are required'}), 400
+        
+        symbols = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+        max_symbols = current_app.config.get('BATCH_MAX_SYMBOLS', 50)
+        if not symbols:
+            return jsonify({'error': 'Symbols are required'}), 400
+        if len(symbols) > max_symbols:
+            return jsonify({'error': f'At most {max_symbols} symbols per batch'}), 400
+        
+        if data_format not in ['records', 'columns']:
+            return jsonify({'error': 'Invalid format'}), 400
+        
+        params_by_symbol = {
+            symbol: {'symbol': symbol, 'interval': interval, 'range': period, 'format': data_format}
+            for symbol in symbols
+        }
+        
+        # More concurrent jobs than warm workers would only queue on the pool
+        max_workers = current_app.config.get('BATCH_FETCH_WORKERS', 4)
+        if script_pool.enabled:
+            max_workers = min(max_workers, script_pool.size)
+        
+        return Response(
+            stream_with_context(stream_symbol_jobs('historical_data', params_by_symbol, max(1, max_workers))),
+            status=200,
+            mimetype='application/x-ndjson'
+        )
+        
+    except Exception as e:
+        current_app.logger.error(f"Historical data batch error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @trading_bp.route('/ict-analysis', methods=['POST'])
 @jwt_required()
 def ict_analysis():
@@ -89,31 +224,159 @@ def ict_analysis():
         
         symbol = data.get('symbol', '').strip().upper()
         timeframe = data.get('timeframe', '1d')
+        data_format = data.get('format', 'records')
+        since = data.get('since')
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        # Run the Python script for ICT analysis
-        script_path = os.path.join('scripts', 'run_ict_analysis.py')
-        success, output = run_python_script(script_path, symbol, timeframe)
-        
-        if not success:
-            return jsonify({'error': f'ICT analysis failed: {output}'}), 500
-        
-        try:
-            analysis_result = json.loads(output)
-            return jsonify({
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'analysis': analysis_result
-            }), 200
-        except json.JSONDecodeError:
-            return jsonify({'error': 'Invalid response from ICT analysis service'}), 500
+        if data_format not in ['records', 'columns']:
+            return jsonify({'error': 'Invalid format'}), 400
+        
+        if since is not None and (isinstance(since, bool) or not isinstance(since, int)):
+            return jsonify({'error': 'since must be a cursor from an earlier response'}), 400
+        
+        params = {'symbol': symbol, 'timeframe': timeframe}
+        if data_format == 'columns':
+            params.update(format='columns', delta=bool(data.get('delta')))
+        if since is not None:
+            params['since'] = since
+        
+        # Run the ICT analysis in a script worker, which also compresses the body
+        return job_response(
+            'ict_analysis',
+            params,
+            {'symbol': symbol, 'timeframe': timeframe},
+            'analysis',
+            'ICT analysis failed',
+            compress=True
+        )
         
     except Exception as e:
         current_app.logger.error(f"ICT analysis error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@trading_bp.route('/ict-analysis/updates', methods=['POST'])
+@jwt_required()
+def ict_analysis_updates():
+    """ICT zones that changed since the client's cursor, from an incremental engine."""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        symbol = data.get('symbol', '').strip().upper()
+        timeframe = data.get('timeframe', '1d')
+        cursor = data.get('cursor')
+
+        if not symbol:
+            return jsonify({'error': 'Symbol is required'}), 400
+
+        # Engines live in the script workers; an unknown cursor returns a full snapshot
+        return job_response(
+            'ict_updates',
+            {'symbol': symbol, 'timeframe': timeframe, 'cursor': cursor},
+            {'symbol': symbol, 'timeframe': timeframe},
+            'updates',
+            'ICT updates failed'
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"ICT updates error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@trading_bp.route('/ict-analysis/multi-timeframe', methods=['POST'])
+@jwt_required()
+def ict_analysis_multi_timeframe():
+    """ICT analysis on several timeframes from one fetch of the finest of them."""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        symbol = data.get('symbol', '').strip().upper()
+        timeframes = data.get('timeframes', ['1m', '5m', '15m', '1h', '1d'])
+        period = data.get('period')
+
+        if not symbol:
+            return jsonify({'error': 'Symbol is required'}), 400
+
+        if not isinstance(timeframes, list) or not timeframes or not all(isinstance(t, str) for t in timeframes):
+            return jsonify({'error': 'Timeframes must be a non-empty list'}), 400
+
+        # One worker fetches the base bars once and resamples them per timeframe
+        return job_response(
+            'ict_multi_timeframe',
+            {'symbol': symbol, 'timeframes': timeframes, 'range': period},
+            {'symbol': symbol},
+            'analysis',
+            'ICT analysis failed',
+            compress=True
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"ICT multi-timeframe error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@trading_bp.route('/ict-scan', methods=['POST'])
+@jwt_required()
+def ict_scan():
+    """Screen a universe of symbols for ICT setups, ranked."""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+
+        symbols = data.get('symbols')
+        preset = data.get('preset')
+        filters = data.get('filters')
+        interval = data.get('interval', '1d')
+        period = data.get('period')
+        limit = data.get('limit', 50)
+
+        if symbols is None:
+            # Default universe: the active assets
+            symbols = scan_scheduler.active_symbols()
+        elif not isinstance(symbols, list):
+            return jsonify({'error': 'Symbols must be a list'}), 400
+
+        symbols = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+        max_symbols = current_app.config.get('ICT_SCAN_MAX_SYMBOLS', 500)
+        if not symbols:
+            return jsonify({'error': 'No symbols to scan'}), 400
+        if len(symbols) > max_symbols:
+            return jsonify({'error': f'At most {max_symbols} symbols per scan'}), 400
+
+        if not preset and not (isinstance(filters, list) and filters):
+            return jsonify({'error': 'A preset or a list of filters is required'}), 400
+
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
+
+        params = {'symbols': symbols, 'interval': interval, 'range': period, 'limit': limit}
+        if preset:
+            params['preset'] = preset
+        else:
+            params['filters'] = filters
+
+        # Scans are cached by the worker until the next bar close
+        return job_response(
+            'ict_scan',
+            params,
+            {'interval': interval},
+            'scan',
+            'ICT scan failed',
+            compress=True,
+            timeout=current_app.config.get('ICT_SCAN_TIMEOUT', 300)
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"ICT scan error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @trading_bp.route('/lstm-prediction', methods=['POST'])
 @jwt_required()
 def lstm_prediction():
@@ -127,28 +390,178 @@ def lstm_prediction():
         symbol = data.get('symbol', '').strip().upper()
         days = data.get('days', 5)
         
+        if not symbol:
+            return jsonify({'error': 'Symbol is required'}), 400
+        if isinstance(days, bool) or not isinstance(days, int) or not 1 <= days <= 365:
+            return jsonify({'error': 'days must be an integer between 1 and 365'}), 400
+        
+        # Serve from the symbol's exported LSTM when there is one
+        if model_server.available(symbol):
+            success, bars = run_script_job(
+                'historical_data',
+                {'symbol': symbol, 'interval': '1d', 'range': '1y', 'format': 'columns'}
+            )
+            if not success:
+                return jsonify({'error': f'LSTM prediction failed: {bars}'}), 500
+            
+            try:
+                predictions, latency = model_server.predict(symbol, bars['close'], days)
+            except (ModelUnavailable, ValueError) as e:
+                # No usable model, or too little history for its window:
+                # the worker's baseline still answers
+                current_app.logger.warning(f"LSTM model cannot serve {symbol}, using script worker: {str(e)}")
+            else:
+                return jsonify({
+                    'symbol': symbol,
+                    'days': days,
+                    'model': 'lstm',
+                    'predictions': predictions,
+                    'latency_ms': latency
+                }), 200
+        
+        # Otherwise run the baseline prediction in a script worker
+        return job_response(
+            'lstm_prediction',
+            {'symbol': symbol, 'days': days},
+            {'symbol': symbol, 'days': days},
+            'predictions',
+            'LSTM prediction failed'
+        )
+        
+    except Exception as e:
+        current_app.logger.error(f"LSTM prediction error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def build_job_params(job_type, data, symbol):
+    """Extract the worker job parameters for an analysis job type."""
+    if job_type == 'historical-data':
+        return {
+            'symbol': symbol,
+            'interval': data.get('interval', '1d'),
+            'range': data.get('period', '1y'),
+            'format': data.get('format', 'records')
+        }
+    if job_type == 'ict-analysis':
+        return {'symbol': symbol, 'timeframe': data.get('timeframe', '1d')}
+    return {'symbol': symbol, 'days': data.get('days', 5)}
+
+def job_status(job):
+    """Public view of a job record, without its result."""
+    return {
+        'job_id': job['id'],
+        'type': job['kind'],
+        'params': job['params'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'error': job['error']
+    }
+
+@trading_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def submit_analysis_job():
+    """Queue an analysis job and return its id immediately."""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        job_type = data.get('type', '').strip().lower()
+        symbol = data.get('symbol', '').strip().upper()
+        
+        if job_type not in ANALYSIS_JOBS:
+            return jsonify({'error': f'Invalid job type. Must be one of: {", ".join(ANALYSIS_JOBS)}'}), 400
+        
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
         
-        # Run the Python script for LSTM prediction
-        script_path = os.path.join('scripts', 'run_lstm_model.py')
-        success, output = run_python_script(script_path, symbol, str(days))
+        params = build_job_params(job_type, data, symbol)
+        worker_job = ANALYSIS_JOBS[job_type]
+        app = current_app._get_current_object()
         
-        if not success:
-            return jsonify({'error': f'LSTM prediction failed: {output}'}), 500
+        def work():
+            with app.app_context():
+                success, result = run_script_job(worker_job, params)
+            if not success:
+                raise JobFailed(result)
+            return result
         
         try:
-            prediction_result = json.loads(output)
-            return jsonify({
-                'symbol': symbol,
-                'days': days,
-                'predictions': prediction_result
-            }), 200
-        except json.JSONDecodeError:
-            return jsonify({'error': 'Invalid response from LSTM prediction service'}), 500
+            job, deduplicated = job_queue.submit(job_type, params, work)
+        except QueueFull as e:
+            return jsonify({'error': str(e)}), 503
+        
+        return jsonify({
+            'job_id': job['id'],
+            'status': job['status'],
+            'deduplicated': deduplicated
+        }), 202
         
     except Exception as e:
-        current_app.logger.error(f"LSTM prediction error: {str(e)}")
+        current_app.logger.error(f"Submit job error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@trading_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_analysis_job(job_id):
+    """Get the status of an analysis job."""
+    try:
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(job_status(job)), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get job error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@trading_bp.route('/jobs/<job_id>/result', methods=['GET'])
+@jwt_required()
+def get_analysis_job_result(job_id):
+    """Get the result of a finished analysis job."""
+    try:
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        if job['status'] not in FINISHED_STATUSES:
+            return jsonify(job_status(job)), 202
+        
+        if job['status'] == STATUS_FAILED:
+            return jsonify({'job_id': job['id'], 'error': job['error']}), 500
+        
+        return jsonify({
+            'job_id': job['id'],
+            'type': job['kind'],
+            'params': job['params'],
+            'result': job['result']
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Get job result error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@trading_bp.route('/coalescing-stats', methods=['GET'])
+@jwt_required()
+def coalescing_stats():
+    """Get counters for executed and coalesced analysis requests."""
+    try:
+        return jsonify(single_flight.stats()), 200
+    except Exception as e:
+        current_app.logger.error(f"Coalescing stats error: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@trading_bp.route('/model-server-stats', methods=['GET'])
+@jwt_required()
+def model_server_stats():
+    """Get the warm LSTM models, their memory and micro-batching counters."""
+    try:
+        return jsonify(model_server.stats()), 200
+    except Exception as e:
+        current_app.logger.error(f"Model server stats error: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
 @trading_bp.route('/chart-analysis', methods=['POST'])
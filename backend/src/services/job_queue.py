@@ -0,0 +1,222 @@
+"""
+Analysis Job Queue
+
+Runs long analysis jobs on a bounded thread pool so API requests can return
+a job id immediately and poll for the result. Job state and results are kept
+in a TTL store (in memory, or SQLite when they should survive a restart),
+and identical in-flight jobs are deduplicated onto a single execution.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+
+class QueueFull(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs."""
+
+
+class JobFailed(Exception):
+    """Raised by a job function to fail the job with a clean error message."""
+
+
+def job_key(kind: str, params: Dict[str, Any]) -> str:
+    """Build the deduplication key for a job from its kind and parameters."""
+    encoded = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return f"{kind}:{hashlib.sha256(encoded.encode('utf-8')).hexdigest()}"
+
+
+class MemoryJobStore:
+    """Job store kept in process memory."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict[str, Any]):
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.get('expires_at') and job['expires_at'] <= time.time():
+                del self._jobs[job_id]
+                return None
+            return dict(job)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.get('expires_at') and job['expires_at'] <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore:
+    """Job store backed by a local SQLite database."""
+
+    def __init__(self, path: str = ':memory:'):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS analysis_jobs ('
+                'id TEXT PRIMARY KEY, expires_at REAL, data TEXT NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_analysis_jobs_expires_at ON analysis_jobs (expires_at)'
+            )
+
+    def save(self, job: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO analysis_jobs (id, expires_at, data) VALUES (?, ?, ?)',
+                (job['id'], job.get('expires_at'), json.dumps(job, default=str))
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM analysis_jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)',
+                (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM analysis_jobs WHERE expires_at IS NOT NULL AND expires_at <= ?',
+                (time.time(),)
+            )
+        return cursor.rowcount
+
+
+def create_job_store(url: str):
+    """Create a job store from a URL: ``memory`` or ``sqlite:///path/to.db``."""
+    if not url or url == 'memory':
+        return MemoryJobStore()
+    if url.startswith('sqlite://'):
+        return SQLiteJobStore(url[len('sqlite:///'):] or ':memory:')
+    raise ValueError(f"Unsupported job store: {url}")
+
+
+class JobQueue:
+    """Bounded executor for analysis jobs with deduplication and a TTL result store."""
+
+    def __init__(self, store=None, max_workers: int = 4, max_pending: int = 100, result_ttl: int = 600):
+        self.store = store or MemoryJobStore()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[str, str] = {}  # dedup key -> job id
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the queue from the Flask config."""
+        config = app.config
+        self.shutdown()
+        self.store = create_job_store(config.get('JOB_STORE_URL', 'memory'))
+        self.max_workers = config.get('JOB_QUEUE_WORKERS', 4)
+        self.max_pending = config.get('JOB_QUEUE_MAX_PENDING', 100)
+        self.result_ttl = config.get('JOB_RESULT_TTL', 600)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis-job')
+        return self._executor
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[[], Any]) -> Tuple[Dict[str, Any], bool]:
+        """Queue a job, or attach to an identical one that is still in flight.
+
+        Returns the job record and whether it was deduplicated.
+        """
+        key = job_key(kind, params)
+        with self._lock:
+            existing_id = self._in_flight.get(key)
+            if existing_id is not None:
+                existing = self.store.get(existing_id)
+                if existing is not None and existing['status'] not in FINISHED_STATUSES:
+                    return existing, True
+
+            if len(self._in_flight) >= self.max_pending:
+                raise QueueFull(f"Job queue is full ({self.max_pending} pending jobs)")
+
+            job = {
+                'id': str(uuid.uuid4()),
+                'kind': kind,
+                'params': params,
+                'status': STATUS_QUEUED,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'expires_at': None,
+                'result': None,
+                'error': None
+            }
+            self.store.save(job)
+            self._in_flight[key] = job['id']
+
+        self._get_executor().submit(self._run, key, dict(job), fn)
+        return job, False
+
+    def _run(self, key: str, job: Dict[str, Any], fn: Callable[[], Any]):
+        job['status'] = STATUS_RUNNING
+        job['started_at'] = time.time()
+        self.store.save(job)
+
+        try:
+            job['result'] = fn()
+            job['status'] = STATUS_SUCCEEDED
+        except JobFailed as e:
+            job['status'] = STATUS_FAILED
+            job['error'] = str(e)
+        except Exception as e:
+            logger.error(f"Analysis job {job['id']} ({job['kind']}) failed: {str(e)}")
+            job['status'] = STATUS_FAILED
+            job['error'] = str(e)
+
+        job['finished_at'] = time.time()
+        job['expires_at'] = job['finished_at'] + self.result_ttl
+        self.store.save(job)
+
+        with self._lock:
+            if self._in_flight.get(key) == job['id']:
+                del self._in_flight[key]
+        self.store.purge_expired()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, or None if it is unknown or has expired."""
+        return self.store.get(job_id)
+
+    def shutdown(self, wait: bool = False):
+        """Stop the executor; queued jobs that have not started are dropped."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        with self._lock:
+            self._in_flight.clear()
+
+
+# Global instance
+job_queue = JobQueue()
@@ -0,0 +1,216 @@
+"""
+LSTM Model Server
+
+Serves forecasts from the LSTM models exported by ai_training inside the
+backend process. A symbol's model is loaded on its first request and then
+stays warm; loaded models are kept in LRU order and the least recently
+used are evicted once their weights exceed the memory budget. Each loaded
+model has a micro-batcher in front of it, so concurrent requests share one
+batched forward pass per forecast step instead of running one each.
+
+TensorFlow is optional. Without it, or without an exported model for a
+symbol, ``available`` is False and the route uses the script worker.
+"""
+
+import atexit
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from src.services.script_pool import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUnavailable(Exception):
+    """Raised when a symbol's model cannot be loaded."""
+
+
+class ServedModel:
+    """A warm model and the micro-batcher feeding it."""
+
+    def __init__(self, symbol: str, model, batcher):
+        self.symbol = symbol
+        self.model = model
+        self.batcher = batcher
+        self.loaded_at = time.time()
+        self.requests = 0
+
+
+class ModelServer:
+    """Lazily loaded, memory-bounded pool of warm LSTM models."""
+
+    def __init__(self):
+        self.enabled = False
+        self.model_dir = ''
+        self.memory_budget = 512 * 1024 * 1024
+        self.max_batch_size = 64
+        self.max_wait = 0.005
+        self.timeout = 30
+
+        self._serving = None  # ai_training modules, imported by init_app
+        self._batching = None
+        self._models: 'OrderedDict[str, ServedModel]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.evictions = 0
+
+    def init_app(self, app):
+        """Configure from the Flask config; disabled when TensorFlow is missing."""
+        config = app.config
+        self.model_dir = config.get('MODEL_DIR') or os.path.join(BASE_DIR, 'trained_models')
+        self.memory_budget = config.get('MODEL_SERVER_MEMORY_MB', 512) * 1024 * 1024
+        self.max_batch_size = config.get('MODEL_BATCH_MAX_SIZE', 64)
+        self.max_wait = config.get('MODEL_BATCH_MAX_WAIT_MS', 5) / 1000
+        self.timeout = config.get('SCRIPT_JOB_TIMEOUT', 30)
+        if not config.get('MODEL_SERVER_ENABLED', True):
+            return
+
+        if importlib.util.find_spec('tensorflow') is None:
+            logger.warning("TensorFlow is not installed; LSTM predictions use the script worker")
+            return
+        code_dir = config.get('AI_TRAINING_DIR') or os.path.join(BASE_DIR, 'ai_training')
+        if code_dir not in sys.path:
+            sys.path.insert(0, code_dir)
+        try:
+            import micro_batching
+            import model_serving
+        except ImportError as e:
+            logger.warning(f"Model serving code unavailable ({e}); LSTM predictions use the script worker")
+            return
+        self._batching = micro_batching
+        self._serving = model_serving
+        self.enabled = True
+        atexit.register(self.shutdown)
+
+    def available(self, symbol: str) -> bool:
+        """Whether ``symbol`` is (or can be) served from an exported model."""
+        if not self.enabled:
+            return False
+        if symbol in self._models:
+            return True
+        return all(os.path.exists(path) for path in self._serving.lstm_artifact_paths(self.model_dir, symbol))
+
+    def predict(self, symbol: str, closes: List[float], steps: int) -> Tuple[List[float], Dict[str, Any]]:
+        """Forecast ``steps`` closes and report where the request's time went.
+
+        Raises ModelUnavailable if the model cannot be loaded and ValueError
+        if ``closes`` is shorter than the model's window.
+        """
+        started = time.perf_counter()
+        served = self._get(symbol)
+        loaded = time.perf_counter()
+        # Checked here so one short series cannot fail the whole batch
+        if len(closes) < served.model.sequence_length:
+            raise ValueError(f"{symbol} model needs {served.model.sequence_length} closes, got {len(closes)}")
+
+        try:
+            future = served.batcher.submit((closes, steps))
+            predictions = future.result(self.timeout)
+        except self._batching.BatcherClosed:
+            # Evicted between lookup and submit
+            served = self._get(symbol)
+            future = served.batcher.submit((closes, steps))
+            predictions = future.result(self.timeout)
+        finished = time.perf_counter()
+        served.requests += 1
+
+        timing = future.timing
+        latency = {
+            'total_ms': round((finished - started) * 1000, 3),
+            'load_ms': round((loaded - started) * 1000, 3),
+            'queue_ms': round(timing.queued * 1000, 3),
+            'inference_ms': round(timing.inference * 1000, 3),
+            'batch_size': timing.batch_size,
+        }
+        return predictions, latency
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded models in LRU order with their memory and batching counters."""
+        with self._lock:
+            models = list(self._models.values())
+        return {
+            'enabled': self.enabled,
+            'memory_bytes': sum(m.model.nbytes for m in models),
+            'memory_budget_bytes': self.memory_budget,
+            'evictions': self.evictions,
+            'models': [{
+                'symbol': m.symbol,
+                'bytes': m.model.nbytes,
+                'requests': m.requests,
+                'loaded_at': m.loaded_at,
+                'batching': m.batcher.stats(),
+            } for m in models],
+        }
+
+    def shutdown(self):
+        with self._lock:
+            models = list(self._models.values())
+            self._models.clear()
+        for served in models:
+            served.batcher.close()
+
+    def _get(self, symbol: str) -> ServedModel:
+        if not self.enabled:
+            raise ModelUnavailable("Model serving is disabled")
+        with self._lock:
+            served = self._models.get(symbol)
+            if served is not None:
+                self._models.move_to_end(symbol)
+                return served
+            load_lock = self._load_locks.setdefault(symbol, threading.Lock())
+
+        # Load outside the pool lock so other symbols keep serving meanwhile;
+        # concurrent first requests for the same symbol wait for one load
+        with load_lock:
+            with self._lock:
+                served = self._models.get(symbol)
+                if served is not None:
+                    self._models.move_to_end(symbol)
+                    return served
+            served = self._load(symbol)
+            with self._lock:
+                self._models[symbol] = served
+                evicted = self._evict()
+        for old in evicted:
+            old.batcher.close()
+        return served
+
+    def _load(self, symbol: str) -> ServedModel:
+        try:
+            model = self._serving.ServedLSTM.load(self.model_dir, symbol)
+        except Exception as e:
+            raise ModelUnavailable(f"Could not load model for {symbol}: {e}")
+        if model is None:
+            raise ModelUnavailable(f"No exported model for {symbol}")
+
+        def handle(requests):
+            # One forecast to the longest horizon, sliced per request
+            forecasts = model.forecast([closes for closes, _ in requests], max(steps for _, steps in requests))
+            return [forecast[:steps].tolist() for forecast, (_, steps) in zip(forecasts, requests)]
+
+        batcher = self._batching.MicroBatcher(handle, self.max_batch_size, self.max_wait,
+                                              name=f'lstm-batcher-{symbol}')
+        logger.info(f"Loaded LSTM model for {symbol} ({model.nbytes / 1024:.0f} KiB)")
+        return ServedModel(symbol, model, batcher)
+
+    def _evict(self) -> List[ServedModel]:
+        """Drop least recently used models over the budget, never the newest."""
+        evicted = []
+        total = sum(m.model.nbytes for m in self._models.values())
+        while total > self.memory_budget and len(self._models) > 1:
+            _, served = self._models.popitem(last=False)
+            total -= served.model.nbytes
+            evicted.append(served)
+            self.evictions += 1
+            logger.info(f"Evicted LSTM model for {served.symbol}")
+        return evicted
+
+
+# Global instance
+model_server = ModelServer()
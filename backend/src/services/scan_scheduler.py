@@ -0,0 +1,88 @@
+"""
+ICT Scan Scheduler
+
+Keeps universe-wide ICT scans warm. A daemon thread periodically submits
+the configured preset scans over the active assets; the script worker
+caches each scan until the next bar close, so a poll between closes is a
+cache hit and the scan itself only reruns once per bar. On-demand requests
+for the same universe and filters are then answered from that cache.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.models.auth_user import Asset
+
+logger = logging.getLogger(__name__)
+
+
+class ScanScheduler:
+    """Background refresher for the preset ICT scans."""
+
+    def __init__(self):
+        self.intervals: List[str] = []
+        self.presets: List[str] = []
+        self.poll_seconds = 60
+        self.timeout = 300
+        self.max_symbols = 500
+
+        self._app = None
+        self._run_job: Optional[Callable[..., Tuple[bool, Any]]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def init_app(self, app, run_job: Callable[..., Tuple[bool, Any]]):
+        """Configure from the Flask config and start polling if any scans are scheduled.
+
+        ``run_job(job, params, timeout=...)`` runs a worker job inside an app
+        context and returns ``(success, result)``.
+        """
+        config = app.config
+        self.intervals = config.get('ICT_SCAN_SCHEDULE', [])
+        self.presets = config.get('ICT_SCAN_PRESETS', [])
+        self.poll_seconds = config.get('ICT_SCAN_POLL_SECONDS', 60)
+        self.timeout = config.get('ICT_SCAN_TIMEOUT', 300)
+        self.max_symbols = config.get('ICT_SCAN_MAX_SYMBOLS', 500)
+        self._app = app
+        self._run_job = run_job
+
+        if self.intervals and self.presets and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='ict-scan-scheduler', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def active_symbols(self) -> List[str]:
+        """The active assets, the default scan universe. Needs an app context."""
+        assets = Asset.query.filter_by(is_active=True).order_by(Asset.symbol).limit(self.max_symbols).all()
+        return [asset.symbol.upper() for asset in assets]
+
+    def run_once(self):
+        """Submit every scheduled scan once."""
+        with self._app.app_context():
+            symbols = self.active_symbols()
+            if not symbols:
+                return
+            for interval in self.intervals:
+                for preset in self.presets:
+                    params = {'symbols': symbols, 'interval': interval, 'preset': preset}
+                    success, result = self._run_job('ict_scan', params, timeout=self.timeout)
+                    if not success:
+                        logger.warning(f"Scheduled ICT scan {preset} ({interval}) failed: {result}")
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"ICT scan scheduler error: {e}")
+            if self._stop.wait(self.poll_seconds):
+                return
+
+    def shutdown(self):
+        self._stop.set()
+
+
+# Global instance
+scan_scheduler = ScanScheduler()
@@ -0,0 +1,69 @@
+"""
+Script IPC Framing
+
+Length-prefixed frames used between the backend and the analysis workers.
+Each frame is a 4-byte big-endian payload length, a one-byte codec tag and
+the payload itself (msgpack when available, JSON otherwise).
+"""
+
+import json
+import struct
+from typing import Any, Callable
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+HEADER = struct.Struct('>IB')
+CODEC_JSON = ord('J')
+CODEC_MSGPACK = ord('M')
+MAX_FRAME_SIZE = 512 * 1024 * 1024
+
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+JSON_MIMETYPE = 'application/json'
+
+
+class FrameError(Exception):
+    """Raised when a frame cannot be read or decoded."""
+
+
+def encode_frame(message: Any) -> bytes:
+    """Encode a message into a single frame."""
+    if MSGPACK_AVAILABLE:
+        codec, payload = CODEC_MSGPACK, msgpack.packb(message, use_bin_type=True)
+    else:
+        codec, payload = CODEC_JSON, json.dumps(message).encode('utf-8')
+    return HEADER.pack(len(payload), codec) + payload
+
+
+def decode_payload(codec: int, payload: bytes) -> Any:
+    """Decode a frame payload according to its codec tag."""
+    if codec == CODEC_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise FrameError("Received a msgpack frame but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(payload)
+    raise FrameError(f"Unknown frame codec: {codec}")
+
+
+def read_frame(read_exact: Callable[[int], bytes]) -> Any:
+    """Read and decode one frame using a callable that returns exactly n bytes."""
+    length, codec = HEADER.unpack(read_exact(HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise FrameError(f"Frame of {length} bytes exceeds the size limit")
+    return decode_payload(codec, read_exact(length))
+
+
+def decode_frame(data: bytes) -> Any:
+    """Decode a complete frame held in memory."""
+    if len(data) < HEADER.size:
+        raise FrameError("Truncated frame header")
+    length, codec = HEADER.unpack_from(data)
+    payload = data[HEADER.size:HEADER.size + length]
+    if len(payload) != length:
+        raise FrameError("Truncated frame payload")
+    return decode_payload(codec, payload)
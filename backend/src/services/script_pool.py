@@ -0,0 +1,230 @@
+"""
+Script Worker Pool
+
+Keeps a small pool of long-lived Python workers (scripts/script_worker.py)
+that import the analysis scripts once and then serve framed jobs over a pipe,
+instead of starting a fresh interpreter for every API request.
+"""
+
+import atexit
+import logging
+import os
+import select
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from src.services.script_ipc import encode_frame, read_frame
+
+logger = logging.getLogger(__name__)
+
+# Scripts and their virtualenv are resolved relative to the backend directory,
+# the same way the one-off subprocess path resolves them
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+class WorkerUnavailable(Exception):
+    """Raised when the pool cannot provide a worker for a job."""
+
+
+class WorkerTimeout(Exception):
+    """Raised when a worker does not answer within the job timeout."""
+
+
+class ScriptWorker:
+    """A single worker process speaking the framed IPC protocol."""
+
+    def __init__(self, python: str, worker_script: str, cwd: str):
+        self.jobs_done = 0
+        self._buffer = bytearray()
+        try:
+            self.process = subprocess.Popen(
+                [python, '-u', worker_script],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=cwd
+            )
+        except OSError as e:
+            raise WorkerUnavailable(f"Could not start worker: {e}")
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send one framed job to the worker and wait for its framed response."""
+        try:
+            self.process.stdin.write(encode_frame(message))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerUnavailable(f"Worker pipe closed: {e}")
+
+        deadline = time.monotonic() + timeout
+        response = read_frame(lambda n: self._read_exact(n, deadline))
+        self.jobs_done += 1
+        return response
+
+    def _read_exact(self, size: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        while len(self._buffer) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WorkerTimeout()
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                raise WorkerTimeout()
+            chunk = os.read(fd, max(65536, size - len(self._buffer)))
+            if not chunk:
+                raise WorkerUnavailable("Worker exited unexpectedly")
+            self._buffer.extend(chunk)
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def close(self, graceful: bool = True):
+        """Stop the worker, asking nicely first unless it is stuck."""
+        try:
+            if not graceful:
+                raise RuntimeError("worker is not responding")
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+
+
+class ScriptWorkerPool:
+    """Pool of pre-warmed script workers, recycled after a number of jobs."""
+
+    def __init__(self):
+        self.enabled = False
+        self.fallback = True
+        self.size = 0
+        self.max_jobs = 0
+        self.timeout = 30
+        self.python = None
+        self.worker_script = None
+        self.cwd = BASE_DIR
+
+        self._idle: List[ScriptWorker] = []
+        # Every worker started for the current configuration, idle or busy
+        self._workers: Set[ScriptWorker] = set()
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._exit_registered = False
+
+    @property
+    def _spawned(self) -> int:
+        return len(self._workers)
+
+    def init_app(self, app):
+        """Configure the pool from the Flask config and pre-warm the workers.
+
+        Workers started under a previous configuration are retired first.
+        """
+        self.shutdown()
+        config = app.config
+        self.enabled = config.get('SCRIPT_POOL_ENABLED', True)
+        self.fallback = config.get('SCRIPT_POOL_FALLBACK', True)
+        self.size = config.get('SCRIPT_POOL_SIZE', 2)
+        self.max_jobs = config.get('SCRIPT_POOL_MAX_JOBS', 100)
+        self.timeout = config.get('SCRIPT_JOB_TIMEOUT', 30)
+        self.python = os.path.join(BASE_DIR, 'scripts_venv', 'bin', 'python')
+        self.worker_script = os.path.join(BASE_DIR, 'scripts', 'script_worker.py')
+
+        if self.enabled:
+            self.warm_up()
+            if not self._exit_registered:
+                atexit.register(self.shutdown)
+                self._exit_registered = True
+
+    def warm_up(self):
+        """Start workers until the pool is full."""
+        with self._cond:
+            while self._spawned < self.size:
+                try:
+                    self._idle.append(self._spawn())
+                except WorkerUnavailable as e:
+                    logger.warning(f"Script worker pool could not pre-warm: {e}")
+                    break
+            self._cond.notify_all()
+
+    def _spawn(self) -> ScriptWorker:
+        worker = ScriptWorker(self.python, self.worker_script, self.cwd)
+        self._workers.add(worker)
+        return worker
+
+    def _acquire(self) -> ScriptWorker:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._workers.discard(worker)
+                if self._spawned < self.size:
+                    return self._spawn()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise WorkerUnavailable("No script worker became available")
+
+    def _release(self, worker: ScriptWorker, healthy: bool):
+        with self._cond:
+            # A worker the pool no longer tracks was retired by shutdown
+            # while it ran this job
+            retired = worker not in self._workers
+            recycle = not healthy or not worker.alive or (self.max_jobs and worker.jobs_done >= self.max_jobs)
+            if not retired and not recycle:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+            self._workers.discard(worker)
+            generation = self._generation
+        worker.close(graceful=healthy)
+        if retired:
+            return
+        with self._cond:
+            if generation != self._generation:
+                return
+            try:
+                self._idle.append(self._spawn())
+            except WorkerUnavailable as e:
+                logger.warning(f"Could not replace recycled script worker: {e}")
+            self._cond.notify()
+
+    def submit(self, message: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run a framed job on a pooled worker and return the decoded response.
+
+        Raises WorkerUnavailable if the job could not be handed to a worker,
+        so the caller can fall back to a one-off subprocess, and WorkerTimeout
+        if the worker did not answer in time (``timeout`` seconds, defaulting
+        to the pool's job timeout).
+        """
+        if not self.enabled:
+            raise WorkerUnavailable("Script worker pool is disabled")
+
+        worker = self._acquire()
+        healthy = False
+        try:
+            response = worker.request(message, timeout or self.timeout)
+            healthy = True
+            return response
+        finally:
+            self._release(worker, healthy)
+
+    def shutdown(self):
+        """Stop the idle workers now and the busy ones as their current job finishes."""
+        with self._cond:
+            workers, self._idle = self._idle, []
+            self._workers = set()
+            self._generation += 1
+            self._cond.notify_all()
+        for worker in workers:
+            worker.close()
+
+
+# Global instance
+script_pool = ScriptWorkerPool()
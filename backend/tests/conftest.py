@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the backend's `src` package importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
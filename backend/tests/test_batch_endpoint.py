@@ -0,0 +1,99 @@
+"""
+Tests for the NDJSON batch endpoint: one line per symbol as each finishes,
+with failures reported inline.
+"""
+
+import json
+import threading
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from src.routes import trading
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='test-secret-key-of-at-least-32-bytes', BATCH_FETCH_WORKERS=4)
+    JWTManager(app)
+    app.register_blueprint(trading.trading_bp, url_prefix='/api/trading')
+    with app.app_context():
+        token = create_access_token(identity='1')
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return client
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """Stand-in for the script workers: MSFT fails, BOOM raises, AAPL waits for ``release``."""
+    calls = []
+    release = threading.Event()
+
+    def run_script_job(job, params, response=None, timeout=None):
+        calls.append((job, params))
+        symbol = params['symbol']
+        if symbol == 'AAPL':
+            release.wait(5)
+        if symbol == 'MSFT':
+            return False, 'No data found'
+        if symbol == 'BOOM':
+            raise RuntimeError('worker crashed')
+        return True, {'symbol': symbol, 'bars': [1, 2, 3]}
+
+    monkeypatch.setattr(trading, 'run_script_job', run_script_job)
+    monkeypatch.setattr(trading.script_pool, 'enabled', False)
+    return calls, release
+
+
+def post_batch(client, **body):
+    return client.post('/api/trading/historical-data/batch', json=body, buffered=False)
+
+
+def test_lines_stream_per_symbol_and_failures_are_inline(client, jobs):
+    calls, release = jobs
+    response = post_batch(client, symbols=['aapl', 'MSFT', 'goog', 'BOOM', 'GOOG'], period='1mo')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    # The other symbols arrive while AAPL is still running
+    chunks = response.response
+    lines = [json.loads(next(chunks)) for _ in range(3)]
+    assert not release.is_set()
+    release.set()
+    lines += [json.loads(chunk) for chunk in chunks]
+    response.close()
+
+    by_symbol = {line['symbol']: line for line in lines}
+    assert len(lines) == 4 and lines[-1]['symbol'] == 'AAPL'
+    assert by_symbol['MSFT'] == {'symbol': 'MSFT', 'error': 'No data found'}
+    assert by_symbol['BOOM'] == {'symbol': 'BOOM', 'error': 'worker crashed'}
+    assert by_symbol['GOOG'] == {'symbol': 'GOOG', 'data': {'symbol': 'GOOG', 'bars': [1, 2, 3]}}
+    assert by_symbol['AAPL']['data']['symbol'] == 'AAPL'
+
+    # Symbols are normalised and de-duplicated before any job runs
+    assert sorted(params['symbol'] for _, params in calls) == ['AAPL', 'BOOM', 'GOOG', 'MSFT']
+    assert all(job == 'historical_data' and params['range'] == '1mo' for job, params in calls)
+
+
+@pytest.mark.parametrize('body,error', [
+    ({'symbols': []}, 'Symbols are required'),
+    ({'symbols': ['  ']}, 'Symbols are required'),
+    ({'symbols': ['AAPL'], 'format': 'xml'}, 'Invalid format'),
+    ({'symbols': [f'S{i}' for i in range(51)]}, 'At most 50 symbols per batch'),
+])
+def test_invalid_batches_are_rejected(client, jobs, body, error):
+    response = post_batch(client, **body)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+    assert jobs[0] == []
+
+
+def test_batch_requires_a_token(client, jobs):
+    client.environ_base.pop('HTTP_AUTHORIZATION')
+
+    assert post_batch(client, symbols=['AAPL']).status_code == 401
@@ -0,0 +1,111 @@
+"""
+Tests for the analysis job queue and its TTL job stores.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.services.job_queue import (
+    JobQueue, JobFailed, QueueFull, MemoryJobStore, SQLiteJobStore, create_job_store,
+    STATUS_SUCCEEDED, STATUS_FAILED, FINISHED_STATUSES
+)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / 'jobs.db'))
+
+
+def wait_for(queue, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job and job['status'] in FINISHED_STATUSES:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_job_runs_and_stores_result(store):
+    queue = JobQueue(store=store, max_workers=2)
+    job, deduplicated = queue.submit('ict-analysis', {'symbol': 'AAPL'}, lambda: {'order_blocks': [1, 2]})
+
+    assert not deduplicated
+    finished = wait_for(queue, job['id'])
+    assert finished['status'] == STATUS_SUCCEEDED
+    assert finished['result'] == {'order_blocks': [1, 2]}
+    queue.shutdown()
+
+
+def test_failed_job_records_error(store):
+    queue = JobQueue(store=store)
+
+    def fail():
+        raise JobFailed('No data found')
+
+    job, _ = queue.submit('ict-analysis', {'symbol': 'NOPE'}, fail)
+    finished = wait_for(queue, job['id'])
+    assert finished['status'] == STATUS_FAILED
+    assert finished['error'] == 'No data found'
+    queue.shutdown()
+
+
+def test_identical_in_flight_jobs_are_deduplicated(store):
+    queue = JobQueue(store=store, max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    first, first_dedup = queue.submit('lstm-prediction', {'symbol': 'MSFT', 'days': 5}, work)
+    second, second_dedup = queue.submit('lstm-prediction', {'days': 5, 'symbol': 'MSFT'}, work)
+    other, other_dedup = queue.submit('lstm-prediction', {'symbol': 'MSFT', 'days': 10}, work)
+
+    assert second['id'] == first['id'] and second_dedup
+    assert other['id'] != first['id'] and not other_dedup
+
+    release.set()
+    assert wait_for(queue, first['id'])['result'] == 42
+    wait_for(queue, other['id'])
+    assert len(calls) == 2
+
+    # Once finished, the same request starts a fresh job
+    again, again_dedup = queue.submit('lstm-prediction', {'symbol': 'MSFT', 'days': 5}, lambda: 43)
+    assert again['id'] != first['id'] and not again_dedup
+    queue.shutdown()
+
+
+def test_results_expire_after_ttl(store):
+    queue = JobQueue(store=store, result_ttl=0.05)
+    job, _ = queue.submit('historical-data', {'symbol': 'SPY'}, lambda: [])
+    wait_for(queue, job['id'])
+
+    time.sleep(0.1)
+    assert queue.get(job['id']) is None
+    queue.shutdown()
+
+
+def test_queue_rejects_jobs_beyond_max_pending():
+    queue = JobQueue(max_workers=1, max_pending=1)
+    release = threading.Event()
+    queue.submit('ict-analysis', {'symbol': 'AAPL'}, lambda: release.wait(5))
+
+    with pytest.raises(QueueFull):
+        queue.submit('ict-analysis', {'symbol': 'TSLA'}, lambda: None)
+
+    release.set()
+    queue.shutdown(wait=True)
+
+
+def test_create_job_store_from_url(tmp_path):
+    assert isinstance(create_job_store('memory'), MemoryJobStore)
+    assert isinstance(create_job_store(f"sqlite:///{tmp_path / 'jobs.db'}"), SQLiteJobStore)
+    with pytest.raises(ValueError):
+        create_job_store('redis://localhost')
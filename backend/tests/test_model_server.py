@@ -0,0 +1,171 @@
+"""
+Tests for the LSTM model server's micro-batching and LRU eviction, and
+the prediction route's fallback to the script worker.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ai_training'))
+import micro_batching  # noqa: E402
+
+from src.routes import trading  # noqa: E402
+from src.services.model_server import ModelServer, ModelUnavailable  # noqa: E402
+
+
+class FakeLSTM:
+    """Forecasts last close + 1, + 2, ... and records every batch it serves."""
+
+    sequence_length = 3
+    nbytes = 1000
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.batches = []
+
+    def forecast(self, series, steps):
+        self.batches.append(len(series))
+        return [Row(values[-1] + k + 1 for k in range(steps)) for values in series]
+
+
+class Row(list):
+    """A forecast row that slices and converts like a numpy row."""
+
+    def __getitem__(self, index):
+        return Row(list.__getitem__(self, index)) if isinstance(index, slice) else list.__getitem__(self, index)
+
+    def tolist(self):
+        return list(self)
+
+
+def make_server(symbols, budget=10_000, max_wait=0.05):
+    models = {}
+
+    def load(model_dir, symbol):
+        if symbol not in symbols:
+            return None
+        models[symbol] = FakeLSTM(symbol)
+        return models[symbol]
+
+    server = ModelServer()
+    server.enabled = True
+    server.memory_budget = budget
+    server.max_wait = max_wait
+    server._batching = micro_batching
+    server._serving = SimpleNamespace(ServedLSTM=SimpleNamespace(load=load))
+    return server, models
+
+
+def test_concurrent_requests_share_one_forward_pass():
+    server, models = make_server({'AAPL'})
+    server._get('AAPL')
+    model = models['AAPL']
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        futures = [executor.submit(server.predict, 'AAPL', [1.0, 2.0, float(i)], i + 1) for i in range(6)]
+        results = [future.result(5) for future in futures]
+
+    assert model.batches == [6]
+    for i, (predictions, latency) in enumerate(results):
+        assert predictions == [i + k + 1.0 for k in range(i + 1)]
+        assert latency['batch_size'] == 6
+        assert latency['total_ms'] >= latency['inference_ms']
+    server.shutdown()
+
+
+def test_least_recently_used_models_are_evicted_over_budget():
+    server, _ = make_server({'A', 'B', 'C'}, budget=2500)
+    server._get('A')
+    server._get('B')
+    server._get('A')  # B is now least recently used
+    server._get('C')
+
+    stats = server.stats()
+    assert [m['symbol'] for m in stats['models']] == ['A', 'C']
+    assert stats['evictions'] == 1 and stats['memory_bytes'] == 2000
+    server.shutdown()
+
+
+def test_short_series_and_missing_models_are_rejected():
+    server, _ = make_server({'AAPL'})
+    with pytest.raises(ValueError):
+        server.predict('AAPL', [1.0, 2.0], 1)
+    with pytest.raises(ModelUnavailable):
+        server.predict('MSFT', [1.0, 2.0, 3.0], 1)
+    assert not ModelServer().available('AAPL')
+    server.shutdown()
+
+
+def test_request_for_a_model_evicted_mid_request_is_retried():
+    server, models = make_server({'A', 'B'}, budget=1000)
+    stale = server._get('A')
+    server._get('B')  # Evicts A and closes its batcher
+
+    lookups = []
+    get = server._get
+    server._get = lambda symbol: lookups.append(symbol) or (stale if len(lookups) == 1 else get(symbol))
+
+    predictions, _ = server.predict('A', [1.0, 2.0, 3.0], 2)
+    assert predictions == [4.0, 5.0]
+    assert lookups == ['A', 'A']
+    assert server._models['A'] is not stale
+    server.shutdown()
+
+
+@pytest.fixture
+def route(monkeypatch):
+    """Client for the prediction route with AAPL's model served and script jobs recorded."""
+    server, _ = make_server({'AAPL'})
+    worker_jobs = []
+
+    def job_response(job, params, *args, **kwargs):
+        worker_jobs.append((job, params))
+        return jsonify({'predictions': 'baseline'}), 200
+
+    monkeypatch.setattr(server, 'available', lambda symbol: symbol == 'AAPL')
+    monkeypatch.setattr(trading, 'model_server', server)
+    monkeypatch.setattr(trading, 'job_response', job_response)
+    monkeypatch.setattr(trading, 'run_script_job', lambda job, params: (True, {'close': [1.0, 2.0, 3.0]}))
+
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='test-secret-key-of-at-least-32-bytes')
+    JWTManager(app)
+    app.register_blueprint(trading.trading_bp, url_prefix='/api/trading')
+    with app.app_context():
+        token = create_access_token(identity='1')
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    yield client, server, worker_jobs
+    server.shutdown()
+
+
+@pytest.mark.parametrize('symbol', ['AAPL', 'MSFT'])
+@pytest.mark.parametrize('days', [0, 366, 2.5, '5', True])
+def test_prediction_days_are_validated_with_or_without_a_model(route, symbol, days):
+    client, _, worker_jobs = route
+    response = client.post('/api/trading/lstm-prediction', json={'symbol': symbol, 'days': days})
+    assert response.status_code == 400
+    assert worker_jobs == []
+
+
+def test_prediction_served_by_the_model(route):
+    client, _, worker_jobs = route
+    response = client.post('/api/trading/lstm-prediction', json={'symbol': 'aapl', 'days': 2})
+    assert response.status_code == 200
+    assert response.get_json()['predictions'] == [4.0, 5.0]
+    assert worker_jobs == []
+
+
+def test_prediction_falls_back_to_the_worker_on_too_short_a_history(route, monkeypatch):
+    client, _, worker_jobs = route
+    monkeypatch.setattr(trading, 'run_script_job', lambda job, params: (True, {'close': [1.0, 2.0]}))
+    response = client.post('/api/trading/lstm-prediction', json={'symbol': 'AAPL', 'days': 2})
+    assert response.status_code == 200
+    assert response.get_json() == {'predictions': 'baseline'}
+    assert worker_jobs == [('lstm_prediction', {'symbol': 'AAPL', 'days': 2})]
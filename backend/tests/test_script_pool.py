@@ -0,0 +1,162 @@
+"""
+Tests for the script worker pool: recycling, timeouts, acquisition and
+shutdown, against a stub worker speaking the framed protocol.
+"""
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.script_pool import ScriptWorkerPool, WorkerTimeout, WorkerUnavailable
+
+# Answers {"job": "pid"} with its process id and {"job": "sleep", "params":
+# {"seconds": n}} after n seconds, like scripts/script_worker.py would
+STUB_WORKER = '''
+import json, os, struct, sys, time
+import msgpack
+
+HEADER = struct.Struct(">IB")
+stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+while True:
+    header = stdin.read(HEADER.size)
+    if not header:
+        break
+    length, codec = HEADER.unpack(header)
+    payload = stdin.read(length)
+    request = msgpack.unpackb(payload, raw=False) if codec == ord("M") else json.loads(payload)
+    if request["job"] == "sleep":
+        time.sleep(request["params"]["seconds"])
+    reply = msgpack.packb({"ok": True, "result": os.getpid()}, use_bin_type=True)
+    stdout.write(HEADER.pack(len(reply), ord("M")) + reply)
+    stdout.flush()
+'''
+
+
+@pytest.fixture
+def pool(tmp_path):
+    script = tmp_path / 'stub_worker.py'
+    script.write_text(STUB_WORKER)
+    pool = ScriptWorkerPool()
+    pool.enabled = True
+    pool.size = 1
+    pool.max_jobs = 0
+    pool.timeout = 5
+    pool.python = sys.executable
+    pool.worker_script = str(script)
+    pool.cwd = str(tmp_path)
+    yield pool
+    pool.shutdown()
+
+
+def pid(pool, **kwargs):
+    return pool.submit({'job': 'pid', 'params': {}}, **kwargs)['result']
+
+
+def test_worker_is_reused_then_recycled_after_max_jobs(pool):
+    pool.max_jobs = 2
+    pool.warm_up()
+    first = pool._idle[0]
+
+    pids = [pid(pool) for _ in range(3)]
+
+    assert pids[0] == pids[1] != pids[2]
+    assert not first.alive
+    assert pool._spawned == 1
+
+
+def test_timed_out_worker_is_killed_and_replaced(pool):
+    pool.warm_up()
+    stuck = pool._idle[0]
+
+    with pytest.raises(WorkerTimeout):
+        pool.submit({'job': 'sleep', 'params': {'seconds': 30}}, timeout=0.3)
+
+    assert not stuck.alive
+    assert pid(pool) != stuck.process.pid
+    assert pool._spawned == 1
+
+
+def test_unstartable_worker_raises_worker_unavailable(pool):
+    pool.python = '/nonexistent/python'
+    with pytest.raises(WorkerUnavailable):
+        pid(pool)
+
+    pool.enabled = False
+    with pytest.raises(WorkerUnavailable):
+        pid(pool)
+
+
+def test_acquire_gives_up_when_every_worker_stays_busy(pool):
+    pool.timeout = 0.3
+    busy = threading.Thread(target=pool.submit, args=({'job': 'sleep', 'params': {'seconds': 1}},),
+                            kwargs={'timeout': 5})
+    busy.start()
+    while pool._spawned == 0 or pool._idle:
+        pass
+
+    with pytest.raises(WorkerUnavailable, match='No script worker'):
+        pid(pool)
+    busy.join()
+    assert pid(pool)
+
+
+def start_sleeping_job(pool, seconds=0.5):
+    """Run a sleep job in a thread and return it once it holds a worker."""
+    idle = len(pool._idle)
+    job = threading.Thread(target=pool.submit, args=({'job': 'sleep', 'params': {'seconds': seconds}},))
+    job.start()
+    while len(pool._idle) == idle:
+        time.sleep(0.01)
+    return job
+
+
+def test_shutdown_closes_busy_workers_once_their_job_finishes(pool):
+    pool.size = 2
+    pool.warm_up()
+    idle, busy = pool._idle
+    job = start_sleeping_job(pool)
+
+    pool.shutdown()
+    assert busy.alive and not idle.alive
+
+    job.join()
+    assert not busy.alive
+    assert pool._idle == [] and pool._spawned == 0
+
+
+def test_reconfiguration_retires_the_previous_workers(pool):
+    pool.warm_up()
+    old = pool._idle[0]
+    job = start_sleeping_job(pool)
+
+    pool.init_app(SimpleNamespace(config={'SCRIPT_POOL_ENABLED': False}))
+    assert old.alive
+    job.join()
+    assert not old.alive
+    assert pool._idle == [] and pool._spawned == 0
+
+
+def test_jobs_fall_back_to_a_one_off_worker_when_the_pool_is_unavailable(monkeypatch):
+    from flask import Flask
+    from src.routes import trading
+
+    def unavailable(message, timeout=None):
+        raise WorkerUnavailable('pool is down')
+
+    one_off = []
+    monkeypatch.setattr(trading.script_pool, 'enabled', True)
+    monkeypatch.setattr(trading.script_pool, 'submit', unavailable)
+    monkeypatch.setattr(trading, 'run_worker_subprocess',
+                        lambda message, timeout=None: one_off.append(message) or {'ok': True, 'result': 42})
+
+    with Flask(__name__).app_context():
+        monkeypatch.setattr(trading.script_pool, 'fallback', True)
+        assert trading.run_script_job('historical_data', {'symbol': 'AAPL'}) == (True, 42)
+        assert one_off == [{'job': 'historical_data', 'params': {'symbol': 'AAPL'}}]
+
+        monkeypatch.setattr(trading.script_pool, 'fallback', False)
+        assert trading.run_script_job('historical_data', {'symbol': 'AAPL'}) == (False, 'pool is down')
+        assert len(one_off) == 1
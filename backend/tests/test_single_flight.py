@@ -0,0 +1,68 @@
+"""
+Tests for single-flight request coalescing.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.services.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'symbol': 'AAPL', 'bars': 252}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(flight.do, ('historical_data', 'AAPL', '1y'), compute)
+        started.wait(5)
+        followers = [executor.submit(flight.do, ('historical_data', 'AAPL', '1y'), compute) for _ in range(7)]
+        while flight.stats()['coalesced'] < 7:
+            pass
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert all(result == {'symbol': 'AAPL', 'bars': 252} for result in results)
+    assert flight.stats() == {'executed': 1, 'coalesced': 7, 'in_flight': 0}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do('AAPL', lambda: 1) == 1
+    assert flight.do('MSFT', lambda: 2) == 2
+    assert flight.stats()['executed'] == 2
+
+
+def test_error_is_shared_with_waiters_and_key_is_released():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('upstream unavailable')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, 'TSLA', fail)
+        started.wait(5)
+        follower = executor.submit(flight.do, 'TSLA', fail)
+        while flight.stats()['coalesced'] < 1:
+            pass
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    # A later call for the same key runs again
+    assert flight.do('TSLA', lambda: 'ok') == 'ok'
@@ -0,0 +1,148 @@
+"""
+Local per-symbol bar store with incremental refresh.
+
+Each symbol/interval series is kept on disk together with the timestamp of
+its last stored bar. A refresh only asks the upstream source for bars from
+that timestamp on, replaces the last (possibly still forming) bar and
+appends the rest, so keeping a long history current costs O(new bars) of
+network transfer instead of O(history). Callers read any range locally.
+
+Bars are stored as columns in a memory-mapped ``ColumnarBarStore``:
+``timestamp`` (epoch seconds) plus ``open``, ``high``, ``low``, ``close``
+and ``volume``. A refresh overwrites the partial last bar in place and
+appends the new ones without rewriting the rest of the history.
+"""
+
+import fcntl
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from columnar_store import ColumnarBarStore
+
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+DEFAULT_STORE_DIR = os.environ.get("BAR_STORE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "tradepro-ai", "bars"
+)
+
+_RANGE_UNITS = {"d": 86400, "wk": 7 * 86400, "mo": 30 * 86400, "y": 365 * 86400}
+_RANGE_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def range_start(range_val, now=None):
+    """Epoch second where a Yahoo-style range ("5d", "1y", "ytd", "max") begins."""
+    now = int(now if now is not None else time.time())
+    if range_val == "max":
+        return 0
+    if range_val == "ytd":
+        return int(pd.Timestamp(now, unit="s").replace(month=1, day=1, hour=0, minute=0, second=0).timestamp())
+    match = _RANGE_PATTERN.match(range_val)
+    if not match:
+        raise ValueError(f"Unsupported range: {range_val}")
+    return now - int(match.group(1)) * _RANGE_UNITS[match.group(2)]
+
+
+def normalize_bars(df):
+    """Sort bars by timestamp, keep the last copy of duplicate bars and fix dtypes."""
+    df = df[BAR_COLUMNS].dropna()
+    df = df.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+    return df.astype({"timestamp": "int64", "open": "float64", "high": "float64",
+                      "low": "float64", "close": "float64", "volume": "int64"}).reset_index(drop=True)
+
+
+class BarStore:
+    """Incrementally refreshed bar history, one file per symbol and interval.
+
+    ``fetch(symbol, interval, start)`` must return a DataFrame with the
+    ``BAR_COLUMNS`` for every bar at or after the epoch second ``start``.
+    """
+
+    def __init__(self, fetch, root=DEFAULT_STORE_DIR):
+        self.fetch = fetch
+        self.root = root
+        self.columns = ColumnarBarStore(root)
+
+    def _path(self, symbol, interval, suffix):
+        return os.path.join(self.root, symbol.upper(), f"{interval}{suffix}")
+
+    @contextmanager
+    def _locked(self, symbol, interval):
+        """Serialise writers of one series across threads and processes."""
+        path = self._path(symbol, interval, ".lock")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Storage ---
+
+    def _read_meta(self, symbol, interval):
+        try:
+            with open(self._path(symbol, interval, ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, symbol, interval, bars, covered_from, replace_from):
+        self.columns.write(symbol, interval, bars, replace_from=replace_from)
+
+        meta = {
+            "covered_from": covered_from,
+            "last_timestamp": self.columns.last_timestamp(symbol, interval),
+            "bars": self.columns.length(symbol, interval),
+            "updated_at": time.time()
+        }
+        meta_path = self._path(symbol, interval, ".json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    # --- Public API ---
+
+    def last_timestamp(self, symbol, interval):
+        """Timestamp of the last stored bar, or None if nothing is stored."""
+        meta = self._read_meta(symbol, interval)
+        return meta["last_timestamp"] if meta else None
+
+    def refresh(self, symbol, interval, start):
+        """Bring the series up to date and make sure it covers ``start``.
+
+        Returns the number of bars received from upstream.
+        """
+        with self._locked(symbol, interval):
+            meta = self._read_meta(symbol, interval)
+            if meta is None or meta["last_timestamp"] is None or start < meta["covered_from"]:
+                # Nothing stored yet, or the caller wants older history: full fetch
+                fresh = normalize_bars(self.fetch(symbol, interval, start))
+                if len(fresh):
+                    self._write(symbol, interval, fresh, start, replace_from=int(fresh["timestamp"].iloc[0]))
+                return len(fresh)
+
+            # Re-request the last stored bar too, since it may still have been forming
+            delta = normalize_bars(self.fetch(symbol, interval, meta["last_timestamp"]))
+            if not len(delta):
+                return 0
+            self._write(symbol, interval, delta, meta["covered_from"], replace_from=int(delta["timestamp"].iloc[0]))
+            return len(delta)
+
+    def view(self, symbol, interval, start=None, end=None):
+        """Zero-copy column views of the stored bars in ``[start, end]``."""
+        return self.columns.view(symbol, interval, start=start, end=end)
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Stored bars with ``start <= timestamp <= end`` (both optional)."""
+        return self.view(symbol, interval, start=start, end=end).to_frame()
+
+    def load(self, symbol, interval, range_val):
+        """Refresh the series and return the bars for a Yahoo-style range."""
+        start = range_start(range_val)
+        self.refresh(symbol, interval, start)
+        return self.read(symbol, interval, start=start)
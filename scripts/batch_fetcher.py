@@ -0,0 +1,146 @@
+"""
+Concurrent multi-symbol fetching.
+
+``BatchFetcher`` runs a per-symbol fetch function on a thread pool, paces
+the calls with a shared token bucket, retries failures with exponential
+backoff and yields results as they complete, so a slow symbol never holds
+up the rest of the universe.
+
+``ChartClient`` downloads bars from the Yahoo chart endpoint over one
+pooled ``requests`` session, so concurrent downloads reuse keep-alive
+connections instead of opening a new one per symbol.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from bar_store import BAR_COLUMNS
+
+
+class FetchError(Exception):
+    """A failed fetch; ``retryable`` tells the fetcher whether to try again."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BatchFetcher:
+    """Fetch many symbols concurrently with rate limiting and retries."""
+
+    def __init__(self, fetch, max_workers=16, rate=20.0, burst=40, retries=3, backoff=0.5, max_backoff=8.0):
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _fetch_with_retry(self, symbol):
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                return symbol, self.fetch(symbol), None
+            except Exception as e:
+                if attempt >= self.retries or not getattr(e, "retryable", True):
+                    return symbol, None, e
+                # Exponential backoff with jitter so retries do not arrive in lockstep
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                attempt += 1
+
+    def fetch_iter(self, symbols):
+        """Yield ``(symbol, result, error)`` for each symbol as it completes."""
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-fetch")
+        try:
+            futures = [executor.submit(self._fetch_with_retry, symbol) for symbol in dict.fromkeys(symbols)]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch_all(self, symbols):
+        """Fetch every symbol; returns ``(results, errors)`` dicts keyed by symbol."""
+        results, errors = {}, {}
+        for symbol, result, error in self.fetch_iter(symbols):
+            if error is None:
+                results[symbol] = result
+            else:
+                errors[symbol] = error
+        return results, errors
+
+
+def pooled_session(pool_size=32):
+    """A requests session that keeps up to ``pool_size`` connections alive per host."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ChartClient:
+    """Yahoo chart API client over a pooled keep-alive session."""
+
+    def __init__(self, base_url="https://query1.finance.yahoo.com", pool_size=32, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.session = pooled_session(pool_size)
+        self.timeout = timeout
+
+    def bars_since(self, symbol, interval, start, end=None):
+        """Bars from the epoch second ``start`` in bar store layout."""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/v8/finance/chart/{symbol}",
+                params={"interval": interval, "period1": int(start), "period2": int(end or time.time())},
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise FetchError(f"{symbol}: {e}")
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise FetchError(f"{symbol}: HTTP {response.status_code}")
+        if response.status_code != 200:
+            raise FetchError(f"{symbol}: HTTP {response.status_code}", retryable=False)
+
+        result = (response.json().get("chart") or {}).get("result")
+        if not result or not result[0].get("timestamp"):
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        quotes = result[0]["indicators"]["quote"][0]
+        df = pd.DataFrame({"timestamp": result[0]["timestamp"], **{field: quotes[field] for field in BAR_COLUMNS[1:]}})
+        return df.dropna()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,70 @@
+"""
+Benchmark the native ICT pipeline against the smc-based path.
+
+    python scripts/bench_ict_analysis.py                     # 10k, 100k and 1M bars
+    python scripts/bench_ict_analysis.py --smc-max-bars 1000000
+
+Bars are a seeded random walk. smc rescans the rest of the series for every
+zone, so its time grows roughly with the square of the history; sizes above
+``--smc-max-bars`` only time the native pipeline. Where both run, the
+results are checked to be identical.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from run_ict_analysis import run_ict_analysis
+
+
+def random_walk(count, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    open_ = close + rng.normal(0, 0.5, count)
+    return {
+        "open": open_,
+        "high": np.maximum(open_, close) + np.abs(rng.normal(0, 0.7, count)),
+        "low": np.minimum(open_, close) - np.abs(rng.normal(0, 0.7, count)),
+        "close": close,
+        "volume": rng.integers(0, 1_000_000, count).astype(np.float64)
+    }
+
+
+def timed(func, *args, repeat=1, **kwargs):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--smc-max-bars", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="native runs per size (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'bars':>10} {'native':>10} {'smc':>10} {'speedup':>9}  zones")
+    for size in args.sizes:
+        ohlc = random_walk(size)
+        native_time, native = timed(run_ict_analysis, ohlc, repeat=args.repeat)
+        zones = sum(len(records) for records in native.values())
+
+        if size <= args.smc_max_bars:
+            smc_time, reference = timed(run_ict_analysis, ohlc, engine="smc")
+            if reference != native:
+                raise SystemExit(f"{size} bars: native results differ from smc")
+            print(f"{size:>10} {native_time:>9.3f}s {smc_time:>9.2f}s {smc_time / native_time:>8.0f}x  {zones}")
+        else:
+            print(f"{size:>10} {native_time:>9.3f}s {'skipped':>10} {'':>9}  {zones}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Columnar memory-mapped bar store.
+
+Every symbol/interval series is a directory holding one raw little-endian
+file per field (``timestamp`` and ``volume`` as int64, prices as float64)
+plus a small ``meta.json`` with the number of valid rows. Readers map the
+files read-only, so they get zero-copy NumPy views, and every process
+reading the same series shares the same page-cache pages instead of
+holding its own copy. Range reads binary-search the timestamp column.
+
+Writers only ever overwrite rows in place or append; files are never
+truncated, so a reader holding a mapping never loses pages under it. The
+row count in ``meta.json`` is replaced atomically after the data is
+written and is the only thing readers trust.
+"""
+
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+FIELDS = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+
+_Mapping = namedtuple("_Mapping", ["length", "columns"])
+
+
+class BarView:
+    """Read-only column views over a contiguous slice of one series."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def to_frame(self):
+        """Copy the view into a DataFrame with one column per field."""
+        return pd.DataFrame({field: np.array(values) for field, values in self.columns.items()})
+
+
+class ColumnarBarStore:
+    """One memory-mapped array per field per symbol/interval."""
+
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _field_path(self, symbol, interval, field):
+        return os.path.join(self._dir(symbol, interval), f"{field}.{FIELDS[field].str[1:]}")
+
+    def length(self, symbol, interval):
+        """Number of valid rows stored for the series."""
+        try:
+            with open(os.path.join(self._dir(symbol, interval), "meta.json")) as f:
+                return json.load(f)["length"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    # --- Reading ---
+
+    def _mapping(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        length = self.length(symbol, interval)
+        with self._lock:
+            mapping = self._maps.get(key)
+            if mapping is not None and mapping.length == length:
+                return mapping
+            if length == 0:
+                columns = {field: np.empty(0, dtype=dtype) for field, dtype in FIELDS.items()}
+            else:
+                columns = {
+                    field: np.memmap(self._field_path(symbol, interval, field), dtype=dtype, mode="r", shape=(length,))
+                    for field, dtype in FIELDS.items()
+                }
+            mapping = self._maps[key] = _Mapping(length, columns)
+            return mapping
+
+    def view(self, symbol, interval, start=None, end=None):
+        """Zero-copy views of the rows with ``start <= timestamp <= end``."""
+        columns = self._mapping(symbol, interval).columns
+        timestamps = columns["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return BarView({field: values[lo:hi] for field, values in columns.items()})
+
+    def last_timestamp(self, symbol, interval):
+        timestamps = self._mapping(symbol, interval).columns["timestamp"]
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    # --- Writing ---
+
+    def write(self, symbol, interval, bars, replace_from=None):
+        """Write sorted bars, replacing stored rows from ``replace_from`` on.
+
+        ``bars`` maps each field to an array. With ``replace_from`` of None
+        the bars are appended after the last stored row; pass the first new
+        timestamp to overwrite a partial last bar, or a value at or below the
+        first stored timestamp to replace the whole series. Returns the new
+        row count. Callers must serialise writers of the same series.
+        """
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        length = self.length(symbol, interval)
+        offset = length
+        if replace_from is not None and length:
+            stored = self._mapping(symbol, interval).columns["timestamp"]
+            offset = int(np.searchsorted(stored, replace_from, side="left"))
+
+        count = len(bars["timestamp"])
+        for field, dtype in FIELDS.items():
+            values = np.ascontiguousarray(bars[field], dtype=dtype)
+            path = self._field_path(symbol, interval, field)
+            mode = "r+b" if os.path.exists(path) else "w+b"
+            with open(path, mode) as f:
+                f.seek(offset * dtype.itemsize)
+                f.write(values.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        new_length = offset + count
+        meta_path = os.path.join(self._dir(symbol, interval), "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"length": new_length, "fields": {name: dtype.str for name, dtype in FIELDS.items()}}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        return new_length
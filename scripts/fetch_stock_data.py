@@ -2,43 +2,75 @@ import sys
 sys.path.append("/opt/.manus/.sandbox-runtime")
 from data_api import ApiClient
 import json
+import time
 import pandas as pd
+from ohlc_cache import ohlc_cache
+from bar_store import BarStore, BAR_COLUMNS
 
-def fetch_stock_data(symbol, interval, range_val):
+def download_bars_since(symbol, interval, start):
+    """Download the bars from the epoch second ``start`` up to now."""
     client = ApiClient()
-    try:
-        response = client.call_api("YahooFinance/get_stock_chart", query={
-            "symbol": symbol,
-            "region": "US",
-            "interval": interval,
-            "range": range_val,
-            "includeAdjustedClose": True
-        })
+    response = client.call_api("YahooFinance/get_stock_chart", query={
+        "symbol": symbol,
+        "region": "US",
+        "interval": interval,
+        "period1": int(start),
+        "period2": int(time.time()),
+        "includeAdjustedClose": True
+    })
+    
+    if response and "chart" in response and "result" in response["chart"]:
+        result = response["chart"]["result"][0]
+        timestamps = result["timestamp"]
+        quotes = result["indicators"]["quote"][0]
         
-        if response and "chart" in response and "result" in response["chart"]:
-            result = response["chart"]["result"][0]
-            timestamps = result["timestamp"]
-            quotes = result["indicators"]["quote"][0]
-            
-            data = {
-                "timestamp": timestamps,
-                "open": quotes["open"],
-                "high": quotes["high"],
-                "low": quotes["low"],
-                "close": quotes["close"],
-                "volume": quotes["volume"],
-            }
-            
-            df = pd.DataFrame(data)
-            # Drop rows with NaN values that might appear if data is incomplete
-            df = df.dropna()
-            
-            # Convert timestamps to datetime objects if needed for further processing
-            # df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-            
-            return df.to_json(orient="records")
-        else:
+        data = {
+            "timestamp": timestamps,
+            "open": quotes["open"],
+            "high": quotes["high"],
+            "low": quotes["low"],
+            "close": quotes["close"],
+            "volume": quotes["volume"],
+        }
+        
+        df = pd.DataFrame(data)
+        # Drop rows with NaN values that might appear if data is incomplete
+        return df.dropna()
+    return pd.DataFrame(columns=BAR_COLUMNS)
+
+bar_store = BarStore(download_bars_since)
+
+def fetch_stock_frame(symbol, interval, range_val):
+    """OHLCV bars for the symbol, served from the shared OHLC cache when fresh.
+
+    On a cache miss the local bar store only downloads the bars added since
+    its last refresh and the range is then read from local storage.
+    """
+    return ohlc_cache.get_or_fetch(
+        symbol, interval, range_val,
+        lambda: bar_store.load(symbol, interval, range_val)
+    )
+
+def fetch_stock_columns(symbol, interval, range_val):
+    """Fetch OHLCV bars as parallel column lists instead of per-row records."""
+    try:
+        df = fetch_stock_frame(symbol, interval, range_val)
+        if df is None or df.empty:
+            return {"error": "No data found for the given symbol and range."}
+        return {column: df[column].tolist() for column in BAR_COLUMNS}
+    except Exception as e:
+        return {"error": str(e)}
+
+def fetch_stock_data(symbol, interval, range_val):
+    try:
+        df = fetch_stock_frame(symbol, interval, range_val)
+        if df is None or df.empty:
             return json.dumps({"error": "No data found for the given symbol and range."})
+        
+        # Convert timestamps to datetime objects if needed for further processing
+        # df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+        
+        return df.to_json(orient="records")
             
     except Exception as e:
         return json.dumps({"error": str(e)})
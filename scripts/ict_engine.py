@@ -0,0 +1,891 @@
+"""
+Incremental ICT engine.
+
+``IncrementalICT`` keeps the state behind ``run_ict_analysis`` (swing highs
+and lows, order blocks, fair value gaps, liquidity pools and BOS/CHoCH
+breaks) for one symbol and timeframe. It takes one bar at a time, reports
+only the zones and events that changed, and its snapshot matches what
+``run_ict_analysis`` returns for the same bars.
+
+smc is not causal: a run of same-side swing candidates keeps only its
+extreme, the first and last bars are forced swings, and structure breaks
+are pruned against later breaks. The engine commits everything that can no
+longer change and on every bar replays only the unsettled tail since the
+current swing extreme. Pending zones wait in heaps keyed by the price that
+mitigates them, so a bar costs time proportional to that tail and to the
+zones it touches rather than to the length of the history. The exception
+is liquidity: smc sizes its grouping tolerance from the high-low range of
+the whole history, so a bar that extends the range regroups the pools.
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import deque
+
+import numpy as np
+
+CATEGORIES = ("order_blocks", "fair_value_gaps", "liquidity_zones", "market_structure_shifts")
+
+INTACT, BREAKER, RESET = 0, 1, 2
+
+
+class PriceTrigger:
+    """Levels that fire once, the first time a price crosses them.
+
+    With ``rising`` a level fires when the price goes above it, otherwise
+    when it goes below; ``inclusive`` also fires when the price touches it.
+    """
+
+    def __init__(self, rising, inclusive=False):
+        self.rising = rising
+        self.inclusive = inclusive
+        self._heap = []
+        self._count = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, level, item):
+        heapq.heappush(self._heap, (level if self.rising else -level, self._count, item))
+        self._count += 1
+
+    def pop_fired(self, price):
+        """Remove and return the entries whose level ``price`` has crossed."""
+        key = price if self.rising else -price
+        heap = self._heap
+        fired = []
+        while heap and (heap[0][0] < key or (self.inclusive and heap[0][0] == key)):
+            fired.append(heapq.heappop(heap))
+        return fired
+
+    def restore(self, entries):
+        for entry in entries:
+            heapq.heappush(self._heap, entry)
+
+
+class _Scan:
+    """First index from ``start`` on whose value passes a test, extended as bars arrive."""
+
+    __slots__ = ("next", "found")
+
+    def __init__(self, start):
+        self.next = start
+        self.found = None
+
+    def advance(self, values, test):
+        while self.found is None and self.next < len(values):
+            if test(values[self.next]):
+                self.found = self.next
+            self.next += 1
+        return self.found
+
+
+class _FirstAtMost:
+    """Keys in insertion order; finds the first slot whose key is <= x (min segment tree)."""
+
+    def __init__(self):
+        self.size = 1
+        self.count = 0
+        self.tree = [float("inf")] * 2
+
+    def append(self, key):
+        if self.count == self.size:
+            leaves = self.tree[self.size:] + [float("inf")] * self.size
+            self.size *= 2
+            self.tree = [float("inf")] * self.size + leaves
+            for i in range(self.size - 1, 0, -1):
+                self.tree[i] = min(self.tree[2 * i], self.tree[2 * i + 1])
+        slot = self.count
+        self.count += 1
+        self.set(slot, key)
+        return slot
+
+    def set(self, slot, key):
+        i = slot + self.size
+        self.tree[i] = key
+        i //= 2
+        while i:
+            self.tree[i] = min(self.tree[2 * i], self.tree[2 * i + 1])
+            i //= 2
+
+    def first_at_most(self, x, start=0):
+        """Lowest slot >= ``start`` with key <= x, or None."""
+        return self._search(1, 0, self.size, x, start)
+
+    def _search(self, node, lo, hi, x, start):
+        if hi <= start or self.tree[node] > x:
+            return None
+        if hi - lo == 1:
+            return lo
+        mid = (lo + hi) // 2
+        found = self._search(2 * node, lo, mid, x, start)
+        return found if found is not None else self._search(2 * node + 1, mid, hi, x, start)
+
+
+class _FirstReach:
+    """Sparse table of running maxima: first index from ``start`` whose value is >= x."""
+
+    def __init__(self, values):
+        levels = [np.asarray(values, dtype=float)]
+        width = 1
+        while 2 * width <= len(levels[0]):
+            levels.append(np.maximum(levels[-1][:-width], levels[-1][width:]))
+            width *= 2
+        self.levels = levels
+
+    def first(self, start, x):
+        # Skip the longest run of blocks that all stay below x
+        i = start
+        for k in range(len(self.levels) - 1, -1, -1):
+            level = self.levels[k]
+            if i < len(level) and level[i] < x:
+                i += 1 << k
+        return i if i < len(self.levels[0]) else None
+
+
+# --- Fair value gaps ---
+
+class _FairValueGaps:
+    """``smc.fvg``: a gap is settled one bar after it forms and waits for mitigation."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.gaps = {}
+        # Bullish gaps are mitigated when a low reaches their top, bearish ones when a high reaches their bottom
+        self.bullish = PriceTrigger(rising=False, inclusive=True)
+        self.bearish = PriceTrigger(rising=True, inclusive=True)
+        self.touched = set()
+
+    def update(self):
+        bars = self.bars
+        t = len(bars.high) - 1
+        for trigger, price in ((self.bullish, bars.low[t]), (self.bearish, bars.high[t])):
+            for _, _, i in trigger.pop_fired(price):
+                self.gaps[i][3] = t
+                self.touched.add(i)
+
+        i = t - 1
+        if i < 1:
+            return
+        if bars.close[i] > bars.open[i] and bars.high[i - 1] < bars.low[i + 1]:
+            self.gaps[i] = [1, bars.low[i + 1], bars.high[i - 1], 0]
+            self.bullish.push(bars.low[i + 1], i)
+        elif bars.close[i] < bars.open[i] and bars.low[i - 1] > bars.high[i + 1]:
+            self.gaps[i] = [-1, bars.low[i - 1], bars.high[i + 1], 0]
+            self.bearish.push(bars.high[i + 1], i)
+        else:
+            return
+        self.touched.add(i)
+
+    def keys(self):
+        return self.gaps.keys()
+
+    def record(self, i):
+        gap = self.gaps.get(i)
+        if gap is None:
+            return None
+        return {"FVG": float(gap[0]), "Top": float(gap[1]), "Bottom": float(gap[2]), "MitigatedIndex": float(gap[3])}
+
+
+# --- Order blocks ---
+
+class _Tail:
+    """Copy-on-write view of an order block pass for the unsettled bars."""
+
+    def __init__(self, intact, breakers):
+        self.blocks = {}
+        self.crossed = set()
+        self.intact = intact
+        self.breakers = breakers
+        self.popped = []
+
+    def rollback(self):
+        """Give the committed triggers back the entries the replay took from them."""
+        for trigger, entries in self.popped:
+            trigger.restore(entries)
+        self.popped = []
+
+
+class _OrderBlockPass:
+    """One direction of ``smc.ob`` (1 bullish, -1 bearish), advanced bar by bar."""
+
+    def __init__(self, bars, side):
+        self.bars = bars
+        self.side = side
+        self.blocks = {}
+        self.crossed = set()
+        self.intact = self._intact_trigger()
+        self.breakers = self._breaker_trigger()
+        self.done = -1
+        self.changed = set()
+
+    def _intact_trigger(self):
+        # Bullish blocks break when a low goes below them, bearish ones when a high goes above
+        return PriceTrigger(rising=self.side < 0)
+
+    def _breaker_trigger(self):
+        return PriceTrigger(rising=self.side > 0)
+
+    def new_tail(self):
+        return _Tail(self._intact_trigger(), self._breaker_trigger())
+
+    def block(self, i, tail=None):
+        if tail is not None and i in tail.blocks:
+            return tail.blocks[i]
+        return self.blocks.get(i)
+
+    def _writable(self, i, tail):
+        if tail is None:
+            self.changed.add(i)
+            return self.blocks[i]
+        if i not in tail.blocks:
+            tail.blocks[i] = dict(self.blocks[i])
+        return tail.blocks[i]
+
+    def _fired(self, trigger, tail_trigger, price, tail):
+        entries = trigger.pop_fired(price)
+        if tail is None:
+            return [entry[2] for entry in entries]
+        tail.popped.append((trigger, entries))
+        return [entry[2] for entry in entries + tail_trigger.pop_fired(price)]
+
+    def step(self, t, swing, tail=None):
+        """Process bar ``t``; ``swing`` is the last same-side swing before it."""
+        bars = self.bars
+        bull = self.side > 0
+
+        # Breakers are dropped once price trades back through them
+        for i in self._fired(self.breakers, tail and tail.breakers, bars.high[t] if bull else bars.low[t], tail):
+            if self.block(i, tail)["stage"] == BREAKER:
+                self._writable(i, tail)["stage"] = RESET
+        for i in self._fired(self.intact, tail and tail.intact, bars.low[t] if bull else bars.high[t], tail):
+            if self.block(i, tail)["stage"] == INTACT:
+                block = self._writable(i, tail)
+                block["stage"] = BREAKER
+                block["mitigated"] = t - 1 if bull else t
+                (tail.breakers if tail is not None else self.breakers).push(
+                    block["top"] if bull else block["bottom"], i)
+
+        if swing is None or swing in self.crossed or (tail is not None and swing in tail.crossed):
+            return
+        close = bars.close[t]
+        if not (close > bars.high[swing] if bull else close < bars.low[swing]):
+            return
+        (tail.crossed if tail is not None else self.crossed).add(swing)
+
+        if t - swing > 1:
+            # The most extreme candle since the swing, the last one on ties
+            segment = bars.low[swing + 1:t] if bull else bars.high[swing + 1:t]
+            i = t - 1 - segment[::-1].index(min(segment) if bull else max(segment))
+            top, bottom = bars.high[i], bars.low[i]
+        else:
+            i = t - 1
+            # smc keeps the previous candle's range upside down for bullish blocks here
+            top, bottom = (bars.low[i], bars.high[i]) if bull else (bars.high[i], bars.low[i])
+
+        volume = bars.volume
+        recent = volume[t] + (volume[t - 1] if t >= 1 else 0.0)
+        older = volume[t - 2] if t >= 2 else 0.0
+        high_volume, low_volume = (np.float32(recent), np.float32(older)) if bull else (np.float32(older), np.float32(recent))
+        max_volume = max(high_volume, low_volume)
+        block = {
+            "created": t,
+            "top": float(np.float32(top)),
+            "bottom": float(np.float32(bottom)),
+            "volume": float(np.float32(recent + older)),
+            "percentage": float(np.float32(min(high_volume, low_volume) / max_volume * 100.0 if max_volume != 0 else 100.0)),
+            "mitigated": 0,
+            "stage": INTACT
+        }
+        if tail is None:
+            self.blocks[i] = block
+            self.changed.add(i)
+            self.intact.push(block["bottom"] if bull else block["top"], i)
+        else:
+            tail.blocks[i] = block
+            tail.intact.push(block["bottom"] if bull else block["top"], i)
+
+
+class _OrderBlocks:
+    """``smc.ob``: both passes committed up to the current swing extreme, the rest replayed."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.passes = {1: _OrderBlockPass(engine, 1), -1: _OrderBlockPass(engine, -1)}
+        self.tails = {1: None, -1: None}
+        # Indices holding both a bullish and a bearish block; smc lets them share a breaker flag
+        self.collisions = set()
+        self._inherited = {}
+        self.touched = set()
+
+    def update(self):
+        engine = self.engine
+        n = len(engine.high)
+        frontier = engine.open_swing[0] if engine.open_swing is not None else 0
+        self.touched.update(self.collisions)
+
+        for side, ob_pass in self.passes.items():
+            if self.tails[side] is not None:
+                self.touched.update(self.tails[side].blocks)
+            for t in range(ob_pass.done + 1, frontier + 1):
+                ob_pass.step(t, engine.last_swing(side, t))
+            ob_pass.done = max(ob_pass.done, frontier)
+
+            tail = ob_pass.new_tail()
+            for t in range(ob_pass.done + 1, n):
+                ob_pass.step(t, engine.last_swing(side, t, tentative=True), tail)
+            tail.rollback()
+            self.tails[side] = tail
+            self.touched.update(tail.blocks)
+            self.touched.update(ob_pass.changed)
+            ob_pass.changed.clear()
+
+        bull, bear = self.passes[1], self.passes[-1]
+        for i in self.touched:
+            if i in bull.blocks and i in bear.blocks:
+                self.collisions.add(i)
+
+    def _inherited_reset(self, i, block):
+        # A bearish block sharing a bullish breaker's flag is dropped as soon as a low clears it
+        key = (i, block["created"], block["bottom"])
+        scan = self._inherited.get(key)
+        if scan is None:
+            scan = self._inherited[key] = _Scan(block["created"] + 1)
+        bottom = block["bottom"]
+        return scan.advance(self.engine.low, lambda low: low < bottom)
+
+    def keys(self):
+        keys = set()
+        for side, ob_pass in self.passes.items():
+            keys.update(ob_pass.blocks)
+            keys.update(self.tails[side].blocks)
+        return keys
+
+    def record(self, i):
+        bull = self.passes[1].block(i, self.tails[1])
+        bear = self.passes[-1].block(i, self.tails[-1])
+        if bear is not None:
+            if bull is not None and bull["stage"] != INTACT:
+                if self._inherited_reset(i, bear) is not None:
+                    return None
+                mitigated = bull["mitigated"] if bull["stage"] == BREAKER else 0
+            elif bear["stage"] == RESET:
+                return None
+            else:
+                mitigated = bear["mitigated"]
+            return self._format(-1, bear, mitigated)
+        if bull is not None and bull["stage"] != RESET:
+            return self._format(1, bull, bull["mitigated"])
+        return None
+
+    @staticmethod
+    def _format(side, block, mitigated):
+        return {
+            "OB": float(side),
+            "Top": block["top"],
+            "Bottom": block["bottom"],
+            "OBVolume": block["volume"],
+            "MitigatedIndex": float(mitigated),
+            "Percentage": block["percentage"]
+        }
+
+
+# --- Liquidity ---
+
+class _LiquidityPools:
+    """``smc.liquidity`` for one side: confirmed swings grouped into pools, the
+    tentative swing attached on top."""
+
+    def __init__(self, engine, side):
+        self.engine = engine
+        self.side = side
+        self.reset(0.0)
+        self.touched = set()
+
+    def reset(self, pip):
+        self.pip = pip
+        self.heads = {}
+        self.slots = _FirstAtMost()
+        self.slot_heads = []
+        self.sweeps = PriceTrigger(rising=self.side > 0, inclusive=True)
+        self.swept = []
+        self.overlay = None
+
+    def _sweep_price(self, head):
+        return head["high"] if self.side > 0 else head["low"]
+
+    def _key(self, head):
+        # Unswept pools only need the far side of their range checked
+        return head["low"] if self.side > 0 else -head["high"]
+
+    def _capturing_head(self, position, level):
+        """The first pool that would take a swing at ``position``, or None."""
+        slot = -1
+        while True:
+            slot = self.slots.first_at_most(level if self.side > 0 else -level, slot + 1)
+            if slot is None:
+                return None
+            head = self.slot_heads[slot]
+            if head["swept"] and position >= head["swept"]:
+                continue
+            if head["low"] <= level <= head["high"]:
+                return head
+
+    def add(self, swing, reach=None):
+        """Group a confirmed swing into an existing pool or start a new one.
+
+        ``reach`` is a ``_FirstReach`` over the side's prices, used to find
+        the sweep of a new pool when the whole history is being regrouped.
+        """
+        position, _, level = swing
+        # Later swings come after this one, so pools swept by now are done
+        self.prune(position)
+        head = self._capturing_head(position, level)
+        if head is not None:
+            head["levels"].append(level)
+            head["end"] = position
+            self.touched.add(head["position"])
+            return
+
+        head = {
+            "position": position,
+            "levels": [level],
+            "end": position,
+            "low": level - self.pip,
+            "high": level + self.pip,
+            "swept": 0
+        }
+        self.heads[position] = head
+        head["slot"] = self.slots.append(self._key(head))
+        self.slot_heads.append(head)
+
+        price = self._sweep_price(head)
+        t = len(self.engine.high) - 1
+        if reach is not None:
+            swept = reach.first(position + 1, price if self.side > 0 else -price)
+        else:
+            prices = self.engine.high if self.side > 0 else self.engine.low
+            swept = next((c for c in range(position + 1, t + 1)
+                          if (prices[c] >= price if self.side > 0 else prices[c] <= price)), None)
+        if swept is None:
+            self.sweeps.push(price, position)
+        else:
+            self._mark_swept(head, swept)
+
+    def _mark_swept(self, head, t):
+        head["swept"] = t
+        heapq.heappush(self.swept, (t, head["position"]))
+        self.touched.add(head["position"])
+
+    def sweep(self, t):
+        price = self.engine.high[t] if self.side > 0 else self.engine.low[t]
+        for _, _, position in self.sweeps.pop_fired(price):
+            self._mark_swept(self.heads[position], t)
+
+    def prune(self, limit):
+        """Stop offering pools swept at or before ``limit`` to later swings."""
+        while self.swept and self.swept[0][0] <= limit:
+            _, position = heapq.heappop(self.swept)
+            self.slots.set(self.heads[position]["slot"], float("inf"))
+
+    def attach(self, swing):
+        """Attach the tentative swing (open extreme or forced last bar) without committing it."""
+        if self.overlay is not None:
+            self.touched.add(self.overlay[0])
+        self.overlay = None
+        if swing is not None:
+            head = self._capturing_head(swing[0], swing[2])
+            if head is not None:
+                self.overlay = (head["position"], swing[0], swing[2])
+                self.touched.add(head["position"])
+
+    def record(self, position):
+        head = self.heads.get(position)
+        if head is None:
+            return None
+        levels, end = head["levels"], head["end"]
+        if self.overlay is not None and self.overlay[0] == position:
+            levels, end = levels + [self.overlay[2]], self.overlay[1]
+        if len(levels) < 2:
+            return None
+        return {
+            "Liquidity": float(self.side),
+            "Level": float(np.float32(sum(levels) / len(levels))),
+            "End": float(np.float32(end)),
+            "Swept": float(np.float32(head["swept"]))
+        }
+
+
+class _Liquidity:
+    def __init__(self, engine):
+        self.engine = engine
+        self.sides = {1: _LiquidityPools(engine, 1), -1: _LiquidityPools(engine, -1)}
+        self.touched = set()
+        self.deferred = False
+
+    def update(self, confirmed, defer=False):
+        engine = self.engine
+        t = len(engine.high) - 1
+        pip = (engine.max_high - engine.min_low) * engine.range_percent
+        if defer or self.deferred or pip != self.sides[1].pip:
+            if defer:
+                self.deferred = True
+                return
+            self.rebuild(pip)
+        else:
+            for pools in self.sides.values():
+                pools.sweep(t)
+            for swing in confirmed:
+                self.sides[swing[1]].add(swing)
+
+        tentative = engine.tentative_swings()
+        for side, pools in self.sides.items():
+            if engine.open_swing is not None:
+                pools.prune(engine.open_swing[0])
+            pools.attach(next((swing for swing in tentative if swing[1] == side), None))
+            self.touched.update(pools.touched)
+            pools.touched.clear()
+
+    def rebuild(self, pip):
+        """Regroup every confirmed swing, as smc does whenever the history's range changes."""
+        self.deferred = False
+        reach = {1: _FirstReach(self.engine.high), -1: _FirstReach(-np.asarray(self.engine.low))}
+        for pools in self.sides.values():
+            self.touched.update(pools.heads)
+            pools.reset(pip)
+        for swing in self.engine.swings:
+            self.sides[swing[1]].add(swing, reach[swing[1]])
+
+    def keys(self):
+        return set(self.sides[1].heads) | set(self.sides[-1].heads)
+
+    def record(self, position):
+        for pools in self.sides.values():
+            record = pools.record(position)
+            if record is not None:
+                return record
+        return None
+
+
+# --- Market structure ---
+
+def _classify(window):
+    """smc.bos_choch's verdict for the second of four consecutive swings."""
+    (_, sa, a), (_, sb, b), (_, sc, c), (_, sd, d) = window
+    sides = (sa, sb, sc, sd)
+    if sides == (-1, 1, -1, 1):
+        if a < c < b < d:
+            return 1, "BOS"
+        if d > b > a > c:
+            return 1, "CHOCH"
+    elif sides == (1, -1, 1, -1):
+        if a > c > b > d:
+            return -1, "BOS"
+        if d < b < a < c:
+            return -1, "CHOCH"
+    return None
+
+
+class _Structure:
+    """``smc.bos_choch``: events need the two swings after them, only broken
+    events count, and an event is dropped when a later one breaks first."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.events = {}
+        self.bullish = PriceTrigger(rising=True)
+        self.bearish = PriceTrigger(rising=False)
+        self.kept = []
+        self.last_kept = -1
+        self.scans = {}
+        self.tail = {}
+        self.hidden = set()
+        self.touched = set()
+
+    def _event(self, window):
+        verdict = _classify(window)
+        if verdict is None:
+            return None
+        position, _, level = window[1]
+        return {"position": position, "side": verdict[0], "kind": verdict[1],
+                "level": float(np.float32(level)), "broken": 0}
+
+    def _scan(self, event, scans):
+        key = (event["position"], event["side"])
+        scan = self.scans.get(key) or _Scan(event["position"] + 2)
+        scans[key] = scan
+        level = event["level"]
+        test = (lambda close: close > level) if event["side"] > 0 else (lambda close: close < level)
+        return scan.advance(self.engine.close, test)
+
+    def update(self, confirmed):
+        engine = self.engine
+        t = len(engine.close) - 1
+        breaks = []
+        for trigger in (self.bullish, self.bearish):
+            for _, _, position in trigger.pop_fired(engine.close[t]):
+                self.events[position]["broken"] = t
+                breaks.append(self.events[position])
+
+        swings = engine.swings
+        for m in range(len(swings) - len(confirmed), len(swings)):
+            if m < 3:
+                continue
+            event = self._event(swings[m - 3:m + 1])
+            if event is None:
+                continue
+            self.events[event["position"]] = event
+            broken = self._scan(event, {})
+            if broken is None:
+                (self.bullish if event["side"] > 0 else self.bearish).push(event["level"], event["position"])
+            else:
+                event["broken"] = broken
+                breaks.append(event)
+
+        # A break drops every earlier event that broke at the same bar or later
+        for event in sorted(breaks, key=lambda e: (e["broken"], e["position"])):
+            self.touched.add(event["position"])
+            if event["position"] > self.last_kept:
+                while self.kept and self.kept[-1]["broken"] >= event["broken"]:
+                    dropped = self.kept.pop()
+                    dropped["kept"] = False
+                    self.touched.add(dropped["position"])
+                event["kept"] = True
+                self.kept.append(event)
+                self.last_kept = event["position"]
+
+        self._update_tail(swings[-3:] + engine.tentative_swings())
+
+    def _update_tail(self, recent):
+        """Events whose windows still include the open extreme or the forced last bar."""
+        self.touched.update(self.tail)
+        self.touched.update(self.hidden)
+        scans, tail = {}, {}
+        for k in range(len(recent) - 3):
+            event = self._event(recent[k:k + 4])
+            if event is not None:
+                event["broken"] = self._scan(event, scans) or 0
+                tail[event["position"]] = event
+        self.scans = scans
+
+        earliest = None
+        for position in sorted(tail, reverse=True):
+            event = tail[position]
+            if not event["broken"]:
+                event["kept"] = False
+                continue
+            event["kept"] = earliest is None or event["broken"] < earliest
+            earliest = event["broken"] if earliest is None else min(earliest, event["broken"])
+        self.tail = tail
+
+        self.hidden = set()
+        if earliest is not None:
+            for event in reversed(self.kept):
+                if event["broken"] < earliest:
+                    break
+                self.hidden.add(event["position"])
+        self.touched.update(self.tail)
+        self.touched.update(self.hidden)
+
+    def keys(self):
+        return set(self.events) | set(self.tail)
+
+    def record(self, position):
+        event = self.tail.get(position)
+        if event is not None:
+            if not event["kept"]:
+                return None
+        else:
+            event = self.events.get(position)
+            if event is None or not event.get("kept") or position in self.hidden:
+                return None
+        if event["level"] == 0:
+            # smc reads a zero level as "no event", though the event still breaks others
+            return None
+        return {
+            "BOS": float(event["side"]) if event["kind"] == "BOS" else None,
+            "CHOCH": float(event["side"]) if event["kind"] == "CHOCH" else None,
+            "Level": event["level"],
+            "BrokenIndex": float(event["broken"])
+        }
+
+
+# --- Engine ---
+
+class IncrementalICT:
+    """ICT state for one bar series, updated one bar at a time."""
+
+    def __init__(self, swing_length=2, range_percent=0.01, history=500):
+        self.swing_length = swing_length
+        self.range_percent = range_percent
+        self.open, self.high, self.low, self.close, self.volume = [], [], [], [], []
+        self.timestamps = []
+        self.max_high = float("-inf")
+        self.min_low = float("inf")
+
+        self.swings = []  # confirmed swings (position, side, level), starting with the forced bar 0
+        self.swing_positions = {1: [], -1: []}
+        self.open_swing = None  # extreme of the current run of same-side candidates
+
+        self.detectors = {
+            "order_blocks": _OrderBlocks(self),
+            "fair_value_gaps": _FairValueGaps(self),
+            "liquidity_zones": _Liquidity(self),
+            "market_structure_shifts": _Structure(self)
+        }
+        self.published = {category: {} for category in CATEGORIES}
+        self.changelog = deque(maxlen=history)
+
+    def __len__(self):
+        return len(self.high)
+
+    @property
+    def last_timestamp(self):
+        return self.timestamps[-1] if self.timestamps else None
+
+    # --- Swings ---
+
+    def _update_swings(self):
+        """Classify the candidate the new bar completes; returns newly confirmed swings."""
+        n = len(self.high)
+        length = self.swing_length
+        i = n - 1 - length
+        if i < 2 * length - 1:
+            return []
+        if self.high[i] == max(self.high[i - length + 1:i + length + 1]):
+            candidate = (i, 1, self.high[i])
+        elif self.low[i] == min(self.low[i - length + 1:i + length + 1]):
+            candidate = (i, -1, self.low[i])
+        else:
+            return []
+
+        if self.open_swing is None:
+            # smc forces bar 0 to the opposite side of the first swing
+            side = -candidate[1]
+            confirmed = [(0, side, self.high[0] if side > 0 else self.low[0])]
+        elif self.open_swing[1] == candidate[1]:
+            # Only the extreme of a run survives, the earliest one on ties
+            side, level = candidate[1], candidate[2]
+            if level > self.open_swing[2] if side > 0 else level < self.open_swing[2]:
+                self.open_swing = candidate
+            return []
+        else:
+            confirmed = [self.open_swing]
+
+        self.open_swing = candidate
+        for swing in confirmed:
+            self.swings.append(swing)
+            self.swing_positions[swing[1]].append(swing[0])
+        return confirmed
+
+    def tentative_swings(self):
+        """Swings that later bars can still move: the open extreme and the forced last bar."""
+        if self.open_swing is None:
+            return []
+        t = len(self.high) - 1
+        side = -self.open_swing[1]
+        return [self.open_swing, (t, side, self.high[t] if side > 0 else self.low[t])]
+
+    def last_swing(self, side, t, tentative=False):
+        """Position of the last swing of ``side`` before bar ``t``."""
+        if tentative and self.open_swing is not None and self.open_swing[1] == side and self.open_swing[0] < t:
+            return self.open_swing[0]
+        positions = self.swing_positions[side]
+        k = bisect_left(positions, t)
+        return positions[k - 1] if k else None
+
+    # --- Bars ---
+
+    def _advance(self, bar, defer=False):
+        self.open.append(float(bar["open"]))
+        self.high.append(float(bar["high"]))
+        self.low.append(float(bar["low"]))
+        self.close.append(float(bar["close"]))
+        self.volume.append(float(bar["volume"]))
+        self.timestamps.append(bar.get("timestamp"))
+        self.max_high = max(self.max_high, self.high[-1])
+        self.min_low = min(self.min_low, self.low[-1])
+
+        confirmed = self._update_swings()
+        self.detectors["fair_value_gaps"].update()
+        self.detectors["order_blocks"].update()
+        self.detectors["market_structure_shifts"].update(confirmed)
+        self.detectors["liquidity_zones"].update(confirmed, defer=defer)
+
+    def update(self, bar):
+        """Add one bar (a mapping with open/high/low/close/volume and an
+        optional timestamp) and return the zones and events it changed."""
+        self._advance(bar)
+        return self._publish()
+
+    def extend(self, bars):
+        """Add many bars and publish their changes as one update."""
+        bars = list(bars)
+        if not bars:
+            return None
+        for bar in bars[:-1]:
+            self._advance(bar, defer=True)
+            for detector in self.detectors.values():
+                detector.touched.clear()
+        self._advance(bars[-1])
+        return self._publish(full=True)
+
+    def _publish(self, full=False):
+        t = len(self.high) - 1
+        changes = {"index": t, "timestamp": self.timestamps[t]}
+        added = {}
+        for category, detector in self.detectors.items():
+            published = self.published[category]
+            added[category] = set()
+            updated, removed = [], []
+            if full:
+                detector.touched.update(detector.keys())
+                detector.touched.update(published)
+            for i in sorted(detector.touched):
+                record = detector.record(i)
+                if record == published.get(i):
+                    continue
+                if record is None:
+                    del published[i]
+                    removed.append(i)
+                else:
+                    if i not in published:
+                        added[category].add(i)
+                    published[i] = record
+                    updated.append({"index": i, "timestamp": self.timestamps[i], **record})
+            detector.touched.clear()
+            changes[category] = {"updated": updated, "removed": removed}
+        self.changelog.append((changes, added))
+        return changes
+
+    # --- Results ---
+
+    def snapshot(self):
+        """Current zones and events, in the shape ``run_ict_analysis`` returns."""
+        return {category: [self.published[category][i] for i in sorted(self.published[category])]
+                for category in CATEGORIES}
+
+    def changes_since(self, timestamp):
+        """Changes published after the bar with ``timestamp``, merged per zone,
+        or None when that bar is no longer in the changelog."""
+        if timestamp == self.last_timestamp:
+            return {category: {"updated": [], "removed": []} for category in CATEGORIES}
+        entries = list(self.changelog)
+        start = next((k + 1 for k, (changes, _) in enumerate(entries) if changes["timestamp"] == timestamp), None)
+        if start is None:
+            return None
+        result = {}
+        for category in CATEGORIES:
+            merged, new = {}, set()
+            for changes, added in entries[start:]:
+                # Zones that appear and disappear again within the window are left out
+                new.update(added[category] - merged.keys())
+                for record in changes[category]["updated"]:
+                    merged[record["index"]] = record
+                for i in changes[category]["removed"]:
+                    merged[i] = None
+            result[category] = {
+                "updated": [merged[i] for i in sorted(merged) if merged[i] is not None],
+                "removed": [i for i in sorted(merged) if merged[i] is None and i not in new]
+            }
+        return result
@@ -0,0 +1,449 @@
+"""
+Native ICT pipeline.
+
+Runs the same detectors as the smc package (swing highs/lows, order blocks,
+fair value gaps, liquidity and BOS/CHoCH) with the same results, but as
+NumPy passes over one shared, read-only set of OHLCV columns. Swings are
+computed once and handed to every detector, and no DataFrame is built or
+copied on the way.
+
+smc answers "when is this level first crossed?" with a fresh scan of the
+rest of the series for every zone, which is quadratic on long histories.
+Here all of a detector's zones are resolved together by ``first_crossing``,
+which checks the rest of each zone's own block and then jumps straight to
+the first block whose extreme reaches the level.
+"""
+
+import json
+from bisect import bisect_left
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+BLOCK = 64
+NEAR = 8
+QUERY_CHUNK = 8192
+
+Swings = namedtuple("Swings", ["positions", "sides", "levels"])
+
+
+# --- Columns ---
+
+def ohlc_view(ohlc_data):
+    """Read-only float64 columns from column lists, row records or a DataFrame."""
+    if isinstance(ohlc_data, str):
+        ohlc_data = json.loads(ohlc_data)
+    if isinstance(ohlc_data, list):
+        ohlc_data = {field: [row[field] for row in ohlc_data] for field in FIELDS}
+    view = {}
+    for field in FIELDS:
+        # A read-only view: float64 input (such as bar store columns) is not copied
+        values = np.asarray(ohlc_data[field], dtype=np.float64).view()
+        values.flags.writeable = False
+        view[field] = values
+    return view
+
+
+# --- First crossings ---
+
+class _BlockMaxima:
+    """Per-block maxima of a series plus a sparse table over them."""
+
+    def __init__(self, values):
+        self.values = values
+        starts = np.arange(0, len(values), BLOCK)
+        levels = [np.maximum.reduceat(values, starts) if len(values) else np.empty(0)]
+        width = 1
+        while 2 * width <= len(levels[0]):
+            levels.append(np.maximum(levels[-1][:-width], levels[-1][width:]))
+            width *= 2
+        self.levels = levels
+
+    def first_block(self, blocks, thresholds):
+        """For each query, the first block >= ``blocks`` whose maximum reaches the threshold."""
+        blocks = blocks.copy()
+        for k in range(len(self.levels) - 1, -1, -1):
+            level = self.levels[k]
+            inside = np.flatnonzero(blocks < len(level))
+            below = inside[level[blocks[inside]] < thresholds[inside]]
+            blocks[below] += 1 << k
+        return blocks
+
+    def first_in_range(self, starts, stops, thresholds, width):
+        """First index in ``[starts, stops)`` reaching the threshold, or -1; ranges are at most ``width`` long."""
+        n = len(self.values)
+        index = starts[:, None] + np.arange(width)
+        hits = (index < stops[:, None]) & (self.values[np.minimum(index, n - 1)] >= thresholds[:, None])
+        return np.where(hits.any(axis=1), index[np.arange(len(index)), hits.argmax(axis=1)], -1)
+
+
+def first_crossing(values, starts, levels, rising, inclusive=False, stops=None):
+    """First index ``j`` with ``starts <= j < stops`` where ``values[j]`` crosses
+    the level, for every query at once; -1 where it never does.
+
+    With ``rising`` a value crosses by going above the level, otherwise by
+    going below; ``inclusive`` counts touching the level as crossing.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.int64)
+    levels = np.asarray(levels, dtype=np.float64)
+    n = len(values)
+    result = np.full(len(starts), -1, dtype=np.int64)
+    if not len(starts) or not n:
+        return result
+
+    # Every query becomes "first value >= threshold" over one orientation of the series
+    if not rising:
+        values, levels = -values, -levels
+    thresholds = levels if inclusive else np.nextafter(levels, np.inf)
+    maxima = _BlockMaxima(values)
+
+    for lo in range(0, len(starts), QUERY_CHUNK):
+        chunk_starts = starts[lo:lo + QUERY_CHUNK]
+        queries = np.flatnonzero(chunk_starts < n)
+        begin, threshold = chunk_starts[queries], thresholds[lo:lo + QUERY_CHUNK][queries]
+
+        # Most levels are crossed within a few bars; the rest of the start's
+        # block comes next, then the first later block whose maximum gets there
+        near = np.minimum(begin + NEAR, n)
+        found = maxima.first_in_range(begin, near, threshold, NEAR)
+        rest = np.flatnonzero(found < 0)
+        block_end = np.minimum((begin[rest] // BLOCK + 1) * BLOCK, n)
+        found[rest] = maxima.first_in_range(near[rest], block_end, threshold[rest], BLOCK)
+
+        rest = rest[found[rest] < 0]
+        later = maxima.first_block(begin[rest] // BLOCK + 1, threshold[rest])
+        reached = later * BLOCK < n
+        rest, later = rest[reached], later[reached]
+        found[rest] = maxima.first_in_range(later * BLOCK, np.minimum(later * BLOCK + BLOCK, n), threshold[rest], BLOCK)
+        result[lo + queries] = found
+
+    if stops is not None:
+        result[result >= np.asarray(stops)] = -1
+    return result
+
+
+# --- Swings ---
+
+def swing_points(view, swing_length=2):
+    """``smc.swing_highs_lows`` as sorted positions, sides (1 high, -1 low) and levels."""
+    high, low = view["high"], view["low"]
+    n = len(high)
+    width = 2 * swing_length
+    positions = np.arange(2 * swing_length - 1, n - swing_length)
+    if not len(positions):
+        return Swings(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int8), np.empty(0))
+
+    # Each candidate is compared with the window from swing_length - 1 bars before to swing_length after
+    windows = positions - swing_length + 1
+    is_high = high[positions] == sliding_window_view(high, width).max(axis=1)[windows]
+    is_low = ~is_high & (low[positions] == sliding_window_view(low, width).min(axis=1)[windows])
+    positions = positions[is_high | is_low]
+    sides = np.where(is_high[is_high | is_low], 1, -1).astype(np.int8)
+    if not len(positions):
+        return Swings(positions, sides, np.empty(0))
+
+    # A run of same-side candidates keeps only its extreme, the earliest one on ties
+    runs = np.concatenate(([0], np.cumsum(sides[1:] != sides[:-1])))
+    extremes = np.where(sides > 0, high[positions], -low[positions])
+    order = np.lexsort((positions, -extremes, runs))
+    _, first = np.unique(runs[order], return_index=True)
+    keep = np.sort(order[first])
+    positions, sides = positions[keep], sides[keep]
+
+    # The first and last bars are forced to the opposite side of their neighbours
+    positions = np.concatenate(([0], positions, [n - 1]))
+    sides = np.concatenate(([-sides[0]], sides, [-sides[-1]])).astype(np.int8)
+    levels = np.where(sides > 0, high[positions], low[positions])
+    for array in (positions, sides, levels):
+        array.flags.writeable = False
+    return Swings(positions, sides, levels)
+
+
+# --- Fair value gaps ---
+
+def fair_value_gaps(view):
+    """``smc.fvg`` as index, FVG, Top, Bottom and MitigatedIndex columns."""
+    o, h, l, c = view["open"], view["high"], view["low"], view["close"]
+    n = len(c)
+    if n < 3:
+        empty = np.empty(0)
+        return {"index": np.empty(0, dtype=np.int64), "FVG": empty, "Top": empty, "Bottom": empty,
+                "MitigatedIndex": empty}
+
+    bullish = (h[:-2] < l[2:]) & (c[1:-1] > o[1:-1])
+    bearish = (l[:-2] > h[2:]) & (c[1:-1] < o[1:-1])
+    index = np.flatnonzero(bullish | bearish) + 1
+    side = np.where(c[index] > o[index], 1.0, -1.0)
+    top = np.where(side > 0, l[index + 1], l[index - 1])
+    bottom = np.where(side > 0, h[index - 1], h[index + 1])
+
+    # Bullish gaps fill when a low reaches the top, bearish ones when a high reaches the bottom
+    mitigated = np.zeros(len(index), dtype=np.int64)
+    for sign, values, levels in ((1, l, top), (-1, h, bottom)):
+        mask = side == sign
+        mitigated[mask] = first_crossing(values, index[mask] + 2, levels[mask], rising=sign < 0, inclusive=True)
+    mitigated[mitigated < 0] = 0
+    return {"index": index, "FVG": side, "Top": top, "Bottom": bottom, "MitigatedIndex": mitigated.astype(np.float64)}
+
+
+# --- Order blocks ---
+
+def _last_extreme(values, starts, stops, lowest):
+    """Index of the last minimum (or maximum) of ``values[start:stop]`` for each segment."""
+    lengths = stops - starts
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    segment = np.repeat(np.arange(len(starts)), lengths)
+    index = np.arange(lengths.sum()) - offsets[segment] + starts[segment]
+    segment_values = values[index]
+    reduce = np.minimum if lowest else np.maximum
+    extreme = reduce.reduceat(segment_values, offsets)
+    return np.maximum.reduceat(np.where(segment_values == extreme[segment], index, -1), offsets)
+
+
+def _order_block_side(view, swings, side):
+    """One direction of ``smc.ob``: blocks keyed by index, before the two directions are merged."""
+    o, h, l, c, v = (view[field] for field in FIELDS)
+    n = len(c)
+    bull = side > 0
+    swing_positions = swings.positions[swings.sides == side]
+    if not len(swing_positions):
+        return None
+
+    # A swing is the last one of its side for the bars up to the next one; it creates
+    # a block on the first close beyond it in that stretch
+    stops = np.append(swing_positions[1:] + 1, n)
+    levels = h[swing_positions] if bull else l[swing_positions]
+    created = first_crossing(c, swing_positions + 1, levels, rising=bull, stops=stops)
+    crossed = created >= 0
+    swing_positions, created = swing_positions[crossed], created[crossed]
+
+    index = created - 1
+    # smc keeps the previous candle's range upside down for bullish blocks here
+    top = (l if bull else h)[index]
+    bottom = (h if bull else l)[index]
+    spread = np.flatnonzero(created - swing_positions > 1)
+    if len(spread):
+        extreme = _last_extreme(l if bull else h, swing_positions[spread] + 1, created[spread], lowest=bull)
+        index[spread] = extreme
+        top[spread], bottom[spread] = h[extreme], l[extreme]
+
+    recent = v[created] + v[created - 1]
+    older = np.where(created >= 2, v[np.maximum(created - 2, 0)], 0.0)
+    volume = (recent + older).astype(np.float32)
+    high_volume, low_volume = (recent, older) if bull else (older, recent)
+    high_volume, low_volume = high_volume.astype(np.float32), low_volume.astype(np.float32)
+    max_volume = np.maximum(high_volume, low_volume)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = np.where(max_volume != 0, np.minimum(high_volume, low_volume) / max_volume * np.float32(100.0),
+                              np.float32(100.0)).astype(np.float32)
+    top, bottom = top.astype(np.float32), bottom.astype(np.float32)
+
+    # Price through the far side turns a block into a breaker; back through the
+    # near side drops it
+    breaker = first_crossing(l if bull else h, created + 1, bottom if bull else top, rising=not bull)
+    reset = np.full(len(index), -1, dtype=np.int64)
+    broke = breaker >= 0
+    reset[broke] = first_crossing(h if bull else l, breaker[broke] + 1,
+                                  (top if bull else bottom)[broke], rising=bull)
+    mitigated = np.where(broke, breaker - 1 if bull else breaker, 0)
+    return {"index": index, "created": created, "top": top, "bottom": bottom, "volume": volume,
+            "percentage": percentage, "breaker": broke, "reset": reset >= 0, "mitigated": mitigated}
+
+
+def order_blocks(view, swings):
+    """``smc.ob`` as index, OB, Top, Bottom, OBVolume, MitigatedIndex and Percentage columns."""
+    n = len(view["close"])
+    ob = np.zeros(n)
+    columns = {name: np.zeros(n, dtype=np.float32) for name in ("Top", "Bottom", "OBVolume", "Percentage")}
+    mitigated = np.zeros(n, dtype=np.int64)
+    breaker = np.zeros(n, dtype=bool)
+
+    bull = _order_block_side(view, swings, 1)
+    if bull is not None:
+        index = bull["index"]
+        live = ~bull["reset"]
+        ob[index[live]] = 1
+        for name, key in (("Top", "top"), ("Bottom", "bottom"), ("OBVolume", "volume"), ("Percentage", "percentage")):
+            columns[name][index[live]] = bull[key][live]
+        mitigated[index[live]] = bull["mitigated"][live]
+        breaker[index] = bull["breaker"]
+
+    bear = _order_block_side(view, swings, -1)
+    if bear is not None:
+        index = bear["index"]
+        live = ~bear["reset"]
+        # smc runs the bearish pass over the bullish pass's breaker flags; a bearish block
+        # on a bullish breaker starts out as a breaker and is dropped once a low clears it
+        inherited = breaker[index]
+        if inherited.any():
+            dropped = first_crossing(view["low"], bear["created"][inherited] + 1, bear["bottom"][inherited],
+                                     rising=False)
+            live[inherited] = dropped < 0
+        ob[index] = np.where(live, -1, 0)
+        for name, key in (("Top", "top"), ("Bottom", "bottom"), ("OBVolume", "volume"), ("Percentage", "percentage")):
+            columns[name][index] = bear[key]
+        mitigated[index[~inherited]] = bear["mitigated"][~inherited]
+
+    rows = np.flatnonzero(ob)
+    result = {"index": rows, "OB": ob[rows]}
+    for name in ("Top", "Bottom", "OBVolume"):
+        result[name] = columns[name][rows]
+    result["MitigatedIndex"] = mitigated[rows].astype(np.float64)
+    result["Percentage"] = columns["Percentage"][rows]
+    return result
+
+
+# --- Liquidity ---
+
+def liquidity(view, swings, range_percent=0.01):
+    """``smc.liquidity`` as index, Liquidity, Level, End and Swept columns."""
+    high, low = view["high"], view["low"]
+    pip = (high.max() - low.min()) * range_percent if len(high) else 0.0
+    columns = {name: [] for name in ("index", "Liquidity", "Level", "End", "Swept")}
+    for side in (1, -1):
+        mask = swings.sides == side
+        positions, levels = swings.positions[mask].tolist(), swings.levels[mask].tolist()
+        bull = side > 0
+        # The bar that sweeps each swing's range, as if it started a pool
+        swept = first_crossing(high if bull else low, swings.positions[mask] + 1,
+                               swings.levels[mask] + (pip if bull else -pip), rising=bull, inclusive=True)
+        sweeps = swept.tolist()
+
+        # Pools still open when a swing arrives are nested: each one's range lies
+        # beyond the next one's and is swept no earlier, so they form a stack and
+        # the swing joins the first pool whose near edge it reaches
+        total, count, end = levels[:], [1] * len(levels), positions[:]
+        stack, keys = [], []
+        for k, (position, level) in enumerate(zip(positions, levels)):
+            while stack and 0 <= sweeps[stack[-1]] <= position:
+                stack.pop()
+                keys.pop()
+            at = bisect_left(keys, -level if bull else level)
+            if at < len(stack):
+                pool = stack[at]
+                total[pool] += level
+                count[pool] += 1
+                end[pool] = position
+            else:
+                stack.append(k)
+                keys.append(-(level - pip) if bull else level + pip)
+
+        count = np.array(count)
+        pools = np.flatnonzero(count > 1)
+        columns["index"].append(swings.positions[mask][pools])
+        columns["Liquidity"].append(np.full(len(pools), side))
+        columns["Level"].append(np.array(total)[pools] / count[pools])
+        columns["End"].append(np.array(end)[pools])
+        columns["Swept"].append(np.maximum(swept[pools], 0))
+
+    index = np.concatenate(columns.pop("index"))
+    order = np.argsort(index, kind="stable")
+    result = {"index": index[order]}
+    for name, parts in columns.items():
+        result[name] = np.concatenate(parts)[order].astype(np.float32)
+    return result
+
+
+# --- Market structure ---
+
+def market_structure(view, swings):
+    """``smc.bos_choch`` (close breaks) as index, BOS, CHOCH, Level and BrokenIndex columns."""
+    close = view["close"]
+    positions, sides, levels = swings
+    if len(positions) < 4:
+        empty = np.empty(0)
+        return {"index": np.empty(0, dtype=np.int64), "BOS": empty, "CHOCH": empty, "Level": empty,
+                "BrokenIndex": empty}
+
+    # Every run of four consecutive swings classifies the second one
+    a, b, c, d = (levels[k:len(levels) - 3 + k] for k in range(4))
+    up = (sides[:-3] == -1) & (sides[1:-2] == 1) & (sides[2:-1] == -1) & (sides[3:] == 1)
+    down = (sides[:-3] == 1) & (sides[1:-2] == -1) & (sides[2:-1] == 1) & (sides[3:] == -1)
+    bos = np.where(up & (a < c) & (c < b) & (b < d), 1, np.where(down & (a > c) & (c > b) & (b > d), -1, 0))
+    choch = np.where(up & (d > b) & (b > a) & (a > c), 1, np.where(down & (d < b) & (b < a) & (a < c), -1, 0))
+    events = np.flatnonzero((bos != 0) | (choch != 0))
+    index = positions[events + 1]
+    direction = np.where(bos[events] != 0, bos[events], choch[events])
+    level = b[events].astype(np.float32)
+
+    broken = np.full(len(events), -1, dtype=np.int64)
+    for sign in (1, -1):
+        mask = direction == sign
+        broken[mask] = first_crossing(close, index[mask] + 2, level[mask], rising=sign > 0)
+
+    # An event only counts once broken, and not if a later event broke first;
+    # smc reads a level of exactly zero as "no event" but still lets it break
+    breaks = np.where(broken >= 0, broken, np.iinfo(np.int64).max)
+    later = np.append(np.minimum.accumulate(breaks[::-1])[::-1][1:], np.iinfo(np.int64).max)
+    keep = (broken >= 0) & (later > breaks) & (level != 0)
+    return {
+        "index": index[keep],
+        "BOS": np.where(bos[events][keep] != 0, bos[events][keep], np.nan),
+        "CHOCH": np.where(choch[events][keep] != 0, choch[events][keep], np.nan),
+        "Level": level[keep],
+        "BrokenIndex": broken[keep].astype(np.float64)
+    }
+
+
+# --- Pipeline ---
+
+def to_records(columns):
+    """Rows without the index and with NaN as None, as smc's ``to_dict`` gives them."""
+    names = [name for name in columns if name != "index"]
+    values = [columns[name].tolist() for name in names]
+    return [
+        {name: (None if value != value else value) for name, value in zip(names, row)}
+        for row in zip(*values)
+    ]
+
+
+def detect(ohlc_data, swing_length=2):
+    """All detectors over one shared view, as index-keyed NumPy columns per category."""
+    view = ohlc_view(ohlc_data)
+    swings = swing_points(view, swing_length)
+    return {
+        "order_blocks": order_blocks(view, swings),
+        "fair_value_gaps": fair_value_gaps(view),
+        "liquidity_zones": liquidity(view, swings),
+        "market_structure_shifts": market_structure(view, swings)
+    }
+
+
+def analyze(ohlc_data, swing_length=2):
+    """All detectors over one shared view, in the shape ``run_ict_analysis`` returns."""
+    return {category: to_records(columns) for category, columns in detect(ohlc_data, swing_length).items()}
+
+
+# --- Responses ---
+
+def columnar(columns, delta=False):
+    """A category as parallel lists, with NaN as None and optionally delta-encoded indices."""
+    index = np.asarray(columns["index"], dtype=np.int64)
+    result = {"index": (np.diff(index, prepend=0) if delta else index).tolist()}
+    for name, values in columns.items():
+        if name != "index":
+            result[name] = [None if value != value else value for value in values.tolist()]
+    return result
+
+
+def _rows(columns):
+    """Row tuples keyed by bar index, for comparing two runs."""
+    names = [name for name in columns if name != "index"]
+    values = zip(*(columns[name].tolist() for name in names))
+    return {i: tuple(None if value != value else value for value in row)
+            for i, row in zip(columns["index"].tolist(), values)}
+
+
+def changed(current, previous):
+    """Rows of ``current`` that are new or differ from ``previous``, plus the indices it dropped.
+
+    Returns the changed rows as columns in the same layout, and the removed indices.
+    """
+    before, after = _rows(previous), _rows(current)
+    keep = np.array([before.get(i) != row for i, row in after.items()], dtype=bool)
+    removed = sorted(set(before) - set(after))
+    return {name: values[keep] for name, values in current.items()}, removed
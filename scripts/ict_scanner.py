@@ -0,0 +1,323 @@
+"""
+Universe-wide ICT screener.
+
+``scan`` runs the native ICT detectors over many symbols and returns the
+ones that pass every filter, ranked. The bars are copied once into a single
+shared-memory block (one row per field, symbols laid end to end) and
+scanned by a process pool whose workers map that block instead of receiving
+pickled arrays; only the matches travel back.
+
+Filters are dicts such as::
+
+    {"kind": "fvg", "side": "bullish", "within_percent": 1}   # unmitigated bullish FVG within 1% of price
+    {"kind": "choch", "within_bars": 5}                        # CHoCH confirmed in the last 5 bars
+
+``kind`` is a zone (``fvg``, ``order_block``, ``liquidity``) or an event
+(``bos``, ``choch``). Zones must still be unmitigated (unswept, for
+liquidity) unless ``"unmitigated": false``. ``within_percent`` bounds the
+distance from the last close to the zone or event level, ``within_bars``
+how many bars ago the zone formed or the event was confirmed. Matches are
+ranked on each filter in turn: distance from price for zones, bars ago for
+events.
+
+``ScanCache`` keeps finished scans on disk until the next bar close, so a
+scheduled scan and on-demand requests for the same scan share one run.
+"""
+
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bar_store import BAR_COLUMNS
+from batch_fetcher import BatchFetcher
+from ict_pipeline import detect
+from ohlc_cache import interval_seconds, next_market_close
+
+# Zone kinds: (category, side column, column that is 0 while the zone is live)
+ZONES = {
+    "fvg": ("fair_value_gaps", "FVG", "MitigatedIndex"),
+    "order_block": ("order_blocks", "OB", "MitigatedIndex"),
+    "liquidity": ("liquidity_zones", "Liquidity", "Swept"),
+}
+EVENTS = {"bos": "BOS", "choch": "CHOCH"}
+SIDES = {"bullish": 1, "bearish": -1, "any": 0}
+
+# Named filter sets, used by the scheduled scans
+PRESETS = {
+    "bullish_fvg_near_price": [{"kind": "fvg", "side": "bullish", "within_percent": 1}],
+    "bearish_fvg_near_price": [{"kind": "fvg", "side": "bearish", "within_percent": 1}],
+    "bullish_choch": [{"kind": "choch", "side": "bullish", "within_bars": 5}],
+    "bearish_choch": [{"kind": "choch", "side": "bearish", "within_bars": 5}],
+}
+
+CHUNKS_PER_PROCESS = 4
+# Upstream publishes a closed bar shortly after the close; cached scans outlive it by this much
+SETTLE_SECONDS = 60
+
+DEFAULT_CACHE_DIR = os.environ.get("ICT_SCAN_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "tradepro-ai", "scans"
+)
+
+
+# --- Filters ---
+
+def parse_filters(filters):
+    """Filters with their defaults filled in; raises ValueError on a bad spec."""
+    if not isinstance(filters, list) or not filters:
+        raise ValueError("At least one filter is required")
+    parsed = []
+    for spec in filters:
+        kind = spec.get("kind") if isinstance(spec, dict) else None
+        if kind not in ZONES and kind not in EVENTS:
+            raise ValueError(f"Unknown filter kind: {kind}")
+        side = spec.get("side", "any")
+        if side not in SIDES:
+            raise ValueError(f"Unknown side: {side}")
+        within_percent, within_bars = spec.get("within_percent"), spec.get("within_bars")
+        if within_percent is not None and (isinstance(within_percent, bool)
+                                           or not isinstance(within_percent, (int, float)) or within_percent < 0):
+            raise ValueError("within_percent must be a non-negative number")
+        if within_bars is not None and (isinstance(within_bars, bool) or not isinstance(within_bars, int)
+                                        or within_bars < 1):
+            raise ValueError("within_bars must be a positive integer")
+        parsed.append({
+            "kind": kind,
+            "side": side,
+            "within_percent": None if within_percent is None else float(within_percent),
+            "within_bars": within_bars,
+            "unmitigated": bool(spec.get("unmitigated", True)) if kind in ZONES else False,
+        })
+    return parsed
+
+
+def _best_hit(found, columns, spec):
+    """The closest zone or event passing one filter, or None."""
+    kind = spec["kind"]
+    close = float(columns["close"][-1])
+    last = len(columns["close"]) - 1
+    if kind in ZONES:
+        category, side_name, live_name = ZONES[kind]
+        rows = found[category]
+        if kind == "liquidity":
+            top = bottom = rows["Level"]
+        else:
+            top, bottom = rows["Top"], rows["Bottom"]
+        keep = (rows[live_name] == 0) if spec["unmitigated"] else np.ones(len(rows["index"]), dtype=bool)
+        ages = last - rows["index"]
+    else:
+        rows = found["market_structure_shifts"]
+        side_name = EVENTS[kind]
+        top = bottom = rows["Level"]
+        keep = ~np.isnan(rows[side_name])
+        ages = last - rows["BrokenIndex"].astype(np.int64)
+
+    sides = np.nan_to_num(rows[side_name])
+    # Percent from the last close to the nearest edge; 0 when price is inside the zone
+    gap = np.maximum(np.maximum(bottom - close, close - top), 0)
+    distances = gap / abs(close) * 100 if close else np.full(len(gap), np.inf)
+
+    if SIDES[spec["side"]]:
+        keep &= sides == SIDES[spec["side"]]
+    if spec["within_percent"] is not None:
+        keep &= distances <= spec["within_percent"]
+    if spec["within_bars"] is not None:
+        keep &= ages < spec["within_bars"]
+    candidates = np.flatnonzero(keep)
+    if not len(candidates):
+        return None
+
+    ranks = distances if kind in ZONES else ages
+    best = candidates[np.lexsort((ages[candidates], ranks[candidates]))[0]]
+    index = int(rows["index"][best])
+    hit = {
+        "kind": kind,
+        "side": "bullish" if sides[best] > 0 else "bearish",
+        "index": index,
+        "timestamp": int(columns["timestamp"][index]),
+        "bars_ago": int(ages[best]),
+        "distance_percent": round(float(distances[best]), 4),
+    }
+    if kind in ("fvg", "order_block"):
+        hit.update(top=float(top[best]), bottom=float(bottom[best]))
+    else:
+        hit["level"] = float(top[best])
+    return hit
+
+
+def scan_series(columns, filters):
+    """One hit per filter if the series passes them all, otherwise None."""
+    if len(columns["close"]) == 0:
+        return None
+    found = detect(columns)
+    hits = []
+    for spec in filters:
+        hit = _best_hit(found, columns, spec)
+        if hit is None:
+            return None
+        hits.append(hit)
+    return hits
+
+
+def _score(hits):
+    return tuple(hit["distance_percent"] if hit["kind"] in ZONES else hit["bars_ago"] for hit in hits)
+
+
+# --- Shared-memory scan ---
+
+def pack(series):
+    """Copy the series end to end into one shared float64 block, one row per field.
+
+    Returns the shared memory and the offsets of each series in it; the
+    caller closes and unlinks the block.
+    """
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(columns["timestamp"]) for columns in series])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(BAR_COLUMNS) * int(offsets[-1]) * 8))
+    block = np.ndarray((len(BAR_COLUMNS), int(offsets[-1])), dtype=np.float64, buffer=shm.buf)
+    for columns, start, stop in zip(series, offsets[:-1], offsets[1:]):
+        for row, field in enumerate(BAR_COLUMNS):
+            block[row, start:stop] = columns[field]
+    return shm, offsets
+
+
+def _scan_range(block, offsets, filters, first, last):
+    """``(position, hits)`` for the matching series at positions ``[first, last)``."""
+    matches = []
+    for position in range(first, last):
+        start, stop = offsets[position], offsets[position + 1]
+        columns = {field: block[row, start:stop] for row, field in enumerate(BAR_COLUMNS)}
+        hits = scan_series(columns, filters)
+        if hits is not None:
+            matches.append((position, hits))
+    return matches
+
+
+_attached = {}
+
+
+def _attach(name, total, offsets, filters):
+    """Process pool initializer: map the shared block once per worker process."""
+    shm = shared_memory.SharedMemory(name=name)
+    _attached.update(
+        shm=shm,
+        block=np.ndarray((len(BAR_COLUMNS), total), dtype=np.float64, buffer=shm.buf),
+        offsets=offsets,
+        filters=filters
+    )
+
+
+def _scan_attached(first, last):
+    return _scan_range(_attached["block"], _attached["offsets"], _attached["filters"], first, last)
+
+
+def _pool_context():
+    # Forked workers skip re-importing the caller's main module, which for
+    # the script worker would reload the data API and the smc banner
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def scan(series, filters, processes=None):
+    """Scan ``{symbol: columns}`` and return the matching symbols, ranked.
+
+    ``processes`` defaults to the CPU count; with one process (or one chunk
+    of work) the scan runs inline.
+    """
+    filters = parse_filters(filters)
+    symbols = list(series)
+    shm, offsets = pack([series[symbol] for symbol in symbols])
+    try:
+        total = int(offsets[-1])
+        workers = max(1, min(processes or os.cpu_count() or 1, len(symbols)))
+        size = max(1, math.ceil(len(symbols) / (workers * CHUNKS_PER_PROCESS)))
+        chunks = [(first, min(first + size, len(symbols))) for first in range(0, len(symbols), size)]
+
+        if workers == 1 or len(chunks) == 1:
+            block = np.ndarray((len(BAR_COLUMNS), total), dtype=np.float64, buffer=shm.buf)
+            matches = _scan_range(block, offsets, filters, 0, len(symbols))
+            del block
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=_attach,
+                                     initargs=(shm.name, total, offsets, filters)) as pool:
+                futures = [pool.submit(_scan_attached, first, last) for first, last in chunks]
+                matches = [match for future in futures for match in future.result()]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    ranked = []
+    for position, hits in matches:
+        columns = series[symbols[position]]
+        ranked.append({
+            "symbol": symbols[position],
+            "timestamp": int(columns["timestamp"][-1]),
+            "close": float(columns["close"][-1]),
+            "score": list(_score(hits)),
+            "hits": hits,
+        })
+    ranked.sort(key=lambda match: (match["score"], match["symbol"]))
+    last_bars = [int(columns["timestamp"][-1]) for columns in series.values() if len(columns["timestamp"])]
+    return {"scanned": len(symbols), "as_of": max(last_bars) if last_bars else None, "matches": ranked}
+
+
+def load_universe(symbols, load, max_workers=8):
+    """Load every symbol's bars on a thread pool; returns ``(series, errors)`` in symbol order."""
+    loaded, errors = BatchFetcher(load, max_workers=max_workers).fetch_all(symbols)
+    series = {symbol: loaded[symbol] for symbol in dict.fromkeys(symbols) if symbol in loaded}
+    return series, errors
+
+
+# --- Cache ---
+
+def next_bar_close(interval, now=None):
+    """Epoch second at which the bar forming at ``now`` closes, plus the settle delay.
+
+    Intraday bars close on the UTC clock; daily and longer bars at the next
+    market close.
+    """
+    now = time.time() if now is None else now
+    seconds = interval_seconds(interval)
+    if seconds < 86400:
+        return (now // seconds + 1) * seconds + SETTLE_SECONDS
+    return next_market_close().timestamp() + SETTLE_SECONDS
+
+
+class ScanCache:
+    """Finished scans as JSON files, each valid until its ``expires_at``."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+
+    @staticmethod
+    def key(params):
+        encoded = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key):
+        """The cached scan, or None if missing or expired."""
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["result"] if entry.get("expires_at", 0) > time.time() else None
+
+    def put(self, key, result, expires_at):
+        # Write then rename, so concurrent workers never read a partial file
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"expires_at": expires_at, "result": result}, f, separators=(",", ":"))
+        os.replace(tmp, self._path(key))
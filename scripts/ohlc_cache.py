@@ -0,0 +1,235 @@
+"""
+Tiered OHLC cache shared by the API scripts and the training pipeline.
+
+Bars are cached per (symbol, interval, range) in two tiers:
+
+- an in-process LRU bounded by the total bytes of the cached frames
+- a disk tier with one ``.npy`` file per column, loaded memory-mapped, so
+  other worker processes and later runs start warm
+
+Entries expire according to the bar interval: intraday bars after half a
+bar, daily and longer bars at the next market close.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE_HOUR = 16
+MIN_INTRADAY_TTL = 5
+
+DEFAULT_MAX_BYTES = int(os.environ.get("OHLC_CACHE_MAX_BYTES") or 256 * 1024 * 1024)
+DEFAULT_CACHE_DIR = os.environ.get("OHLC_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "tradepro-ai", "ohlc"
+)
+
+_INTERVAL_UNITS = {"m": 60, "h": 3600, "d": 86400, "wk": 7 * 86400, "mo": 30 * 86400}
+_INTERVAL_PATTERN = re.compile(r"^(\d+)(m|h|d|wk|mo)$")
+
+
+def interval_seconds(interval):
+    """Length of one bar in seconds, e.g. 60 for "1m" and 86400 for "1d"."""
+    match = _INTERVAL_PATTERN.match(interval)
+    if not match:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return int(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+def next_market_close(now=None):
+    """The next regular-session close (16:00 New York time on a weekday)."""
+    now = (now or datetime.now(tz=MARKET_TZ)).astimezone(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    if now >= close:
+        close += timedelta(days=1)
+    while close.weekday() >= 5:
+        close += timedelta(days=1)
+    return close
+
+
+def ttl_for_interval(interval, now=None):
+    """Seconds a cached series stays fresh for the given bar interval."""
+    seconds = interval_seconds(interval)
+    if seconds < 86400:
+        return max(MIN_INTRADAY_TTL, seconds // 2)
+    now = now or datetime.now(tz=MARKET_TZ)
+    return max(MIN_INTRADAY_TTL, int((next_market_close(now) - now).total_seconds()))
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class OHLCCache:
+    """In-memory LRU tier in front of a memory-mapped disk tier."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=DEFAULT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()  # key -> (frame, nbytes, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(symbol, interval, range_val):
+        return (symbol.upper(), interval, range_val)
+
+    # --- Public API ---
+
+    def get(self, symbol, interval, range_val):
+        """Return a copy of the cached frame, or None if missing or expired."""
+        key = self.key(symbol, interval, range_val)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0].copy()
+                self._evict(key)
+
+        loaded = self._load(key, now)
+        if loaded is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        df, expires_at = loaded
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, df, expires_at)
+        return df.copy()
+
+    def put(self, symbol, interval, range_val, df, ttl=None):
+        """Cache a frame in both tiers."""
+        key = self.key(symbol, interval, range_val)
+        expires_at = time.time() + (ttl if ttl is not None else ttl_for_interval(interval))
+        df = df.copy()
+        with self._lock:
+            self._remember(key, df, expires_at)
+        self._store(key, df, expires_at)
+
+    def get_or_fetch(self, symbol, interval, range_val, fetch):
+        """Return cached bars, calling fetch() and caching its result on a miss.
+
+        Empty or missing results are returned as-is and not cached.
+        """
+        df = self.get(symbol, interval, range_val)
+        if df is not None:
+            return df
+        df = fetch()
+        if df is not None and not df.empty:
+            self.put(symbol, interval, range_val, df)
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    # --- Memory tier ---
+
+    def _remember(self, key, df, expires_at):
+        nbytes = frame_nbytes(df)
+        if key in self._entries:
+            self._evict(key)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (df, nbytes, expires_at)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self._bytes -= nbytes
+
+    # --- Disk tier ---
+
+    def _entry_dir(self, key):
+        symbol, interval, range_val = key
+        return os.path.join(self.cache_dir, symbol, f"{interval}_{range_val}")
+
+    def _store(self, key, df, expires_at):
+        if not self.cache_dir:
+            return
+        if any(dtype == object for dtype in df.dtypes):
+            return  # Only numeric bars are stored on disk
+
+        meta = {"expires_at": expires_at, "columns": [str(c) for c in df.columns]}
+        index = df.index
+        if isinstance(index, pd.DatetimeIndex):
+            meta["index"] = {"kind": "datetime", "tz": str(index.tz) if index.tz else None,
+                             "unit": index.unit, "name": index.name}
+            index_values = index.as_unit("ns").asi8
+        else:
+            meta["index"] = {"kind": "values", "name": index.name}
+            index_values = np.asarray(index)
+
+        final_dir = self._entry_dir(key)
+        try:
+            os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(final_dir), prefix=".tmp-")
+        except OSError:
+            return  # The disk tier is best-effort
+        try:
+            np.save(os.path.join(tmp_dir, "index.npy"), index_values)
+            for i, column in enumerate(df.columns):
+                np.save(os.path.join(tmp_dir, f"col_{i}.npy"), df[column].to_numpy())
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            # Swap the new entry in atomically; readers never see a partial one
+            if os.path.isdir(final_dir):
+                old_dir = tempfile.mkdtemp(dir=os.path.dirname(final_dir), prefix=".old-")
+                os.replace(final_dir, os.path.join(old_dir, "entry"))
+                shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _load(self, key, now):
+        if not self.cache_dir:
+            return None
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, "meta.json")) as f:
+                meta = json.load(f)
+            if meta["expires_at"] <= now:
+                return None
+
+            index_values = np.load(os.path.join(entry_dir, "index.npy"), mmap_mode="r")
+            index_meta = meta["index"]
+            if index_meta["kind"] == "datetime":
+                index = pd.DatetimeIndex(np.asarray(index_values).view("datetime64[ns]"), name=index_meta["name"])
+                index = index.as_unit(index_meta.get("unit", "ns"))
+                if index_meta["tz"]:
+                    index = index.tz_localize("UTC").tz_convert(index_meta["tz"])
+            else:
+                index = pd.Index(index_values, name=index_meta["name"])
+
+            columns = {
+                name: np.load(os.path.join(entry_dir, f"col_{i}.npy"), mmap_mode="r")
+                for i, name in enumerate(meta["columns"])
+            }
+            return pd.DataFrame(columns, index=index), meta["expires_at"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+# Shared instance used by fetch_stock_data and the training pipeline
+ohlc_cache = OHLCCache()
@@ -0,0 +1,56 @@
+"""
+Vectorised OHLCV resampling.
+
+Aggregates bars of one interval into a coarser one without a DataFrame:
+bars are grouped by the bucket their timestamp falls in, and each group is
+reduced with ``reduceat`` (first open, highest high, lowest low, last close,
+summed volume). Buckets are aligned to the UTC clock, with weeks starting on
+Monday, and a bucket is stamped with its start time.
+"""
+
+import numpy as np
+
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "1d": 86400,
+    "1wk": 7 * 86400,
+}
+
+# The epoch fell on a Thursday; weekly buckets are shifted to start on Monday
+WEEK_OFFSET = 4 * 86400
+
+
+def finest(intervals):
+    """The interval with the shortest period."""
+    return min(intervals, key=INTERVAL_SECONDS.__getitem__)
+
+
+def resample_columns(columns, interval):
+    """Aggregate time-ordered bar columns (epoch-second timestamps) into ``interval`` bars."""
+    period = INTERVAL_SECONDS[interval]
+    offset = WEEK_OFFSET if interval == "1wk" else 0
+    timestamps = np.asarray(columns["timestamp"], dtype=np.int64)
+    if not len(timestamps):
+        return {name: np.empty(0, dtype=np.int64 if name == "timestamp" else np.float64)
+                for name in ("timestamp", "open", "high", "low", "close", "volume")}
+
+    buckets = (timestamps - offset) // period
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    def column(name):
+        return np.asarray(columns[name], dtype=np.float64)
+
+    return {
+        "timestamp": buckets[starts] * period + offset,
+        "open": column("open")[starts],
+        "high": np.maximum.reduceat(column("high"), starts),
+        "low": np.minimum.reduceat(column("low"), starts),
+        "close": column("close")[ends],
+        "volume": np.add.reduceat(column("volume"), starts),
+    }
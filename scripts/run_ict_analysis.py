@@ -3,15 +3,20 @@ from smartmoneyconcepts import smc
 import sys
 import json
 
-def run_ict_analysis(ohlc_data_json):
-    ohlc_data = json.loads(ohlc_data_json)
-    df = pd.DataFrame(ohlc_data)
+from ict_pipeline import analyze
+
+def run_ict_analysis(ohlc_data_json, engine="native"):
+    # Accepts a JSON string, a list of row records or a dict of column lists
+    ohlc_data = json.loads(ohlc_data_json) if isinstance(ohlc_data_json, str) else ohlc_data_json
 
-    # Ensure datetime index for proper time-series analysis if needed by smc
-    # For simplicity, assuming data is already ordered by time.
-    # If not, you might need to add a 'timestamp' column and set it as index:
-    # df['timestamp'] = pd.to_datetime(df['timestamp'])
-    # df = df.set_index('timestamp')
+    if engine == "native":
+        # NumPy detectors over one shared columnar view, with the same results as smc
+        return analyze(ohlc_data)
+    return run_smc_analysis(ohlc_data)
+
+def run_smc_analysis(ohlc_data):
+    """Reference implementation on the smc package."""
+    df = pd.DataFrame(ohlc_data)
 
     # Calculate Swing Highs and Lows
     swing_highs_lows = smc.swing_highs_lows(df.copy(), swing_length=2)
@@ -30,7 +35,9 @@ def run_ict_analysis(ohlc_data_json):
 
     # Detect Market Structure Shift (BOS & CHoCH)
     bos_choch_df = smc.bos_choch(df.copy(), swing_highs_lows)
-    market_structure_shifts = bos_choch_df.dropna().to_dict(orient='records')
+    # Every row has either BOS or CHOCH empty, so only drop rows without a level
+    bos_choch_df = bos_choch_df.dropna(subset=['Level']).astype(object)
+    market_structure_shifts = bos_choch_df.where(bos_choch_df.notna(), None).to_dict(orient='records')
 
     return {
         "order_blocks": order_blocks,
@@ -40,9 +47,10 @@ def run_ict_analysis(ohlc_data_json):
     }
 
 if __name__ == "__main__":
-    # The script expects a single JSON string as an argument
+    # The script expects a single JSON string as an argument, or "--stdin" to
+    # read it from standard input (long histories exceed the argv size limit)
     if len(sys.argv) > 1:
-        ohlc_data_json = sys.argv[1]
+        ohlc_data_json = sys.stdin.read() if sys.argv[1] == "--stdin" else sys.argv[1]
         try:
             result = run_ict_analysis(ohlc_data_json)
             print(json.dumps(result))
@@ -2,7 +2,7 @@ import json
 import sys
 
 def simulate_lstm_predictions(data_json):
-    data = json.loads(data_json)
+    data = json.loads(data_json) if isinstance(data_json, str) else data_json
     
     # Extract close prices directly from the JSON data
     close_prices = data.get("close", [])
@@ -30,7 +30,7 @@ def simulate_lstm_predictions(data_json):
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        data_json = sys.argv[1]
+        data_json = sys.stdin.read() if sys.argv[1] == "--stdin" else sys.argv[1]
         try:
             predictions = simulate_lstm_predictions(data_json)
             print(json.dumps({"predictions": predictions}))
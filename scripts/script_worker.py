@@ -0,0 +1,360 @@
+"""
+Long-lived analysis worker.
+
+Imports the analysis scripts once and then serves jobs read from stdin as
+length-prefixed frames (4-byte big-endian length, one-byte codec tag, then a
+msgpack or JSON payload), answering each with one frame on stdout. The frame
+layout matches backend/src/services/script_ipc.py.
+
+Each request, ``{"job": ..., "params": {...}}``, runs a structured job and
+returns the result as data, with OHLC bars moved as column arrays. If the
+request also has a ``"response"`` section the worker encodes the final HTTP
+body itself, compressed when the section lists encodings the client accepts,
+so the backend can pass the bytes straight through. Responses are always
+msgpack, which carries those bytes as-is; requests may be either codec.
+
+Run with ``--once`` to serve a single request and exit.
+"""
+
+import gzip
+import json
+import os
+import struct
+import sys
+from bisect import bisect_right
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the real stdout for the protocol and point fd 1 at stderr, so anything
+# the scripts print (including banners printed at import time) stays out of it
+PROTOCOL_IN = sys.stdin.buffer
+PROTOCOL_OUT = os.fdopen(os.dup(1), "wb")
+os.dup2(2, 1)
+sys.stdout = sys.stderr
+
+# The backend frames its jobs with msgpack, so the worker cannot run without it
+import msgpack
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+from bar_store import BAR_COLUMNS, range_start
+from batch_fetcher import FetchError
+from fetch_stock_data import bar_store, fetch_stock_columns
+from ict_engine import IncrementalICT
+from ict_pipeline import analyze, changed, columnar, detect, to_records
+from ict_scanner import PRESETS, ScanCache, load_universe, next_bar_close, parse_filters, scan
+from resample import INTERVAL_SECONDS, finest, resample_columns
+from run_ict_analysis import run_ict_analysis
+from run_lstm_model import simulate_lstm_predictions
+
+HEADER = struct.Struct(">IB")
+CODEC_JSON = ord("J")
+CODEC_MSGPACK = ord("M")
+MSGPACK_MIMETYPE = "application/x-msgpack"
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+# History fetched for an analysis when the caller does not pass its own bars
+DEFAULT_RANGES = {
+    "1m": "5d",
+    "5m": "1mo",
+    "15m": "1mo",
+    "30m": "1mo",
+    "1h": "3mo",
+    "1d": "1y",
+    "1wk": "5y",
+}
+
+# Incremental ICT engines kept by this worker, least recently used first
+ICT_ENGINES = OrderedDict()
+MAX_ICT_ENGINES = int(os.environ.get("ICT_ENGINE_CACHE_SIZE") or 64)
+
+# Universe scans: processes per scan (0 for one per CPU) and the shared result cache
+SCAN_PROCESSES = int(os.environ.get("ICT_SCAN_PROCESSES") or 0)
+SCAN_CACHE = ScanCache()
+
+
+class JobError(Exception):
+    """Raised by a structured job that could not produce a result."""
+
+
+# --- Framing ---
+
+def read_frame(stream):
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise EOFError("Truncated frame header")
+    length, codec = HEADER.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("Truncated frame payload")
+    if codec == CODEC_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def write_frame(stream, message):
+    payload = msgpack.packb(message, use_bin_type=True)
+    stream.write(HEADER.pack(len(payload), CODEC_MSGPACK))
+    stream.write(payload)
+    stream.flush()
+
+
+# --- Structured jobs ---
+
+def load_ohlc(params, interval):
+    """Use the bars passed in the request, or fetch them for the symbol."""
+    if params.get("ohlc"):
+        return params["ohlc"]
+    range_val = params.get("range") or DEFAULT_RANGES.get(interval, "1y")
+    columns = fetch_stock_columns(params["symbol"], interval, range_val)
+    if "error" in columns:
+        raise JobError(columns["error"])
+    return columns
+
+
+def columns_to_records(columns):
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def job_historical_data(params):
+    columns = load_ohlc({**params, "range": params.get("range", "1y")}, params.get("interval", "1d"))
+    return columns if params.get("format") == "columns" else columns_to_records(columns)
+
+
+def job_ict_analysis(params):
+    """ICT zones as row records (the default) or parallel columns.
+
+    ``since`` (the ``cursor`` of an earlier response) limits the zones to
+    those created, mitigated or otherwise changed by bars after it, plus the
+    indices of zones that are gone. The cursor is the last closed bar, so
+    zones that depend on the forming bar are sent again on the next poll.
+    """
+    columns = load_ohlc(params, params.get("timeframe", "1d"))
+    layout = params.get("format", "records")
+    since = params.get("since")
+    if layout == "records" and since is None:
+        return run_ict_analysis(columns)
+
+    if isinstance(columns, list):
+        columns = {name: [bar[name] for bar in columns] for name in BAR_COLUMNS}
+    timestamps = columns["timestamp"]
+    current = detect(columns)
+
+    previous = None
+    if since is not None and len(timestamps) and timestamps[0] <= since:
+        closed = bisect_right(timestamps, since)
+        previous = detect({name: values[:closed] for name, values in columns.items()})
+
+    result = {"cursor": timestamps[-2] if len(timestamps) > 1 else None, "full": previous is None}
+    if layout == "columns":
+        result["delta"] = bool(params.get("delta"))
+    for category, zones in current.items():
+        removed = []
+        if previous is not None:
+            zones, removed = changed(zones, previous[category])
+        if layout == "columns":
+            result[category] = {**columnar(zones, delta=result["delta"]), "removed": removed}
+        else:
+            records = [{"index": i, **record} for i, record in zip(zones["index"].tolist(), to_records(zones))]
+            result[category] = {"updated": records, "removed": removed}
+    return result
+
+
+def ict_engine(symbol, timeframe, columns):
+    """The worker's engine for a series, fed the closed bars it has not seen.
+
+    The last bar is still forming, so it is left out. An engine whose last
+    bar is missing from the fetched history is rebuilt from scratch.
+    """
+    key = (symbol.upper(), timeframe)
+    timestamps = columns["timestamp"]
+    closed = len(timestamps) - 1
+
+    engine = ICT_ENGINES.pop(key, None)
+    if engine is not None and engine.last_timestamp in timestamps[:closed]:
+        start = timestamps.index(engine.last_timestamp) + 1
+        bars = columns_to_records({name: values[start:closed] for name, values in columns.items()})
+        for bar in bars:
+            engine.update(bar)
+    else:
+        engine = IncrementalICT()
+        engine.extend(columns_to_records({name: values[:closed] for name, values in columns.items()}))
+
+    ICT_ENGINES[key] = engine
+    while len(ICT_ENGINES) > MAX_ICT_ENGINES:
+        ICT_ENGINES.popitem(last=False)
+    return engine
+
+
+def job_ict_updates(params):
+    """ICT zones changed since ``cursor``, or all of them when the cursor is unknown.
+
+    Indices count bars from the engine's first bar, which the cursor names,
+    so a cursor from another engine gets a full snapshot instead of changes.
+    """
+    timeframe = params.get("timeframe", "1d")
+    engine = ict_engine(params["symbol"], timeframe, load_ohlc(params, timeframe))
+    if not len(engine):
+        raise JobError("Not enough bars for analysis")
+
+    origin = engine.timestamps[0]
+    changes = None
+    since_origin, _, since_last = str(params.get("cursor") or "").partition(":")
+    if since_origin == str(origin) and since_last.isdigit():
+        changes = engine.changes_since(int(since_last))
+
+    cursor = f"{origin}:{engine.last_timestamp}"
+    if changes is None:
+        return {"cursor": cursor, "full": True, **engine.snapshot()}
+    return {"cursor": cursor, "full": False, **changes}
+
+
+def job_ict_multi_timeframe(params):
+    """ICT analysis on several timeframes from one fetch of the finest of them.
+
+    The base bars are fetched once (over the base interval's default range
+    unless ``range`` is given) and aggregated into each coarser timeframe, so
+    every timeframe covers the same span. Zone indices count bars of their
+    own timeframe, whose start times are returned alongside.
+    """
+    timeframes = list(dict.fromkeys(params.get("timeframes") or []))
+    unknown = [timeframe for timeframe in timeframes if timeframe not in INTERVAL_SECONDS]
+    if not timeframes or unknown:
+        raise JobError(f"Unknown timeframes: {', '.join(unknown)}" if unknown else "No timeframes given")
+
+    base = params.get("base") or finest(timeframes)
+    if base not in INTERVAL_SECONDS:
+        raise JobError(f"Unknown base interval: {base}")
+    uneven = [timeframe for timeframe in timeframes if INTERVAL_SECONDS[timeframe] % INTERVAL_SECONDS[base]]
+    if uneven:
+        raise JobError(f"Timeframes not a multiple of {base}: {', '.join(uneven)}")
+
+    columns = load_ohlc(params, base)
+    if isinstance(columns, list):
+        columns = {name: [bar[name] for bar in columns] for name in BAR_COLUMNS}
+    result = {}
+    for timeframe in timeframes:
+        bars = columns if timeframe == base else resample_columns(columns, timeframe)
+        result[timeframe] = {"timestamps": [int(t) for t in bars["timestamp"]], **analyze(bars)}
+    return {"base": base, "timeframes": result}
+
+
+def job_ict_scan(params):
+    """Screen ``symbols`` with the ICT scanner, cached until the next bar close.
+
+    Bars come straight from the bar store (not the TTL cache), so a scan run
+    just after a bar closes sees that bar. ``refresh`` forces a new scan.
+    """
+    interval = params.get("interval", "1d")
+    range_val = params.get("range") or DEFAULT_RANGES.get(interval, "1y")
+    symbols = list(dict.fromkeys(params.get("symbols") or []))
+    if not symbols:
+        raise JobError("No symbols to scan")
+    try:
+        filters = parse_filters(PRESETS[params["preset"]] if params.get("preset") else params.get("filters"))
+    except KeyError:
+        raise JobError(f"Unknown preset: {params['preset']}")
+    except ValueError as e:
+        raise JobError(str(e))
+
+    key = ScanCache.key({"symbols": sorted(symbols), "interval": interval, "range": range_val, "filters": filters})
+    result = None if params.get("refresh") else SCAN_CACHE.get(key)
+    cached = result is not None
+    if not cached:
+        start = range_start(range_val)
+
+        def load(symbol):
+            bar_store.refresh(symbol, interval, start)
+            view = bar_store.view(symbol, interval, start=start)
+            if not len(view):
+                raise FetchError(f"{symbol}: no data", retryable=False)
+            return view
+
+        series, errors = load_universe(symbols, load)
+        result = {
+            **scan(series, filters, processes=SCAN_PROCESSES or None),
+            "errors": {symbol: str(error) for symbol, error in errors.items()},
+            "expires_at": next_bar_close(interval)
+        }
+        SCAN_CACHE.put(key, result, result["expires_at"])
+
+    limit = params.get("limit")
+    return {**result, "matches": result["matches"][:limit] if limit else result["matches"], "cached": cached}
+
+
+def job_lstm_prediction(params):
+    return {"predictions": simulate_lstm_predictions(load_ohlc(params, "1d"))}
+
+
+JOBS = {
+    "historical_data": job_historical_data,
+    "ict_analysis": job_ict_analysis,
+    "ict_updates": job_ict_updates,
+    "ict_multi_timeframe": job_ict_multi_timeframe,
+    "ict_scan": job_ict_scan,
+    "lstm_prediction": job_lstm_prediction,
+}
+
+
+def encode_body(result, response):
+    """Wrap a job result in the route's response envelope and encode it."""
+    body = dict(response.get("envelope", {}))
+    body[response.get("key", "result")] = result
+    if response.get("mimetype") == MSGPACK_MIMETYPE:
+        return msgpack.packb(body, use_bin_type=True), MSGPACK_MIMETYPE
+    return json.dumps(body, separators=(",", ":")).encode("utf-8"), "application/json"
+
+
+def compress_body(body, encodings):
+    """Compress with the first of the client's ``encodings`` this worker supports."""
+    if len(body) < COMPRESS_MIN_SIZE:
+        return body, None
+    for encoding in encodings:
+        if encoding == "br" and BROTLI_AVAILABLE:
+            return brotli.compress(body, quality=5), "br"
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+def handle_job(request):
+    job = JOBS.get(request.get("job"))
+    if job is None:
+        return {"ok": False, "error": f"Unknown job: {request.get('job')}"}
+    try:
+        result = job(request.get("params", {}))
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+    response = request.get("response")
+    if response is None:
+        return {"ok": True, "result": result}
+    body, mimetype = encode_body(result, response)
+    body, encoding = compress_body(body, response.get("encodings", []))
+    return {"ok": True, "body": body, "mimetype": mimetype, "encoding": encoding}
+
+
+def main():
+    once = "--once" in sys.argv[1:]
+    while True:
+        request = read_frame(PROTOCOL_IN)
+        if request is None:
+            break
+        write_frame(PROTOCOL_OUT, handle_job(request))
+        if once:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Make the scripts importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeChartServer(ThreadingHTTPServer):
+    """Local stand-in for the Yahoo chart endpoint.
+
+    ``failures[symbol]`` makes the first N requests for a symbol return 429,
+    and ``missing`` symbols return 404. Counts requests and TCP connections.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeChartHandler)
+        self.failures = {}
+        self.missing = set()
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeChartHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        symbol = url.path.rsplit('/', 1)[-1]
+        query = parse_qs(url.query)
+        with self.server.lock:
+            self.server.requests += 1
+            remaining = self.server.failures.get(symbol, 0)
+            if remaining:
+                self.server.failures[symbol] = remaining - 1
+
+        if symbol in self.server.missing:
+            return self._send(404, {'chart': {'result': None, 'error': 'Not Found'}})
+        if remaining:
+            return self._send(429, {'error': 'Too Many Requests'})
+
+        start, end = int(query['period1'][0]), int(query['period2'][0])
+        timestamps = list(range(start - start % 86400, end + 1, 86400))
+        base = sum(map(ord, symbol))
+        closes = [base + i * 0.5 for i in range(len(timestamps))]
+        quote = {
+            'open': closes,
+            'high': [c + 1 for c in closes],
+            'low': [c - 1 for c in closes],
+            'close': closes,
+            'volume': [1000 + i for i in range(len(timestamps))]
+        }
+        self._send(200, {'chart': {'result': [{'timestamp': timestamps, 'indicators': {'quote': [quote]}}]}})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_chart_server():
+    server = FakeChartServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,116 @@
+"""
+Tests for the incrementally refreshed bar store, against a fake upstream.
+"""
+
+import pandas as pd
+import pytest
+
+from bar_store import BAR_COLUMNS, BarStore, range_start
+
+DAY = 86400
+START = 1_700_006_400
+
+
+class FakeUpstream:
+    """Daily bars from ``first`` to ``last``; records every request's start."""
+
+    def __init__(self, first, last):
+        self.first = first
+        self.last = last
+        self.version = 0
+        self.requests = []
+
+    def bar(self, timestamp):
+        close = 100.0 + (timestamp - START) / DAY + self.version * (timestamp == self.last)
+        return [timestamp, close, close + 1, close - 1, close, 1000 + self.version]
+
+    def __call__(self, symbol, interval, start):
+        self.requests.append(start)
+        first = max(start, self.first)
+        first += -first % DAY
+        rows = [self.bar(t) for t in range(first, self.last + 1, DAY)]
+        return pd.DataFrame(rows, columns=BAR_COLUMNS)
+
+
+@pytest.fixture
+def upstream():
+    return FakeUpstream(START - 100 * DAY, START + 9 * DAY)
+
+
+def test_first_refresh_fetches_from_start(tmp_path, upstream):
+    store = BarStore(upstream, root=str(tmp_path))
+
+    assert store.last_timestamp("AAPL", "1d") is None
+    assert store.refresh("aapl", "1d", START) == 10
+
+    bars = store.read("AAPL", "1d")
+    assert bars["timestamp"].tolist() == list(range(START, START + 10 * DAY, DAY))
+    assert store.last_timestamp("AAPL", "1d") == START + 9 * DAY
+    assert upstream.requests == [START]
+
+
+def test_delta_refresh_replaces_the_partial_last_bar(tmp_path, upstream):
+    store = BarStore(upstream, root=str(tmp_path))
+    store.refresh("AAPL", "1d", START)
+
+    # The last bar moved on, and two more bars closed
+    upstream.version = 1
+    upstream.last += 2 * DAY
+    assert store.refresh("AAPL", "1d", START) == 3
+
+    bars = store.read("AAPL", "1d")
+    assert upstream.requests == [START, START + 9 * DAY]
+    assert len(bars) == 12
+    assert bars["timestamp"].is_unique and bars["timestamp"].is_monotonic_increasing
+    assert bars["close"].iloc[9] == 109.0 and bars["volume"].iloc[9] == 1001
+    assert bars["close"].iloc[-1] == 112.0
+    assert bars["volume"].iloc[:9].eq(1000).all()
+
+    # Nothing new upstream: the last bar is re-requested and nothing changes
+    upstream.requests.clear()
+    assert store.refresh("AAPL", "1d", START) == 1
+    assert upstream.requests == [START + 11 * DAY]
+    pd.testing.assert_frame_equal(store.read("AAPL", "1d"), bars)
+
+
+def test_refresh_before_covered_history_backfills(tmp_path, upstream):
+    store = BarStore(upstream, root=str(tmp_path))
+    store.refresh("AAPL", "1d", START)
+
+    earlier = START - 20 * DAY
+    assert store.refresh("AAPL", "1d", earlier) == 30
+    assert upstream.requests == [START, earlier]
+    bars = store.read("AAPL", "1d")
+    assert bars["timestamp"].iloc[0] == earlier
+    assert len(bars) == 30
+
+    # The backfilled start is now covered, so the next refresh is a delta again
+    store.refresh("AAPL", "1d", START - 10 * DAY)
+    assert upstream.requests[-1] == START + 9 * DAY
+
+
+def test_read_selects_an_inclusive_range(tmp_path, upstream):
+    store = BarStore(upstream, root=str(tmp_path))
+    store.refresh("AAPL", "1d", START)
+
+    bars = store.read("AAPL", "1d", start=START + DAY, end=START + 3 * DAY)
+    assert bars["timestamp"].tolist() == [START + DAY, START + 2 * DAY, START + 3 * DAY]
+    assert store.read("AAPL", "1d", start=START + 30 * DAY).empty
+    assert store.read("MSFT", "1d").empty
+
+
+def test_empty_upstream_leaves_the_store_untouched(tmp_path):
+    store = BarStore(lambda symbol, interval, start: pd.DataFrame(columns=BAR_COLUMNS), root=str(tmp_path))
+
+    assert store.refresh("AAPL", "1d", START) == 0
+    assert store.last_timestamp("AAPL", "1d") is None
+
+
+def test_range_start():
+    now = START + 12345
+    assert range_start("5d", now) == now - 5 * DAY
+    assert range_start("1y", now) == now - 365 * DAY
+    assert range_start("max", now) == 0
+    assert range_start("ytd", now) == int(pd.Timestamp("2023-01-01").timestamp())
+    with pytest.raises(ValueError):
+        range_start("2h", now)
@@ -0,0 +1,62 @@
+"""
+Tests for the concurrent multi-symbol fetcher, against a local fake chart server.
+"""
+
+import time
+
+from batch_fetcher import BatchFetcher, ChartClient, FetchError, TokenBucket
+
+START = 1_700_000_000
+END = START + 10 * 86400
+
+
+def test_fetches_every_symbol_over_pooled_connections(fake_chart_server):
+    client = ChartClient(base_url=fake_chart_server.url, pool_size=8)
+    fetcher = BatchFetcher(lambda symbol: client.bars_since(symbol, '1d', START, END), max_workers=8, rate=None)
+    symbols = [f"SYM{i}" for i in range(100)]
+
+    results, errors = fetcher.fetch_all(symbols)
+
+    assert not errors
+    assert set(results) == set(symbols)
+    assert all(len(bars) == 11 for bars in results.values())
+    assert fake_chart_server.requests == 100
+    # Keep-alive: connections are reused rather than opened per request
+    assert fake_chart_server.connections <= 8
+    client.close()
+
+
+def test_retries_rate_limited_symbols_and_reports_permanent_errors(fake_chart_server):
+    fake_chart_server.failures = {'AAPL': 2}
+    fake_chart_server.missing = {'NOPE'}
+    client = ChartClient(base_url=fake_chart_server.url)
+    fetcher = BatchFetcher(lambda symbol: client.bars_since(symbol, '1d', START, END),
+                           rate=None, retries=3, backoff=0.01)
+
+    results, errors = fetcher.fetch_all(['AAPL', 'MSFT', 'NOPE'])
+
+    assert set(results) == {'AAPL', 'MSFT'}
+    assert isinstance(errors['NOPE'], FetchError) and not errors['NOPE'].retryable
+    # Two 429s and a success for AAPL, one request each for MSFT and the 404
+    assert fake_chart_server.requests == 5
+    client.close()
+
+
+def test_results_arrive_as_they_complete():
+    delays = {'SLOW': 0.3, 'FAST1': 0.0, 'FAST2': 0.0}
+
+    def fetch(symbol):
+        time.sleep(delays[symbol])
+        return symbol.lower()
+
+    order = [symbol for symbol, _, _ in BatchFetcher(fetch, max_workers=3, rate=None).fetch_iter(['SLOW', 'FAST1', 'FAST2'])]
+    assert order[-1] == 'SLOW'
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=5)
+    started = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # 5 tokens are available immediately, the other 10 take 10 / 50 seconds
+    assert time.monotonic() - started >= 0.18
@@ -0,0 +1,105 @@
+"""
+Tests for the memory-mapped columnar bar store: write offsets and range views.
+"""
+
+import numpy as np
+import pytest
+
+from columnar_store import FIELDS, ColumnarBarStore
+
+STEP = 60
+
+
+def bars(first, count, close=100.0):
+    timestamps = first + STEP * np.arange(count)
+    prices = close + np.arange(count, dtype=float)
+    return {"timestamp": timestamps, "open": prices, "high": prices + 1, "low": prices - 1,
+            "close": prices, "volume": np.arange(count) + 1}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ColumnarBarStore(str(tmp_path))
+
+
+def test_write_appends_without_replace_from(store):
+    assert store.write("aapl", "1m", bars(0, 5)) == 5
+    assert store.write("AAPL", "1m", bars(5 * STEP, 3, close=105.0)) == 8
+
+    view = store.view("AAPL", "1m")
+    np.testing.assert_array_equal(view["timestamp"], STEP * np.arange(8))
+    np.testing.assert_array_equal(view["close"], 100.0 + np.arange(8))
+    assert store.length("AAPL", "1m") == 8
+    assert store.last_timestamp("AAPL", "1m") == 7 * STEP
+
+
+def test_write_overwrites_from_the_replace_from_offset(store):
+    store.write("AAPL", "1m", bars(0, 5))
+
+    # The partial last bar is overwritten in place and new bars are appended
+    update = bars(4 * STEP, 3, close=200.0)
+    assert store.write("AAPL", "1m", update, replace_from=4 * STEP) == 7
+    view = store.view("AAPL", "1m")
+    np.testing.assert_array_equal(view["timestamp"], STEP * np.arange(7))
+    np.testing.assert_array_equal(view["close"], [100, 101, 102, 103, 200, 201, 202])
+
+    # Replacing from before the first stored bar rewrites the whole series; the
+    # longer files are not truncated, but only the new row count is visible
+    assert store.write("AAPL", "1m", bars(-STEP, 2, close=50.0), replace_from=-STEP) == 2
+    view = store.view("AAPL", "1m")
+    np.testing.assert_array_equal(view["timestamp"], [-STEP, 0])
+    np.testing.assert_array_equal(view["volume"], [1, 2])
+
+
+def test_replace_from_between_stored_bars_keeps_earlier_rows(store):
+    store.write("AAPL", "1m", bars(0, 5))
+
+    # searchsorted(side="left"): the first stored bar at or after replace_from goes
+    assert store.write("AAPL", "1m", bars(2 * STEP + 30, 1, close=300.0), replace_from=2 * STEP + 30) == 4
+    np.testing.assert_array_equal(store.view("AAPL", "1m")["timestamp"], [0, STEP, 2 * STEP, 2 * STEP + 30])
+
+
+def test_view_selects_an_inclusive_range_by_binary_search(store):
+    store.write("AAPL", "1m", bars(0, 10))
+    timestamps = lambda **bounds: store.view("AAPL", "1m", **bounds)["timestamp"].tolist()
+
+    assert timestamps(start=2 * STEP, end=4 * STEP) == [2 * STEP, 3 * STEP, 4 * STEP]
+    assert timestamps(start=2 * STEP - 1, end=4 * STEP + 1) == [2 * STEP, 3 * STEP, 4 * STEP]
+    assert timestamps(start=2 * STEP + 1, end=4 * STEP - 1) == [3 * STEP]
+    assert timestamps(end=STEP) == [0, STEP]
+    assert timestamps(start=8 * STEP) == [8 * STEP, 9 * STEP]
+    assert timestamps(start=100 * STEP) == []
+    assert timestamps(start=5 * STEP, end=4 * STEP) == []
+
+
+def test_views_are_read_only_mappings_of_the_files(store):
+    store.write("AAPL", "1m", bars(0, 10))
+    view = store.view("AAPL", "1m", start=STEP)
+
+    assert len(view) == 9
+    for field, dtype in FIELDS.items():
+        assert view[field].dtype == dtype
+        assert isinstance(view[field], np.memmap)
+        assert not view[field].flags.writeable
+    frame = view.to_frame()
+    assert list(frame.columns) == list(FIELDS)
+    assert not isinstance(frame["close"].to_numpy(), np.memmap)
+
+
+def test_readers_pick_up_rows_written_by_another_store(store, tmp_path):
+    store.write("AAPL", "1m", bars(0, 3))
+    reader = ColumnarBarStore(str(tmp_path))
+    assert len(reader.view("AAPL", "1m")) == 3
+
+    store.write("AAPL", "1m", bars(3 * STEP, 2))
+    assert len(reader.view("AAPL", "1m")) == 5
+    assert reader.last_timestamp("AAPL", "1m") == 4 * STEP
+
+
+def test_missing_series_is_empty(store):
+    view = store.view("MSFT", "1d")
+
+    assert len(view) == 0
+    assert store.length("MSFT", "1d") == 0
+    assert store.last_timestamp("MSFT", "1d") is None
+    assert view.to_frame().empty
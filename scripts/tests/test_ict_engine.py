@@ -0,0 +1,102 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+pytest.importorskip("smartmoneyconcepts")
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from run_ict_analysis import run_ict_analysis
+
+from ict_engine import CATEGORIES, IncrementalICT
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def random_bars(seed, count, tick=None):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, count))
+    open_ = close + rng.normal(0, 0.5, count)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.7, count))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.7, count))
+    if tick is not None:
+        # Coarse prices produce the equal highs and lows smc breaks ties on
+        open_, high, low, close = (np.round(values / tick) * tick for values in (open_, high, low, close))
+        high = np.maximum(high, np.maximum(open_, close))
+        low = np.minimum(low, np.minimum(open_, close))
+    volume = rng.integers(0, 1000, count)
+    return [
+        {"timestamp": 1_700_000_000 + i * 86400, "open": open_[i], "high": high[i], "low": low[i],
+         "close": close[i], "volume": float(volume[i])}
+        for i in range(count)
+    ]
+
+
+def full_analysis(bars):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_ict_analysis({field: [bar[field] for bar in bars] for field in FIELDS}, engine="smc")
+
+
+@pytest.mark.parametrize("seed,tick", [(1, None), (2, 1.0), (3, 2.0)])
+def test_every_bar_matches_full_analysis(seed, tick):
+    bars = random_bars(seed, 120, tick)
+    engine = IncrementalICT()
+    published = {category: {} for category in CATEGORIES}
+
+    for t, bar in enumerate(bars):
+        changes = engine.update(bar)
+        assert changes["index"] == t
+        for category in CATEGORIES:
+            for record in changes[category]["updated"]:
+                published[category][record["index"]] = {
+                    key: value for key, value in record.items() if key not in ("index", "timestamp")
+                }
+            for i in changes[category]["removed"]:
+                del published[category][i]
+
+        snapshot = engine.snapshot()
+        assert snapshot == full_analysis(bars[:t + 1])
+        # Applying the per-bar changes rebuilds the snapshot
+        for category in CATEGORIES:
+            assert [published[category][i] for i in sorted(published[category])] == snapshot[category]
+
+
+def test_extend_then_update_matches_full_analysis():
+    bars = random_bars(4, 400, 1.0)
+    engine = IncrementalICT()
+    engine.extend(bars[:350])
+    assert engine.snapshot() == full_analysis(bars[:350])
+
+    for bar in bars[350:]:
+        engine.update(bar)
+    result = engine.snapshot()
+    assert result == full_analysis(bars)
+    assert result["market_structure_shifts"] and result["order_blocks"] and result["liquidity_zones"]
+
+
+def test_changes_since_merges_updates():
+    bars = random_bars(5, 200)
+    engine = IncrementalICT()
+    engine.extend(bars[:150])
+    cursor = engine.last_timestamp
+    state = {category: dict(records) for category, records in engine.published.items()}
+
+    for bar in bars[150:]:
+        engine.update(bar)
+    changes = engine.changes_since(cursor)
+
+    # Replaying the merged changes onto the earlier state gives the current one
+    for category in CATEGORIES:
+        for record in changes[category]["updated"]:
+            state[category][record["index"]] = {
+                key: value for key, value in record.items() if key not in ("index", "timestamp")
+            }
+        for i in changes[category]["removed"]:
+            del state[category][i]
+        assert state[category] == engine.published[category]
+
+    assert engine.changes_since(engine.last_timestamp) == {
+        category: {"updated": [], "removed": []} for category in CATEGORIES
+    }
+    assert engine.changes_since(-1) is None
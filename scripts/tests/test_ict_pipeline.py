@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("smartmoneyconcepts")
+
+from ict_pipeline import analyze, changed, columnar, detect, first_crossing, ohlc_view, to_records
+from test_ict_engine import FIELDS, full_analysis, random_bars
+
+
+@pytest.mark.parametrize("seed,tick,count", [
+    (1, None, 600), (2, 1.0, 600), (3, 3.0, 600), (4, None, 5), (5, 2.0, 40)
+])
+def test_matches_smc(seed, tick, count):
+    bars = random_bars(seed, count, tick)
+    assert analyze({field: [bar[field] for bar in bars] for field in FIELDS}) == full_analysis(bars)
+
+
+def test_matches_smc_without_volume():
+    bars = random_bars(6, 600, 0.5)
+    for bar in bars:
+        bar["volume"] = 0.0
+    assert analyze(bars) == full_analysis(bars)
+
+
+@pytest.mark.parametrize("rising,inclusive", [(True, False), (True, True), (False, False), (False, True)])
+def test_first_crossing_matches_scan(rising, inclusive):
+    rng = np.random.default_rng(7)
+    values = np.round(np.cumsum(rng.normal(0, 1, 3000)))
+    starts = rng.integers(0, 3100, 500)
+    levels = values[np.minimum(starts, 2999)] + rng.integers(-20, 21, 500)
+    stops = starts + rng.integers(0, 2000, 500)
+
+    def crosses(value, level):
+        if rising:
+            return value >= level if inclusive else value > level
+        return value <= level if inclusive else value < level
+
+    expected = [
+        next((j for j in range(start, min(stop, len(values))) if crosses(values[j], level)), -1)
+        for start, level, stop in zip(starts, levels, stops)
+    ]
+    assert first_crossing(values, starts, levels, rising, inclusive, stops).tolist() == expected
+
+
+def test_view_is_read_only_without_copying():
+    close = np.linspace(1.0, 2.0, 10)
+    view = ohlc_view({"open": close, "high": close, "low": close, "close": close, "volume": close})
+    assert np.shares_memory(view["close"], close)
+    assert not view["close"].flags.writeable
+    assert close.flags.writeable
+
+
+def test_columnar_matches_records():
+    bars = random_bars(8, 500, 1.0)
+    records = analyze(bars)
+    for category, columns in detect(bars).items():
+        plain, delta = columnar(columns), columnar(columns, delta=True)
+        assert np.cumsum(delta["index"]).tolist() == plain["index"]
+        names = [name for name in plain if name != "index"]
+        assert [dict(zip(names, row)) for row in zip(*(plain[name] for name in names))] == records[category]
+
+
+def test_changed_rows_replay_onto_earlier_run():
+    bars = random_bars(9, 600, 2.0)
+    previous, current = detect(bars[:450]), detect(bars)
+    sent = 0
+    for category in current:
+        state = dict(zip(previous[category]["index"].tolist(), to_records(previous[category])))
+        zones, removed = changed(current[category], previous[category])
+        for i in removed:
+            del state[i]
+        state.update(zip(zones["index"].tolist(), to_records(zones)))
+        assert [state[i] for i in sorted(state)] == to_records(current[category])
+        sent += len(zones["index"])
+    # Zones the earlier run already had unchanged are left out
+    assert 0 < sent < sum(len(columns["index"]) for columns in current.values())
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from ict_pipeline import analyze
+from ict_scanner import ScanCache, parse_filters, scan, scan_series
+from test_ict_engine import random_bars
+
+
+def universe(count, length=300):
+    series = {}
+    for seed in range(count):
+        bars = random_bars(100 + seed, length, 1.0 if seed % 2 else None)
+        series[f"SYM{seed}"] = {field: np.array([bar[field] for bar in bars], dtype=np.float64)
+                                for field in ("timestamp", "open", "high", "low", "close", "volume")}
+    return series
+
+
+FILTERS = [
+    [{"kind": "fvg", "side": "bullish", "within_percent": 4}],
+    [{"kind": "choch", "within_bars": 30}],
+    [{"kind": "order_block", "side": "bearish"}, {"kind": "bos", "side": "bullish", "within_bars": 60}],
+    [{"kind": "liquidity", "within_percent": 2}],
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_process_pool_matches_inline_scan(filters):
+    series = universe(24)
+    inline = scan(series, filters, processes=1)
+    pooled = scan(series, filters, processes=3)
+    assert pooled == inline
+    assert inline["scanned"] == 24 and inline["matches"]
+    scores = [match["score"] for match in inline["matches"]]
+    assert scores == sorted(scores)
+
+
+def test_fvg_filter_matches_records():
+    series = universe(12)
+    result = scan(series, FILTERS[0], processes=1)
+    expected = []
+    for symbol, columns in series.items():
+        close = columns["close"][-1]
+        for zone in analyze(columns)["fair_value_gaps"]:
+            gap = max(zone["Bottom"] - close, close - zone["Top"], 0)
+            if zone["FVG"] == 1 and zone["MitigatedIndex"] == 0 and gap / close * 100 <= 4:
+                expected.append(symbol)
+                break
+    assert expected
+    assert sorted(match["symbol"] for match in result["matches"]) == sorted(expected)
+
+
+def test_choch_within_bars_counts_from_the_break():
+    columns = universe(1)["SYM0"]
+    hits = scan_series(columns, parse_filters([{"kind": "choch"}]))
+    assert hits is not None
+    # The hit is the most recent break, so a window ending just before it finds nothing
+    bars_ago = hits[0]["bars_ago"]
+    assert scan_series(columns, parse_filters([{"kind": "choch", "within_bars": bars_ago + 1}])) == hits
+    if bars_ago:
+        assert scan_series(columns, parse_filters([{"kind": "choch", "within_bars": bars_ago}])) is None
+
+
+def test_bad_filters_are_rejected():
+    for filters in ([], [{"kind": "wedge"}], [{"kind": "fvg", "side": "up"}], [{"kind": "bos", "within_bars": 0}]):
+        with pytest.raises(ValueError):
+            parse_filters(filters)
+
+
+def test_cache_expires(tmp_path):
+    cache = ScanCache(str(tmp_path))
+    key = ScanCache.key({"symbols": ["A"], "filters": FILTERS[0]})
+    cache.put(key, {"matches": []}, expires_at=4102444800)
+    assert cache.get(key) == {"matches": []}
+    cache.put(key, {"matches": []}, expires_at=1)
+    assert cache.get(key) is None
@@ -0,0 +1,129 @@
+"""
+Tests for the tiered OHLC cache: expiry, the byte-bounded LRU and the disk tier.
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ohlc_cache
+from ohlc_cache import MARKET_TZ, OHLCCache, frame_nbytes, ttl_for_interval
+
+
+def bars(rows=50, tz="America/New_York", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, rows))
+    index = pd.date_range("2024-01-02 09:30", periods=rows, freq="1min", tz=tz, name="Date")
+    return pd.DataFrame({
+        "Open": close + 0.1,
+        "High": close + 1,
+        "Low": close - 1,
+        "Close": close,
+        "Volume": rng.integers(1000, 5000, rows),
+    }, index=index)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(ohlc_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_ttl_follows_the_bar_interval():
+    friday = datetime(2024, 1, 5, 15, 0, tzinfo=MARKET_TZ)
+    assert ttl_for_interval("1m", friday) == 30
+    assert ttl_for_interval("1h", friday) == 1800
+    # Daily bars stay fresh until the close, and over the weekend until Monday's
+    assert ttl_for_interval("1d", friday) == 3600
+    assert ttl_for_interval("1d", friday.replace(hour=17)) == 71 * 3600
+    with pytest.raises(ValueError):
+        ttl_for_interval("3x")
+
+
+def test_entries_expire_after_their_ttl(clock, tmp_path):
+    cache = OHLCCache(cache_dir=str(tmp_path))
+    df = bars()
+    cache.put("aapl", "1m", "1d", df, ttl=30)
+
+    clock.value += 29
+    pd.testing.assert_frame_equal(cache.get("AAPL", "1m", "1d"), df)
+    clock.value += 1
+    assert cache.get("AAPL", "1m", "1d") is None
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+    assert cache._bytes == 0
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes(clock):
+    size = frame_nbytes(bars())
+    cache = OHLCCache(max_bytes=size * 5 // 2, cache_dir=None)
+    for symbol in ("A", "B"):
+        cache.put(symbol, "1d", "1y", bars())
+    cache.get("A", "1d", "1y")
+    cache.put("C", "1d", "1y", bars())
+
+    assert list(cache._entries) == [("A", "1d", "1y"), ("C", "1d", "1y")]
+    assert cache._bytes == 2 * size
+    assert cache.get("B", "1d", "1y") is None
+
+    # A frame larger than the whole budget is not kept in memory at all
+    cache.put("D", "1d", "1y", bars(rows=500))
+    assert ("D", "1d", "1y") not in cache._entries
+    assert cache._bytes == 2 * size
+
+
+def test_cached_frames_are_copies(clock):
+    cache = OHLCCache(cache_dir=None)
+    df = bars()
+    cache.put("AAPL", "1m", "1d", df)
+    df.iloc[0, 0] = -1.0
+    copy = cache.get("AAPL", "1m", "1d")
+    copy.iloc[1, 0] = -1.0
+
+    assert (cache.get("AAPL", "1m", "1d")["Open"] > 0).all()
+
+
+@pytest.mark.parametrize("tz", ["America/New_York", "UTC", None])
+def test_disk_tier_round_trips_into_a_new_process(clock, tmp_path, tz):
+    df = bars(tz=tz)
+    OHLCCache(cache_dir=str(tmp_path)).put("AAPL", "1m", "1d", df, ttl=60)
+
+    warm = OHLCCache(cache_dir=str(tmp_path))
+    loaded = warm.get("AAPL", "1m", "1d")
+
+    pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+    assert warm.stats["disk_hits"] == 1
+    # The disk hit is promoted into the memory tier
+    warm.get("AAPL", "1m", "1d")
+    assert warm.stats["memory_hits"] == 1
+
+    clock.value += 60
+    assert OHLCCache(cache_dir=str(tmp_path)).get("AAPL", "1m", "1d") is None
+
+
+def test_disk_tier_keeps_plain_indexes_and_skips_object_columns(clock, tmp_path):
+    df = bars().reset_index(drop=True)
+    cache = OHLCCache(cache_dir=str(tmp_path))
+    cache.put("AAPL", "1d", "1y", df)
+    cache.put("MSFT", "1d", "1y", df.assign(Note="x"))
+
+    warm = OHLCCache(cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(warm.get("AAPL", "1d", "1y"), df, check_index_type=False)
+    assert warm.get("MSFT", "1d", "1y") is None
+
+
+def test_get_or_fetch_only_caches_non_empty_results(clock):
+    cache = OHLCCache(cache_dir=None)
+    calls = []
+
+    def fetch(result):
+        calls.append(result)
+        return result
+
+    assert cache.get_or_fetch("AAPL", "1d", "1y", lambda: fetch(pd.DataFrame())).empty
+    df = cache.get_or_fetch("AAPL", "1d", "1y", lambda: fetch(bars()))
+    pd.testing.assert_frame_equal(cache.get_or_fetch("AAPL", "1d", "1y", lambda: fetch(None)), df)
+    assert len(calls) == 2
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from resample import finest, resample_columns
+
+
+def minute_bars(seed, count):
+    rng = np.random.default_rng(seed)
+    # Trading-hours minutes over a few days, with gaps between sessions
+    days = 1_704_117_600 + 86400 * np.arange((count + 389) // 390 + 1)
+    timestamps = (days[:, None] + 60 * np.arange(390)).ravel()[:count]
+    close = 100 + np.cumsum(rng.normal(0, 0.1, count))
+    open_ = close + rng.normal(0, 0.05, count)
+    return {
+        "timestamp": timestamps.tolist(),
+        "open": open_.tolist(),
+        "high": (np.maximum(open_, close) + 0.02).tolist(),
+        "low": (np.minimum(open_, close) - 0.02).tolist(),
+        "close": close.tolist(),
+        "volume": rng.integers(0, 1000, count).astype(float).tolist(),
+    }
+
+
+@pytest.mark.parametrize("interval,rule", [("5m", "5min"), ("15m", "15min"), ("1h", "1h"), ("1d", "1D"), ("1wk", "W-MON")])
+def test_matches_pandas_resample(interval, rule):
+    columns = minute_bars(1, 3000)
+    result = resample_columns(columns, interval)
+
+    frame = pd.DataFrame(columns)
+    frame.index = pd.to_datetime(frame.pop("timestamp"), unit="s")
+    expected = frame.resample(rule, label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    ).dropna()
+
+    starts = pd.to_datetime(result["timestamp"], unit="s")
+    assert list(starts) == list(expected.index)
+    for name in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_array_equal(result[name], expected[name].to_numpy())
+
+
+def test_empty_and_finest():
+    result = resample_columns({name: [] for name in ("timestamp", "open", "high", "low", "close", "volume")}, "1h")
+    assert all(len(values) == 0 for values in result.values())
+    assert finest(["1d", "15m", "1h", "5m"]) == "5m"